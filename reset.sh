@@ -34,6 +34,34 @@ if [ $? -ne 0 ]; then
     exit 1
 fi
 
+echo "Dropping table 'checkpoints' if it exists..."
+psql "$DB_URI" -c "DROP TABLE IF EXISTS checkpoints CASCADE;"
+if [ $? -ne 0 ]; then
+    echo "Error dropping table 'checkpoints'. Exiting."
+    exit 1
+fi
+
+echo "Dropping table 'checkpoint_blobs' if it exists..."
+psql "$DB_URI" -c "DROP TABLE IF EXISTS checkpoint_blobs CASCADE;"
+if [ $? -ne 0 ]; then
+    echo "Error dropping table 'checkpoint_blobs'. Exiting."
+    exit 1
+fi
+
+echo "Dropping table 'checkpoint_writes' if it exists..."
+psql "$DB_URI" -c "DROP TABLE IF EXISTS checkpoint_writes CASCADE;"
+if [ $? -ne 0 ]; then
+    echo "Error dropping table 'checkpoint_writes'. Exiting."
+    exit 1
+fi
+
+echo "Dropping table 'checkpoint_migrations' if it exists..."
+psql "$DB_URI" -c "DROP TABLE IF EXISTS checkpoint_migrations CASCADE;"
+if [ $? -ne 0 ]; then
+    echo "Error dropping table 'checkpoint_migrations'. Exiting."
+    exit 1
+fi
+
 echo "Tables dropped successfully."
 sudo service postgresql restart
 
@@ -1,112 +1,597 @@
-from fastapi import FastAPI, HTTPException, Body, Query
-from typing import Any, Dict, Optional
-from pydantic import BaseModel
-import uvicorn
+"""FastAPI service for report generation, ingestion and LTM retrieval."""
+
 import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Literal
 
+import uvicorn
+from fastapi import Body, FastAPI, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from langgraph.types import Command
+from pydantic import ValidationError
+
+from react_agent.batch import run_batch
+
 # Assume your compiled graph (intelligent_index) and memory store (store) are imported from your project:
-from react_agent.graph import intelligent_index
-from react_agent.utils import load_postgres_store
-from react_agent.utils import initialize_rag
-from react_agent.schemas import GraphInvocationRequest, GraphResponse
+from react_agent.graph import FINAL_REPORT_TAG, JOB_HANDLERS, intelligent_index, warm_up
+from react_agent.ingest import BufferFullError, MicroBatcher, UploadError, iter_ndjson
+from react_agent.jobs import JobWorker
+from react_agent.recording import RequestRecorder
+from react_agent.response_cache import normalize_query
+from react_agent.schemas import (
+    BatchInvocationRequest,
+    BatchResponse,
+    GraphInvocationRequest,
+    GraphResponse,
+    IngestRequest,
+    LogRecord,
+)
+from react_agent.stm import replace_rows
+from react_agent.utils import (
+    BATCH_JOB_RETRIES,
+    BATCH_MAX_CONCURRENCY,
+    BATCH_RETRY_BACKOFF,
+    INGEST_APPROVAL_POLL_SECONDS,
+    INGEST_DEAD_LETTER_PATH,
+    INGEST_FLUSH_ATTEMPTS,
+    INGEST_MAX_BUFFERED_RECORDS,
+    INGEST_MAX_BYTES,
+    INGEST_MAX_RECORDS,
+    INGEST_MAX_WAIT_SECONDS,
+    INGEST_RETRY_BACKOFF,
+    JOB_STOP_TIMEOUT,
+    JOB_WORKERS,
+    REQUEST_LOG_PATH,
+    RETRIEVE_CACHE_SIMILARITY,
+    RETRIEVE_DEFAULT_MODE,
+    RETRIEVE_DEFAULT_TOP_K,
+    STARTUP_WARMUP,
+    UPLOAD_MAX_DECOMPRESSED_BYTES,
+    UPLOAD_MAX_LINE_BYTES,
+    aget_postgres_store,
+    aget_rag,
+    arun_on_rag_loop,
+    arun_with_rag,
+    astream_with_rag,
+    build_query_param,
+    close_openai_clients,
+    close_postgres_store,
+    close_rag,
+    get_cached_embedder,
+    get_job_queue,
+    get_metrics,
+    get_postgres_store,
+    get_response_cache,
+    get_store_cache,
+    ltm_version_name,
+    start_rag_loop,
+    stop_rag_loop,
+)
+
+store_cache = get_store_cache()
+job_worker = JobWorker(get_job_queue(), JOB_HANDLERS, workers=JOB_WORKERS)
+
+
+async def run_ingest_window(namespace: str, records: list):
+    """Run the graph once for a flushed ingest window."""
+    # One graph run per flushed window; the report then waits for approval as with /invoke.
+    await intelligent_index.ainvoke(
+        {"data": records, "namespace": namespace}, config=get_thread_config(namespace)
+    )
+
+
+async def ingest_window_ready(namespace: str) -> bool:
+    """Return whether a namespace can take a new ingest window."""
+    # A new run on the namespace's thread would replace the report awaiting approval,
+    # so windows are held (see /ingest/status) until it is approved or refined
+    return await check_for_interrupt(get_thread_config(namespace)) is None
+
+
+ingest_batcher = MicroBatcher(
+    run_ingest_window,
+    max_records=INGEST_MAX_RECORDS,
+    max_bytes=INGEST_MAX_BYTES,
+    max_wait=INGEST_MAX_WAIT_SECONDS,
+    max_buffered_records=INGEST_MAX_BUFFERED_RECORDS,
+    max_flush_attempts=INGEST_FLUSH_ATTEMPTS,
+    retry_backoff=INGEST_RETRY_BACKOFF,
+    dead_letter_path=INGEST_DEAD_LETTER_PATH or None,
+    ready_fn=ingest_window_ready,
+    ready_poll=INGEST_APPROVAL_POLL_SECONDS,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the shared resources and workers, and shut them down on exit."""
+    # LightRAG instances live on their own loop thread, so inserts and storage writes
+    # don't stall requests; handlers and job workers submit their LTM calls to it.
+    start_rag_loop()
+    if STARTUP_WARMUP:
+        # Load the shared LightRAG instance once; the graph reuses the same handle.
+        await arun_on_rag_loop(aget_rag)
+        # Open the async store on the serving loop so the async graph nodes can use it.
+        await aget_postgres_store()
+        # Build the models, langmem helpers, sync store and checkpointer before taking traffic.
+        await asyncio.to_thread(warm_up)
+    # Apply instruction/STM invalidations published by other workers (STORE_CACHE_NOTIFY).
+    store_cache.start_listener()
+    # Post-approval processing (episodes, prompt optimisation, STM, LTM) runs here.
+    job_worker.start()
+    ingest_batcher.start()
+    yield
+    await ingest_batcher.stop()
+    # Off the serving loop: a worker may be finishing an LTM insert
+    await asyncio.to_thread(job_worker.stop, timeout=JOB_STOP_TIMEOUT)
+    store_cache.stop_listener()
+    await close_postgres_store()
+    await arun_on_rag_loop(close_rag)
+    await arun_on_rag_loop(close_openai_clients)
+    stop_rag_loop()
+    await close_openai_clients()
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Record requests for load-test replay when REQUEST_LOG_PATH is set
+if REQUEST_LOG_PATH:
+    app.add_middleware(RequestRecorder, path=REQUEST_LOG_PATH)
 
-store = load_postgres_store()
-rag = asyncio.run(initialize_rag())
-app = FastAPI()
 
 # Helper function: construct thread configuration from namespace.
 def get_thread_config(namespace: str):
+    """Return the graph thread config of a namespace."""
     return {"configurable": {"thread_id": namespace}}
 
-def check_for_interrupt(thread_config: dict) -> Optional[Dict[str, Any]]:
-    """
-    Helper function to check if the latest graph state indicates a human interrupt.
-    This implementation assumes that your graph state (obtained via get_state)
+
+async def check_for_interrupt(thread_config: dict) -> Dict[str, Any] | None:
+    """Return the pending human interrupt of the latest graph state, if any.
+
+    This implementation assumes that your graph state (obtained via aget_state)
     exposes tasks with an `interrupts` attribute.
     """
-    state = intelligent_index.get_state(thread_config)
-    
-    if state and hasattr(state, "tasks") and any(task.interrupts for task in state.tasks):
+    state = await intelligent_index.aget_state(thread_config)
+
+    if (
+        state
+        and hasattr(state, "tasks")
+        and any(task.interrupts for task in state.tasks)
+    ):
         # For demonstration, we return a simple message.
         # You could extract more details from the pending Interrupt objects.
         return state.tasks[-1].interrupts[-1].value
     return None
 
-@app.post("/invoke", response_model=GraphResponse)
-def invoke_graph(request: GraphInvocationRequest):
-    # Determine if the user is sending an initial invocation or a human response.
-    # For resume, the namespace must be provided.
+
+def build_graph_input(request: GraphInvocationRequest):
+    """Return the graph input and thread config for a request.
+
+    The request is either an initial invocation (data + namespace) or a human
+    resume (approve/feedback + namespace).
+    """
+    thread_config = get_thread_config(request.namespace)
     if request.data is not None and request.namespace is not None:
         # Initial invocation
-        thread_config = {"configurable": {"thread_id": request.namespace}}
-        initial_state = {"data": request.data, "namespace": request.namespace}
-        try:
-            result = intelligent_index.invoke(initial_state, config=thread_config)
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
-    elif (request.approve is not None or request.feedback is not None) and request.namespace is not None:
-        # Human response/resume.
-        thread_config = {"configurable": {"thread_id": request.namespace}}
-        # Prepare a resume input dictionary.
+        return {"data": request.data, "namespace": request.namespace}, thread_config
+    elif (
+        request.approve is not None or request.feedback is not None
+    ) and request.namespace is not None:
+        # Human response/resume. Prepare a resume input dictionary.
         resume_input = {}
         if request.approve is not None:
             resume_input["approve"] = request.approve
         if request.feedback is not None:
             resume_input["feedback"] = request.feedback
-        try:
-            result = intelligent_index.invoke(Command(resume=resume_input), config=thread_config)
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
+        return Command(resume=resume_input), thread_config
     else:
-        raise HTTPException(status_code=400, detail="Invalid request payload. Provide either initial invocation (data + namespace) or resume input (approve/feedback + namespace).")
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid request payload. Provide either initial invocation (data + namespace) or resume input (approve/feedback + namespace).",
+        )
+
+
+@app.post("/invoke", response_model=GraphResponse)
+async def invoke_graph(request: GraphInvocationRequest):
+    """Start a report run or resume one waiting for human input."""
+    # Determine if the user is sending an initial invocation or a human response.
+    # For resume, the namespace must be provided.
+    graph_input, thread_config = build_graph_input(request)
+    try:
+        result = await intelligent_index.ainvoke(graph_input, config=thread_config)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
     # Check if the graph is waiting for human input.
-    human_interrupt = check_for_interrupt(thread_config)
+    human_interrupt = await check_for_interrupt(thread_config)
     if human_interrupt:
         return GraphResponse(status="waiting", human_interrupt=human_interrupt)
     else:
         return GraphResponse(status="final", result=result)
 
-@app.post("/set-instructions")
-def set_instructions(namespace: str = Query(...), instructions: str = Body(...)):
+
+@app.post("/invoke/batch", response_model=BatchResponse)
+async def invoke_graph_batch(request: BatchInvocationRequest):
+    """Run an initial invocation for many namespaces concurrently.
+
+    Returns each job's status ("waiting" with its interrupt, "final" or "error"). Jobs
+    for the same namespace are merged into one run; a failed job does not fail the
+    batch.
+    """
+    started = time.perf_counter()
+    results = await run_batch(
+        intelligent_index,
+        [job.model_dump() for job in request.jobs],
+        max_concurrency=request.max_concurrency or BATCH_MAX_CONCURRENCY,
+        retries=BATCH_JOB_RETRIES,
+        backoff=BATCH_RETRY_BACKOFF,
+    )
+    counts: Dict[str, int] = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    return BatchResponse(
+        results=results, counts=counts, elapsed=time.perf_counter() - started
+    )
+
+
+# Nodes whose LLM output is the report shown to the operator.
+REPORT_NODES = ("generate_report", "refine_report")
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@app.post("/invoke/stream")
+async def invoke_graph_stream(request: GraphInvocationRequest):
+    """Run /invoke, streaming its progress as Server-Sent Events.
+
+    Events are `node_start` / `node_end` for graph transitions, `token` for report
+    deltas, then a final `interrupt` (waiting for human input) or `final` event.
+    Failures are sent as `error`.
+
+    Only the call that produces the final report is streamed, not the map and
+    intermediate reduce calls of oversized data; a cached report is sent as one token.
+    """
+    graph_input, thread_config = build_graph_input(request)
+
+    async def event_stream():
+        try:
+            async for event in intelligent_index.astream_events(
+                graph_input, config=thread_config, version="v2"
+            ):
+                kind = event["event"]
+                node = event.get("metadata", {}).get("langgraph_node")
+                if (
+                    kind == "on_chat_model_stream"
+                    and node in REPORT_NODES
+                    and FINAL_REPORT_TAG in event.get("tags", [])
+                ):
+                    content = event["data"]["chunk"].content
+                    if content:
+                        yield format_sse("token", {"node": node, "content": content})
+                elif (
+                    kind in ("on_chain_start", "on_chain_end")
+                    and node
+                    and event["name"] == node
+                    and not node.startswith("__")
+                ):
+                    output = (
+                        event["data"].get("output") if kind == "on_chain_end" else None
+                    )
+                    graph_step = any(
+                        tag.startswith("graph:step:") for tag in event.get("tags", [])
+                    )
+                    if (
+                        graph_step
+                        and isinstance(output, dict)
+                        and output.get("token_usage", {}).get("cache_hit")
+                    ):
+                        # A cached report was not generated, so nothing was streamed
+                        yield format_sse(
+                            "token", {"node": node, "content": output["report"]}
+                        )
+                    yield format_sse(
+                        "node_start" if kind == "on_chain_start" else "node_end",
+                        {"node": node},
+                    )
+
+            human_interrupt = await check_for_interrupt(thread_config)
+            if human_interrupt:
+                yield format_sse(
+                    "interrupt",
+                    {"status": "waiting", "human_interrupt": human_interrupt},
+                )
+            else:
+                yield format_sse("final", {"status": "final"})
+        except Exception as e:
+            yield format_sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/ingest", status_code=202)
+async def ingest(request: IngestRequest):
+    """Buffer records for a namespace.
+
+    They are processed in one graph run once the namespace's record, byte or
+    time window is reached.
     """
-    Endpoint to set instructions for a specific namespace.
+    try:
+        return ingest_batcher.add(request.namespace, request.data)
+    except BufferFullError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(int(INGEST_MAX_WAIT_SECONDS))},
+        )
+
+
+async def aenumerate(iterable, start=0):
+    """Enumerate an async iterable."""
+    i = start
+    async for item in iterable:
+        yield i, item
+        i += 1
+
+
+@app.post("/ingest/upload")
+async def ingest_upload(
+    request: Request,
+    namespace: str = Query(...),
+    compression: str | None = Query(None),
+    flush: bool = Query(False),
+):
+    """Stream a newline-delimited JSON body into the namespace's ingest buffer.
+
+    The body may be gzip or zstd compressed, given by `compression` or the
+    Content-Encoding header. Records are validated one line at a time; memory use is
+    bounded by the ingest buffer, which applies backpressure while it flushes.
     """
-    store.put(("instructions",), key=namespace, value={"prompt": instructions})
+    compression = compression or request.headers.get("content-encoding", "none")
+    accepted, rejected, errors = 0, 0, []
+    batch = []
+    try:
+        async for line_no, value in aenumerate(
+            iter_ndjson(
+                request.stream(),
+                compression,
+                UPLOAD_MAX_LINE_BYTES,
+                UPLOAD_MAX_DECOMPRESSED_BYTES,
+            ),
+            start=1,
+        ):
+            try:
+                if isinstance(value, Exception):
+                    raise value
+                record = LogRecord.model_validate(value)
+            except (ValueError, ValidationError) as e:
+                rejected += 1
+                if len(errors) < 20:
+                    errors.append({"line": line_no, "error": str(e)})
+                continue
+            batch.append(record.model_dump(exclude_none=True))
+            if len(batch) >= INGEST_MAX_RECORDS:
+                await ingest_batcher.put(namespace, batch)
+                accepted += len(batch)
+                batch = []
+        if batch:
+            await ingest_batcher.put(namespace, batch)
+            accepted += len(batch)
+    except UploadError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{e} ({accepted} records accepted before the error)",
+        )
+
+    if flush:
+        await ingest_batcher.flush(namespace)
+    return {
+        "namespace": namespace,
+        "accepted": accepted,
+        "rejected": rejected,
+        "errors": errors,
+        "status": ingest_batcher.status(namespace),
+    }
+
+
+@app.post("/ingest/flush")
+async def flush_ingest(namespace: str = Query(...)):
+    """Flush a namespace's buffered records immediately and wait for the report."""
+    await ingest_batcher.flush(namespace)
+    human_interrupt = await check_for_interrupt(get_thread_config(namespace))
+    return {
+        "status": ingest_batcher.status(namespace),
+        "human_interrupt": human_interrupt,
+    }
+
+
+@app.get("/ingest/status")
+def ingest_status(namespace: str = Query(...)):
+    """Return the ingest buffer status of a namespace."""
+    return ingest_batcher.status(namespace)
+
+
+@app.post("/set-instructions")
+def set_instructions(namespace: str = Query(...), instructions: str = Body(...)):
+    """Endpoint to set instructions for a specific namespace."""
+    store_cache.put(
+        get_postgres_store(), ("instructions",), namespace, {"prompt": instructions}
+    )
     return {"namespace": namespace, "instructions": instructions}
 
+
 # GET /retrieve-instructions endpoint: returns the instructions for a namespace
 @app.get("/retrieve-instructions", response_model=Dict[str, str])
 def retrieve_instructions(namespace: str = Query(...)):
-    instructions_item = store.get(("instructions",), key=namespace)
+    """Return the report instructions of a namespace."""
+    instructions_item = store_cache.get(
+        get_postgres_store(), ("instructions",), namespace
+    )
     if instructions_item and "prompt" in instructions_item.value:
-        return {"namespace": namespace, "instructions": instructions_item.value["prompt"]}
+        return {
+            "namespace": namespace,
+            "instructions": instructions_item.value["prompt"],
+        }
     else:
-        raise HTTPException(status_code=404, detail="Instructions not found for given namespace.")
+        raise HTTPException(
+            status_code=404, detail="Instructions not found for given namespace."
+        )
+
 
 @app.post("/set-short-term-report")
 def set_short_term_report(namespace: str = Query(...), report: str = Body(...)):
+    """Set the short-term report of a namespace manually.
+
+    The report is parsed into STM entries, which later approvals merge into.
     """
-    Endpoint to manually set a short-term report for a specific namespace.
-    """
-    store.put(("stm",), key=namespace, value={"report": report})
+    replace_rows(get_postgres_store(), store_cache, namespace, report)
     return {"namespace": namespace, "short_term_report": report}
 
+
 # GET /retrieve-short-term endpoint: returns the STM report for a namespace
 @app.get("/retrieve-short-term", response_model=Dict[str, str])
 def retrieve_short_term(namespace: str = Query(...)):
-    stm_item = store.get(("stm",), key=namespace)
+    """Return the short-term report of a namespace."""
+    stm_item = store_cache.get(get_postgres_store(), ("stm",), namespace)
     if stm_item and "report" in stm_item.value:
         return {"namespace": namespace, "short_term_report": stm_item.value["report"]}
     else:
-        raise HTTPException(status_code=404, detail="Short term report not found for given namespace.")
+        raise HTTPException(
+            status_code=404, detail="Short term report not found for given namespace."
+        )
+
 
 # GET /retrieve endpoint: returns search results for a given query
+RetrieveMode = Literal["naive", "local", "global", "hybrid", "mix"]
+
+
 @app.get("/retrieve")
-def retrieve_info(query: str = Query(...)):
-    results = rag.query(query)  
-    return {"query": query, "results": results}
+async def retrieve_info(
+    query: str = Query(...),
+    namespace: str | None = Query(None),
+    mode: RetrieveMode = Query(RETRIEVE_DEFAULT_MODE),
+    top_k: int = Query(RETRIEVE_DEFAULT_TOP_K, ge=1),
+    only_need_context: bool = Query(False),
+    stream: bool = Query(False),
+):
+    """Query the LTM.
+
+    With LTM_PARTITIONING=namespace, `namespace` selects the partition to search (the
+    shared store if omitted). `only_need_context` returns the retrieved context without
+    generating an answer; `stream` sends the answer as Server-Sent Events (`token`
+    deltas, then `final`).
+    """
+    response_cache = get_response_cache()
+    key = embedding = None
+    if response_cache is not None:
+        # Answers are only valid for the LTM and retrieval settings they were computed with
+        version_name = ltm_version_name(namespace)
+        key_prefix = f"{version_name}@v{await response_cache.aversion(version_name)}:{mode}:{top_k}:{int(only_need_context)}:"
+        key = key_prefix + normalize_query(query)
+        near = RETRIEVE_CACHE_SIMILARITY > 0
+        results = await response_cache.aget("retrieve", key, count_miss=not near)
+        if results is None and near:
+            embedding = (await get_cached_embedder().aembed([normalize_query(query)]))[
+                0
+            ]
+            results = await response_cache.anearest(
+                "retrieve", embedding, RETRIEVE_CACHE_SIMILARITY, key_prefix=key_prefix
+            )
+        if results is not None:
+            if stream:
+                return StreamingResponse(
+                    stream_answer(query, single_chunk(results), cached=True),
+                    media_type="text/event-stream",
+                )
+            return {"query": query, "results": results, "cached": True}
+
+    param = build_query_param(
+        mode=mode, top_k=top_k, only_need_context=only_need_context, stream=stream
+    )
+
+    async def cache_answer(answer):
+        if response_cache is not None:
+            await response_cache.aput("retrieve", key, answer, embedding=embedding)
+
+    async def query_rag(rag):
+        with get_metrics().timer("rag_seconds", op="query"):
+            return await rag.aquery(query, param=param)
+
+    if stream:
+        # The partition stays checked out (not evicted or closed) until the response
+        # body has been sent or the client disconnects. Context-only lookups and
+        # LightRAG's own cache hits come back as plain text, sent as one chunk.
+        answer_chunks = astream_with_rag(namespace, query_rag)
+        return StreamingResponse(
+            stream_answer(query, answer_chunks, on_complete=cache_answer),
+            media_type="text/event-stream",
+        )
+
+    results = await arun_with_rag(namespace, query_rag)
+    await cache_answer(results)
+    return {"query": query, "results": results, "cached": False}
+
+
+async def single_chunk(text: str):
+    """Yield `text` as the only chunk of an answer."""
+    yield text
+
+
+async def stream_answer(query: str, chunks, cached: bool = False, on_complete=None):
+    """Stream answer chunks as `token` events, then a `final` event."""
+    parts = []
+    try:
+        async for chunk in chunks:
+            parts.append(chunk)
+            yield format_sse("token", {"content": chunk})
+    except Exception as e:
+        yield format_sse("error", {"detail": str(e)})
+        return
+    if on_complete is not None:
+        await on_complete("".join(parts))
+    yield format_sse("final", {"query": query, "cached": cached})
+
+
+# GET /jobs endpoint: returns the status of post-approval jobs for a namespace
+@app.get("/jobs")
+def retrieve_jobs(namespace: str = Query(...), limit: int = Query(50)):
+    """Return the most recent post-approval jobs of a namespace."""
+    return {
+        "namespace": namespace,
+        "jobs": get_job_queue().status(namespace, limit=limit),
+    }
+
+
+# GET /embedding-cache-stats endpoint: returns embedding cache hit/miss counters
+@app.get("/embedding-cache-stats")
+def embedding_cache_stats():
+    """Return the embedding cache statistics."""
+    return get_cached_embedder().cache.stats()
+
+
+# GET /response-cache-stats endpoint: returns report and retrieve cache hit ratios
+@app.get("/response-cache-stats")
+def response_cache_stats():
+    """Return the response cache statistics."""
+    response_cache = get_response_cache()
+    return response_cache.stats() if response_cache else {"enabled": False}
+
+
+# GET /metrics endpoint: node, external call, token and cache metrics in the Prometheus text format
+@app.get("/metrics")
+def metrics():
+    """Return the metrics in the Prometheus text format."""
+    return PlainTextResponse(
+        get_metrics().render(), media_type="text/plain; version=0.0.4"
+    )
+
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=5002)
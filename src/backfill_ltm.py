@@ -0,0 +1,112 @@
+"""Backfill the long term memory with historical reports.
+
+Usage:
+    python backfill_ltm.py reports/ [--batch-size 100] [--parallel-docs 4] [--max-llm-calls 16]
+    python backfill_ltm.py reports.ndjson.gz [--checkpoint reports.checkpoint.json]
+    python backfill_ltm.py tenant-a-reports/ --namespace tenant-a
+
+Reports already in the LTM are skipped. Progress is checkpointed after every batch (by
+default next to the input), so re-running the same command after an interruption
+continues where it stopped.
+"""
+
+import argparse
+import asyncio
+import sys
+
+from react_agent.backfill import run_backfill
+from react_agent.utils import (
+    AZURE_OPENAI_MAX_CONCURRENCY,
+    close_openai_clients,
+    get_response_cache,
+    initialize_rag,
+    ltm_partition,
+    ltm_version_name,
+)
+
+
+def print_progress(progress):
+    """Print backfill progress to stderr."""
+    print(
+        f"{progress.read} read, {progress.inserted} inserted, {progress.skipped} skipped, "
+        f"{progress.invalid} invalid | {progress.docs_per_second:.2f} docs/s, "
+        f"{progress.chars_per_second:,.0f} chars/s, {progress.elapsed:.0f}s elapsed",
+        file=sys.stderr,
+    )
+
+
+async def run(args):
+    """Backfill the LTM from `args.source`, resuming from its checkpoint."""
+    # Entity extraction runs for up to `parallel_docs` documents at a time, with
+    # at most `max_llm_calls` LLM requests in flight across them
+    rag = await initialize_rag(
+        partition=ltm_partition(args.namespace),
+        max_parallel_insert=args.parallel_docs,
+        llm_model_max_async=args.max_llm_calls,
+    )
+    try:
+        progress = await run_backfill(
+            rag,
+            args.source,
+            batch_size=args.batch_size,
+            checkpoint_path=args.checkpoint
+            or f"{args.source.rstrip('/')}.checkpoint.json",
+            on_progress=print_progress,
+        )
+        failed = (await rag.doc_status.get_status_counts()).get("failed", 0)
+        if failed:
+            print(
+                f"{failed} documents failed extraction; re-run the same command to retry them",
+                file=sys.stderr,
+            )
+    finally:
+        await rag.finalize_storages()
+        await close_openai_clients()
+
+    # Cached /retrieve answers predate the backfilled reports
+    response_cache = get_response_cache()
+    if response_cache and progress.inserted:
+        response_cache.bump_version(ltm_version_name(args.namespace))
+
+    return progress
+
+
+def main():
+    """Parse the command line and run the backfill."""
+    parser = argparse.ArgumentParser(
+        description="Insert historical reports into the LightRAG long term memory."
+    )
+    parser.add_argument(
+        "source", help="Directory of .txt/.md reports or NDJSON (.gz) file"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=100, help="Reports per insert and checkpoint"
+    )
+    parser.add_argument(
+        "--parallel-docs", type=int, default=4, help="Documents extracted concurrently"
+    )
+    parser.add_argument(
+        "--max-llm-calls",
+        type=int,
+        default=AZURE_OPENAI_MAX_CONCURRENCY,
+        help="Concurrent LLM calls for entity extraction",
+    )
+    parser.add_argument(
+        "--namespace",
+        help="Load into this namespace's LTM partition (LTM_PARTITIONING=namespace)",
+    )
+    parser.add_argument(
+        "--checkpoint", help="Checkpoint file (default: <source>.checkpoint.json)"
+    )
+    args = parser.parse_args()
+
+    progress = asyncio.run(run(args))
+    print(
+        f"Done: {progress.inserted} reports inserted, {progress.skipped} already present, "
+        f"{progress.invalid} invalid in {progress.elapsed:.0f}s",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
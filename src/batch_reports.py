@@ -0,0 +1,94 @@
+"""Generate reports for many namespaces in one run.
+
+Usage:
+    python batch_reports.py jobs.json [--concurrency 16] [--output results.json]
+
+The input is a JSON list of {"namespace": ..., "data": ...} jobs, or NDJSON
+with one job per line. Each job stops at human approval as with /invoke;
+approve or refine them through the API afterwards.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from react_agent.batch import run_batch
+from react_agent.graph import intelligent_index
+from react_agent.utils import (
+    BATCH_JOB_RETRIES,
+    BATCH_MAX_CONCURRENCY,
+    BATCH_RETRY_BACKOFF,
+    aget_postgres_store,
+    aget_rag,
+    close_openai_clients,
+    close_postgres_store,
+    close_rag,
+)
+
+
+def load_jobs(path):
+    """Load jobs from a JSON list or NDJSON file."""
+    with open(path) as f:
+        text = f.read()
+    if text.lstrip().startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+async def run(jobs, concurrency):
+    """Run the jobs through the graph."""
+    await aget_rag()
+    await aget_postgres_store()
+    try:
+        return await run_batch(
+            intelligent_index,
+            jobs,
+            max_concurrency=concurrency,
+            retries=BATCH_JOB_RETRIES,
+            backoff=BATCH_RETRY_BACKOFF,
+        )
+    finally:
+        await close_postgres_store()
+        await close_rag()
+        await close_openai_clients()
+
+
+def main():
+    """Parse the command line and run the batch."""
+    parser = argparse.ArgumentParser(
+        description="Generate reports for many namespaces concurrently."
+    )
+    parser.add_argument(
+        "jobs", help="JSON list or NDJSON file of {namespace, data} jobs"
+    )
+    parser.add_argument("--concurrency", type=int, default=BATCH_MAX_CONCURRENCY)
+    parser.add_argument(
+        "--output", help="Write per-job results to this file instead of stdout"
+    )
+    args = parser.parse_args()
+
+    jobs = load_jobs(args.jobs)
+    started = time.perf_counter()
+    results = asyncio.run(run(jobs, args.concurrency))
+    elapsed = time.perf_counter() - started
+
+    for result in results:
+        print(
+            f"{result['namespace']}: {result['status']} ({result['elapsed']:.1f}s)"
+            + (f" - {result['error']}" if result.get("error") else ""),
+            file=sys.stderr,
+        )
+    print(f"{len(results)} jobs in {elapsed:.1f}s", file=sys.stderr)
+
+    output = json.dumps(results, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
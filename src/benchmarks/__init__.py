@@ -0,0 +1 @@
+"""Offline benchmarks with deterministic model and embedding stand-ins."""
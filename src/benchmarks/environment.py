@@ -0,0 +1,142 @@
+"""Points the app at local fakes and a scratch directory for benchmarking.
+
+`install` must run before `react_agent.utils` (and so the graph and the API) is
+imported: configuration is read from the environment at import, and the graph
+binds the factories for its models, store and checkpointer when it is imported.
+"""
+
+import logging
+import os
+import sys
+from typing import Dict, List
+
+from benchmarks.fakes import (
+    FakeChatModel,
+    FakeEmbeddings,
+    FakeModelConfig,
+    make_llm_model_func,
+)
+
+logger = logging.getLogger(__name__)
+
+STORES = ("memory", "postgres")
+
+
+class ApproximateEncoder:
+    """Stand-in for tiktoken when its encodings cannot be downloaded.
+
+    One token per four characters, with a vocabulary built as text is seen so
+    decode inverts encode.
+    """
+
+    def __init__(self, chars_per_token: int = 4):
+        """Create an encoder with `chars_per_token` characters per token."""
+        self.chars_per_token = chars_per_token
+        self._ids: Dict[str, int] = {}
+        self._pieces: List[str] = []
+
+    def encode(self, text: str, **kwargs) -> List[int]:
+        """Return the token ids of `text`."""
+        tokens = []
+        for i in range(0, len(text), self.chars_per_token):
+            piece = text[i : i + self.chars_per_token]
+            token = self._ids.get(piece)
+            if token is None:
+                token = self._ids[piece] = len(self._pieces)
+                self._pieces.append(piece)
+            tokens.append(token)
+        return tokens
+
+    def decode(self, tokens: List[int]) -> str:
+        """Return the text of token ids returned by `encode`."""
+        return "".join(self._pieces[token] for token in tokens)
+
+
+def _install_tokenizer() -> None:
+    import lightrag.utils
+    import tiktoken
+
+    try:
+        tiktoken.encoding_for_model("gpt-4o-mini")
+    except Exception:
+        logger.warning(
+            "tiktoken encodings unavailable offline; LightRAG chunking uses a 4 chars/token estimate"
+        )
+        lightrag.utils.ENCODER = ApproximateEncoder()
+
+
+def install(
+    workdir: str,
+    config: FakeModelConfig,
+    store: str = "memory",
+    response_cache: bool = False,
+):
+    """Configure a scratch environment under `workdir` with fake Azure models.
+
+    The chat models and embeddings are replaced with fakes. With store="memory" the
+    LangGraph store and checkpointer are in-process; with "postgres" they use DB_URI.
+
+    Returns the `react_agent.utils` module.
+    """
+    if store not in STORES:
+        raise ValueError(f"store must be one of {STORES}")
+    if "react_agent.utils" in sys.modules:
+        raise RuntimeError(
+            "benchmarks.environment.install() must run before react_agent is imported"
+        )
+
+    os.makedirs(workdir, exist_ok=True)
+    os.environ.update(
+        {
+            "EMBEDDING_CACHE_PATH": os.path.join(workdir, "embedding_cache.sqlite"),
+            "JOB_QUEUE_PATH": os.path.join(workdir, "jobs.sqlite"),
+            "INGEST_DEAD_LETTER_PATH": os.path.join(
+                workdir, "ingest_dead_letter.ndjson"
+            ),
+            "RESPONSE_CACHE_PATH": os.path.join(workdir, "response_cache.sqlite"),
+            "RESPONSE_CACHE_ENABLED": "true" if response_cache else "false",
+            "STORE_CACHE_NOTIFY": "false",
+        }
+    )
+    for name in (
+        "AZURE_OPENAI_DEPLOYMENT",
+        "AZURE_OPENAI_ADVANCED_DEPLOYMENT",
+        "AZURE_EMBEDDING_DEPLOYMENT",
+    ):
+        os.environ.setdefault(name, "fake")
+
+    from react_agent import utils
+
+    utils.WORKING_DIR = os.path.join(workdir, "rag")
+    os.makedirs(utils.WORKING_DIR, exist_ok=True)
+    utils.get_llm = lambda: FakeChatModel(config=config)
+    utils.get_advanced_llm = lambda: FakeChatModel(config=config)
+    embeddings = FakeEmbeddings(config)
+    utils.get_embeddings = lambda: embeddings
+    utils._azure_embed = embeddings.aembed_documents
+    utils.llm_model_func = make_llm_model_func(config)
+    _install_tokenizer()
+
+    if store == "memory":
+        from langgraph.checkpoint.memory import MemorySaver
+        from langgraph.store.memory import InMemoryStore
+
+        from react_agent.embeddings import CachedEmbeddings
+
+        memory_store = InMemoryStore(
+            index={
+                "dims": utils.EMBEDDINGS_DIMENSION,
+                "embed": CachedEmbeddings(utils.get_cached_embedder()),
+            }
+        )
+
+        async def aget_store():
+            return memory_store
+
+        utils.get_postgres_store = lambda: memory_store
+        utils.aget_postgres_store = aget_store
+        utils.load_checkpointer = MemorySaver
+    elif not utils.DB_URI:
+        raise RuntimeError("store='postgres' requires DB_URI")
+
+    return utils
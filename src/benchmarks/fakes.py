@@ -0,0 +1,279 @@
+"""Deterministic, offline stand-ins for the Azure chat models and embeddings.
+
+Outputs depend only on the input (seeded by its hash), so repeated runs do the
+same work. Latency is simulated as a fixed per-call delay plus a per-token or
+per-text cost.
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, List, get_args, get_origin
+
+import numpy as np
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+from pydantic import BaseModel
+from typing_extensions import override
+
+WORDS = (
+    "system service latency request error warning sensor device user update network storage "
+    "temperature threshold cluster node backup transfer alert snapshot schedule deployment "
+    "controller gateway queue retry timeout connection memory disk report status"
+).split()
+
+TUPLE = "<|>"
+RECORD = "##"
+COMPLETE = "<|COMPLETE|>"
+
+
+@dataclass
+class FakeModelConfig:
+    """Latency and output size of the fake models."""
+
+    llm_latency: float = 0.05
+    llm_tokens_per_second: float = 500.0
+    output_tokens: int = 300
+    embed_latency: float = 0.01
+    embed_per_text: float = 0.0002
+    embedding_dim: int = 1536
+
+    def llm_delay(self, tokens: int) -> float:
+        """Return the simulated duration of a call generating `tokens` tokens."""
+        return self.llm_latency + (
+            tokens / self.llm_tokens_per_second if self.llm_tokens_per_second else 0
+        )
+
+    def embed_delay(self, texts: int) -> float:
+        """Return the simulated duration of embedding `texts` texts."""
+        return self.embed_latency + self.embed_per_text * texts
+
+
+def _rng(text: str) -> random.Random:
+    return random.Random(hashlib.md5(text.encode()).digest())
+
+
+def fake_text(prompt: str, tokens: int) -> str:
+    """Return `tokens` words of text seeded by the prompt."""
+    rng = _rng(prompt)
+    words = [rng.choice(WORDS) for _ in range(tokens)]
+    return "\n".join(
+        " ".join(words[i : i + 12]).capitalize() + "." for i in range(0, len(words), 12)
+    )
+
+
+def fake_structured(schema: type, prompt: str, points: int = 3) -> BaseModel:
+    """Build an instance of a pydantic `schema` filled from the prompt.
+
+    String fields named "date" take the last YYYY-MM-DD date in it, other strings and
+    string lists get fake text, and nested model lists get one item.
+    """
+    values = {}
+    for name, field in schema.model_fields.items():
+        annotation, seed = field.annotation, f"{prompt}|{schema.__name__}.{name}"
+        item = (
+            get_args(annotation)[0] if get_origin(annotation) in (list, List) else None
+        )
+        if annotation is str and name == "date":
+            dates = re.findall(r"\d{4}-\d{2}-\d{2}", prompt)
+            values[name] = dates[-1] if dates else ""
+        elif annotation is str:
+            values[name] = fake_text(seed, 3).rstrip(".")
+        elif item is str:
+            values[name] = [fake_text(f"{seed}|{i}", 8) for i in range(points)]
+        elif isinstance(item, type) and issubclass(item, BaseModel):
+            values[name] = [fake_structured(item, prompt, points)]
+    return schema(**values)
+
+
+def fake_extraction(prompt: str, max_entities: int = 8) -> str:
+    """Return entity/relationship records in LightRAG's extraction format.
+
+    They are taken from the capitalised words of the text being extracted.
+    """
+    text = prompt.rsplit("Text:", 1)[-1].split("######################", 1)[0]
+    names = list(dict.fromkeys(re.findall(r"\b[A-Z][A-Za-z0-9_-]{2,}\b", text)))[
+        :max_entities
+    ]
+    if not names:
+        names = ["Log"]
+    records = [
+        f'("entity"{TUPLE}{name}{TUPLE}event{TUPLE}{name} appears in the report.)'
+        for name in names
+    ]
+    records += [
+        f'("relationship"{TUPLE}{a}{TUPLE}{b}{TUPLE}{a} and {b} appear together.{TUPLE}co-occurrence{TUPLE}1.0)'
+        for a, b in zip(names, names[1:])
+    ]
+    return RECORD.join(records) + RECORD + COMPLETE
+
+
+def fake_keywords(prompt: str) -> str:
+    """Return LightRAG's keyword extraction JSON for the query in a prompt."""
+    query = prompt.rsplit("Current Query:", 1)[-1].split("######", 1)[0]
+    words = re.findall(r"[A-Za-z]{3,}", query)[:6]
+    return json.dumps(
+        {"high_level_keywords": words[:2], "low_level_keywords": words[2:]}
+    )
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model returning `config.output_tokens` words of deterministic text."""
+
+    config: FakeModelConfig = FakeModelConfig()
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    @override
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "FakeChatModel":
+        # langmem binds its tools at construction; the fake never calls them, so
+        # the feedback path (episodes, prompt optimisation) is not benchmarked
+        return self
+
+    @override
+    def with_structured_output(self, schema: Any, **kwargs: Any) -> RunnableLambda:
+        def prompt_of(input: Any) -> str:
+            return "\n".join(
+                str(message.content)
+                for message in self._convert_input(input).to_messages()
+            )
+
+        def invoke(input: Any) -> BaseModel:
+            time.sleep(self.config.llm_delay(self.config.output_tokens))
+            return fake_structured(schema, prompt_of(input))
+
+        async def ainvoke(input: Any) -> BaseModel:
+            await asyncio.sleep(self.config.llm_delay(self.config.output_tokens))
+            return fake_structured(schema, prompt_of(input))
+
+        return RunnableLambda(invoke, afunc=ainvoke)
+
+    def _result(self, messages: List[BaseMessage]) -> ChatResult:
+        prompt = "\n".join(str(message.content) for message in messages)
+        text = fake_text(prompt, self.config.output_tokens)
+        message = AIMessage(
+            content=text,
+            usage_metadata={
+                "input_tokens": len(prompt) // 4,
+                "output_tokens": self.config.output_tokens,
+                "total_tokens": len(prompt) // 4 + self.config.output_tokens,
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: List[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        time.sleep(self.config.llm_delay(self.config.output_tokens))
+        return self._result(messages)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: List[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        await asyncio.sleep(self.config.llm_delay(self.config.output_tokens))
+        return self._result(messages)
+
+
+def make_llm_model_func(config: FakeModelConfig):
+    """LightRAG model function answering extraction, gleaning, keyword and answer prompts."""
+
+    async def stream(text: str):
+        for line in text.splitlines(keepends=True):
+            await asyncio.sleep(
+                config.llm_delay(len(line.split())) - config.llm_latency
+            )
+            yield line
+
+    async def llm_model_func(
+        prompt,
+        system_prompt=None,
+        history_messages=[],
+        keyword_extraction=False,
+        **kwargs,
+    ):
+        full_prompt = (system_prompt or "") + "\n" + prompt
+        if keyword_extraction:
+            text = fake_keywords(full_prompt)
+        elif "Answer ONLY by `YES` OR `NO`" in prompt:
+            text = "NO"
+        elif history_messages and "were missed in the last extraction" in prompt:
+            text = COMPLETE
+        elif (
+            "---Real Data---" in full_prompt
+            and "Text:" in full_prompt
+            and TUPLE in full_prompt
+        ):
+            text = fake_extraction(full_prompt)
+        else:
+            text = fake_text(full_prompt, config.output_tokens)
+        if kwargs.get("stream"):
+            await asyncio.sleep(config.llm_latency)
+            return stream(text)
+        await asyncio.sleep(config.llm_delay(len(text.split())))
+        return text
+
+    return llm_model_func
+
+
+def fake_vectors(texts: List[str], dim: int) -> np.ndarray:
+    """Return unit vectors seeded by each text's hash."""
+    vectors = (
+        np.stack(
+            [
+                np.random.default_rng(
+                    int.from_bytes(hashlib.md5(text.encode()).digest()[:8], "little")
+                ).standard_normal(dim)
+                for text in texts
+            ]
+        ).astype(np.float32)
+        if texts
+        else np.zeros((0, dim), dtype=np.float32)
+    )
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True).clip(min=1e-12)
+
+
+class FakeEmbeddings(Embeddings):
+    """Unit vectors seeded by each text's hash."""
+
+    def __init__(self, config: FakeModelConfig):
+        """Create embeddings with the dimension and latency of `config`."""
+        self.config = config
+
+    @override
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self.config.embed_delay(len(texts)))
+        return fake_vectors(texts, self.config.embedding_dim).tolist()
+
+    @override
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    @override
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        await asyncio.sleep(self.config.embed_delay(len(texts)))
+        return fake_vectors(texts, self.config.embedding_dim).tolist()
+
+    @override
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
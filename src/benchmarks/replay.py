@@ -0,0 +1,426 @@
+"""Replays a recorded request log against the API for capacity planning.
+
+Usage (from src/):
+    python -m benchmarks.replay requests.ndjson --rate 5
+    python -m benchmarks.replay requests.ndjson --speed 2 --repeat 3
+    python -m benchmarks.replay requests.ndjson --concurrency 16 --output results.json
+    python -m benchmarks.replay --synthesize flows.ndjson --flows 50 --feedback-ratio 0.3
+
+The log is NDJSON as written by the API when REQUEST_LOG_PATH is set (see
+react_agent/recording.py): one {"t", "method", "path", "params", "body"} per request.
+Requests for the same namespace are sent in recorded order, one at a time, so an
+approve/feedback resume always follows the invocation it answers; requests without a
+namespace are independent.
+
+Open loop (--rate or --speed) starts each request at its scheduled time, or as soon as
+the previous request for its namespace finished; the delay past the schedule is reported
+as lag. Closed loop (--concurrency) keeps that many requests in flight. --in-process
+runs the app with the fake models of benchmarks.run instead of calling --base-url.
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import logging
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import UTC, datetime
+from typing import Dict, Iterable, List
+
+from benchmarks.fakes import FakeModelConfig
+from benchmarks.stats import summarize
+
+
+def load_log(path: str) -> List[dict]:
+    """Read a request log, skipping blank and malformed lines, ordered by arrival."""
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                logging.getLogger(__name__).warning(
+                    "Skipping malformed line %d of %s", number, path
+                )
+                continue
+            entries.append(entry)
+    entries.sort(key=lambda entry: entry.get("t", 0))
+    return entries
+
+
+def namespace_of(entry: dict) -> str | None:
+    """Return the namespace of a logged request, if it has one."""
+    body = entry.get("body")
+    if isinstance(body, dict) and body.get("namespace"):
+        return body["namespace"]
+    return (entry.get("params") or {}).get("namespace")
+
+
+def endpoint_label(entry: dict) -> str:
+    """Return the reporting group of a request.
+
+    /invoke is split into the initial run and the approve/feedback resumes
+    since their costs differ.
+    """
+    label = f"{entry['method']} {entry['path']}"
+    body = entry.get("body")
+    if entry["path"] == "/invoke" and isinstance(body, dict):
+        if body.get("data"):
+            return f"{label} (initial)"
+        if body.get("feedback") is not None:
+            return f"{label} (feedback)"
+        if body.get("approve") is not None:
+            return f"{label} (approve)"
+    return label
+
+
+def rewrite_namespaces(entry: dict, suffix: str) -> dict:
+    """Return a copy of the entry with every namespace suffixed.
+
+    A replay then does not resume threads left over from the recording or an
+    earlier run.
+    """
+    if not suffix:
+        return entry
+    entry = copy.deepcopy(entry)
+    params = entry.get("params") or {}
+    if params.get("namespace"):
+        params["namespace"] += suffix
+    body = entry.get("body")
+    if isinstance(body, dict):
+        if body.get("namespace"):
+            body["namespace"] += suffix
+        for job in body.get("jobs") or []:
+            if isinstance(job, dict) and job.get("namespace"):
+                job["namespace"] += suffix
+    return entry
+
+
+def schedule(
+    entries: List[dict],
+    repeat: int = 1,
+    suffix: str = "",
+    rate: float | None = None,
+    speed: float | None = None,
+) -> List[List[dict]]:
+    """Split the log into lanes that run concurrently.
+
+    Each lane holds one namespace's requests in order. With rate or speed every request
+    gets an "offset" in seconds from the start of the replay. Repeats are laid out back
+    to back with their own namespace suffix.
+    """
+    planned = []
+    span = (entries[-1].get("t", 0) - entries[0].get("t", 0)) if entries else 0
+    for run in range(repeat):
+        run_suffix = f"{suffix}-{run}" if repeat > 1 else suffix
+        for entry in entries:
+            item = {"entry": rewrite_namespaces(entry, run_suffix)}
+            if speed:
+                item["offset"] = (
+                    run * span + entry.get("t", 0) - entries[0].get("t", 0)
+                ) / speed
+            planned.append(item)
+    if rate:
+        for i, item in enumerate(planned):
+            item["offset"] = i / rate
+
+    lanes: Dict[str, List[dict]] = defaultdict(list)
+    independent = []
+    for item in planned:
+        namespace = namespace_of(item["entry"])
+        if namespace is None:
+            independent.append([item])
+        else:
+            lanes[namespace].append(item)
+    return list(lanes.values()) + independent
+
+
+async def replay(
+    client, lanes: List[List[dict]], concurrency: int | None = None
+) -> dict:
+    """Send every planned request and return the per-endpoint report.
+
+    A request counts as an error on a transport failure or a 4xx/5xx status.
+    """
+    semaphore = asyncio.Semaphore(concurrency) if concurrency else None
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    lags: List[float] = []
+
+    async def send(item):
+        entry = item["entry"]
+        label = endpoint_label(entry)
+        kwargs = {"params": entry.get("params") or None}
+        if "body" in entry:
+            kwargs["json"] = entry["body"]
+        started = time.perf_counter()
+        try:
+            response = await client.request(entry["method"], entry["path"], **kwargs)
+        except Exception as e:
+            errors[label][type(e).__name__] += 1
+            return
+        if response.status_code >= 400:
+            errors[label][str(response.status_code)] += 1
+            return
+        latencies[label].append(time.perf_counter() - started)
+
+    async def run_lane(lane):
+        for item in lane:
+            if "offset" in item:
+                delay = item["offset"] - (time.perf_counter() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                lags.append(max(0.0, -delay))
+            if semaphore:
+                async with semaphore:
+                    await send(item)
+            else:
+                await send(item)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run_lane(lane) for lane in lanes))
+    elapsed = time.perf_counter() - started
+
+    endpoints = {}
+    for label in sorted(set(latencies) | set(errors)):
+        failed = sum(errors[label].values())
+        endpoints[label] = {
+            **summarize(latencies[label], elapsed, failed),
+            "error_codes": dict(errors[label]),
+        }
+    total = sum(entry["n"] + entry["errors"] for entry in endpoints.values())
+    total_errors = sum(entry["errors"] for entry in endpoints.values())
+    report = {
+        "requests": total,
+        "errors": total_errors,
+        "error_rate": round(total_errors / total, 4) if total else 0.0,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_per_s": round((total - total_errors) / elapsed, 3)
+        if elapsed
+        else 0.0,
+        "endpoints": endpoints,
+    }
+    if lags:
+        report["schedule_lag"] = summarize(lags)
+    return report
+
+
+def synthesize_log(
+    flows: int,
+    feedback_ratio: float = 0.0,
+    interval: float = 1.0,
+    think_time: float = 5.0,
+    seed: int = 0,
+    data: Iterable[dict] | None = None,
+) -> List[dict]:
+    """Build a log of the test_app.py flow for `flows` namespaces.
+
+    Each flow is an initial invocation with LOG_DATA, sometimes a feedback round, then
+    approval. Flows start `interval` seconds apart and resumes follow after
+    `think_time`.
+    """
+    if data is None:
+        from test_app import LOG_DATA
+
+        data = LOG_DATA
+    data = list(data)
+    rng = random.Random(seed)
+    entries = []
+    for i in range(flows):
+        namespace = f"replay-{i}"
+        t = i * interval
+        entries.append(
+            {
+                "t": t,
+                "method": "POST",
+                "path": "/invoke",
+                "params": {},
+                "body": {"namespace": namespace, "data": data},
+            }
+        )
+        if rng.random() < feedback_ratio:
+            t += think_time
+            entries.append(
+                {
+                    "t": t,
+                    "method": "POST",
+                    "path": "/invoke",
+                    "params": {},
+                    "body": {"namespace": namespace, "feedback": "Keep it shorter"},
+                }
+            )
+        entries.append(
+            {
+                "t": t + think_time,
+                "method": "POST",
+                "path": "/invoke",
+                "params": {},
+                "body": {"namespace": namespace, "approve": "True"},
+            }
+        )
+    entries.sort(key=lambda entry: entry["t"])
+    return entries
+
+
+def print_report(report: dict) -> None:
+    """Print the per-endpoint report to stderr."""
+    print(
+        f"{report['requests']} requests in {report['elapsed_s']}s, "
+        f"{report['throughput_per_s']}/s, error rate {report['error_rate']:.2%}",
+        file=sys.stderr,
+    )
+    print(
+        f"{'endpoint':<34} {'n':>6} {'err':>5} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'req/s':>8}",
+        file=sys.stderr,
+    )
+    for label, entry in report["endpoints"].items():
+        cells = [
+            f"{entry.get(metric, float('nan')):>10.1f}"
+            for metric in ("p50_ms", "p95_ms", "p99_ms")
+        ]
+        print(
+            f"{label:<34} {entry['n']:>6} {entry['errors']:>5} {' '.join(cells)} {entry.get('throughput_per_s', 0):>8.2f}",
+            file=sys.stderr,
+        )
+    if "schedule_lag" in report and report["schedule_lag"]["n"]:
+        print(
+            f"schedule lag p95: {report['schedule_lag']['p95_ms']:.1f} ms",
+            file=sys.stderr,
+        )
+
+
+async def run(args, lanes):
+    """Replay the lanes against a server, or in process with fake models."""
+    import httpx
+
+    if not args.in_process:
+        async with httpx.AsyncClient(
+            base_url=args.base_url, timeout=args.timeout
+        ) as client:
+            return await replay(client, lanes, args.concurrency)
+
+    from benchmarks.environment import install
+
+    install(
+        args.workdir or tempfile.mkdtemp(prefix="intelligent-index-replay-"),
+        FakeModelConfig(llm_latency=args.llm_latency),
+    )
+    logging.getLogger("lightrag").setLevel(logging.WARNING)
+    from app import app
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://replay",
+            timeout=args.timeout,
+        ) as client:
+            return await replay(client, lanes, args.concurrency)
+
+
+def main():
+    """Parse the command line and run the replay."""
+    parser = argparse.ArgumentParser(
+        description="Replay a recorded request log against the API."
+    )
+    parser.add_argument(
+        "log", nargs="?", help="NDJSON request log (see REQUEST_LOG_PATH)"
+    )
+    pacing = parser.add_mutually_exclusive_group()
+    pacing.add_argument(
+        "--rate", type=float, help="Open loop: start requests at this many per second"
+    )
+    pacing.add_argument(
+        "--speed", type=float, help="Open loop: recorded timing sped up by this factor"
+    )
+    pacing.add_argument(
+        "--concurrency", type=int, help="Closed loop: requests kept in flight"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=1, help="Replay the log this many times"
+    )
+    parser.add_argument(
+        "--namespace-suffix",
+        help="Appended to every namespace (default: a per-run timestamp)",
+    )
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument(
+        "--timeout", type=float, default=600.0, help="Seconds per request"
+    )
+    parser.add_argument(
+        "--output", help="Write the JSON report to this file instead of stdout"
+    )
+    parser.add_argument(
+        "--in-process",
+        action="store_true",
+        help="Replay against the app with fake models",
+    )
+    parser.add_argument("--workdir", help="Scratch directory for --in-process")
+    parser.add_argument(
+        "--llm-latency",
+        type=float,
+        default=FakeModelConfig.llm_latency,
+        help="Fake LLM seconds per call",
+    )
+    parser.add_argument(
+        "--synthesize",
+        metavar="PATH",
+        help="Write a log of test_app.py flows to PATH and exit",
+    )
+    parser.add_argument(
+        "--flows", type=int, default=20, help="Namespaces to synthesize"
+    )
+    parser.add_argument(
+        "--feedback-ratio",
+        type=float,
+        default=0.0,
+        help="Share of synthesized flows with a feedback round",
+    )
+    parser.add_argument(
+        "--interval", type=float, default=1.0, help="Seconds between synthesized flows"
+    )
+    args = parser.parse_args()
+
+    if args.synthesize:
+        with open(args.synthesize, "w", encoding="utf-8") as f:
+            for entry in synthesize_log(args.flows, args.feedback_ratio, args.interval):
+                f.write(json.dumps(entry) + "\n")
+        return
+    if not args.log:
+        parser.error("a request log is required unless --synthesize is given")
+    if args.concurrency is None and args.rate is None and args.speed is None:
+        args.concurrency = 1
+
+    entries = load_log(args.log)
+    suffix = args.namespace_suffix
+    if suffix is None:
+        suffix = "-" + datetime.now(UTC).strftime("%Y%m%d%H%M%S")
+    lanes = schedule(entries, args.repeat, suffix, rate=args.rate, speed=args.speed)
+    report = asyncio.run(run(args, lanes))
+    report["meta"] = {
+        "log": args.log,
+        "base_url": None if args.in_process else args.base_url,
+        "rate": args.rate,
+        "speed": args.speed,
+        "concurrency": args.concurrency,
+        "repeat": args.repeat,
+        "namespace_suffix": suffix,
+        "timestamp": datetime.now(UTC).isoformat(),
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+    print_report(report)
+
+
+if __name__ == "__main__":
+    main()
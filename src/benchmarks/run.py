@@ -0,0 +1,446 @@
+"""Offline benchmarks for report generation, retrieval and LTM inserts.
+
+Usage (from src/):
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --sizes 10,100,1000 --concurrency 1,4,16 --compare baseline.json
+
+The Azure models and embeddings are replaced by deterministic fakes with configurable
+latency (see --llm-latency and friends), the LangGraph store and checkpointer run in
+memory (or on DB_URI with --store postgres) and LightRAG writes to a scratch directory,
+so no network is needed. Results are JSON, one entry per benchmark and parameter set, so
+runs can be compared across versions.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from datetime import UTC, datetime
+
+from benchmarks.fakes import FakeModelConfig
+from benchmarks.stats import summarize
+
+BENCHMARKS = ("data_formatter", "rag_insert", "retrieve", "invoke")
+COMPONENTS = [
+    "Thermostat",
+    "Camera",
+    "Gateway",
+    "Syncoid",
+    "Backup",
+    "Scheduler",
+    "Sensor",
+    "Router",
+]
+LEVELS = ["INFO", "WARN", "ERROR", "DEBUG"]
+
+
+def make_records(count, seed):
+    """Synthetic log records shaped like /invoke data: a date and a few log lines each."""
+    rng = random.Random(seed)
+    records = []
+    for i in range(count):
+        lines = []
+        for j in range(3):
+            component = rng.choice(COMPONENTS)
+            lines.append(
+                f"{rng.choice(LEVELS)} [2025-05-01 06:{i % 60:02d}:{j:02d}] [{component.lower()}.service] "
+                f"{component} unit {rng.randint(1, 40)} reported value {rng.randint(0, 1000)} in {rng.randint(1, 500)}ms."
+            )
+        records.append(
+            {"date": f"2025-05-01T06:{i % 60:02d}:00Z", "content": "\n".join(lines)}
+        )
+    return records
+
+
+def make_report(words, seed):
+    """Return a report of about `words` words seeded by `seed`."""
+    rng = random.Random(seed)
+    sentences = []
+    while sum(len(sentence.split()) for sentence in sentences) < words:
+        a, b = rng.sample(COMPONENTS, 2)
+        sentences.append(
+            f"{a}{rng.randint(1, 99)} affected {b}{rng.randint(1, 99)} during run {seed} with {rng.randint(1, 500)} events."
+        )
+    return " ".join(sentences)
+
+
+async def run_concurrently(operations, concurrency):
+    """Run async callables with at most `concurrency` in flight.
+
+    Returns the latency of each success, the error count and the wall time.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], []
+
+    async def run(operation):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await operation()
+            except Exception as e:
+                errors.append(repr(e))
+                return
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run(operation) for operation in operations))
+    if errors:
+        logging.getLogger(__name__).warning(
+            "%d errors, first: %s", len(errors), errors[0]
+        )
+    return latencies, len(errors), time.perf_counter() - started
+
+
+def bench_data_formatter(utils, sizes, repeats):
+    """Time `data_formatter` on payloads of each size."""
+    results = []
+    for size in sizes:
+        records = make_records(size, seed=size)
+        latencies = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            utils.data_formatter(records)
+            latencies.append(time.perf_counter() - started)
+        results.append(
+            {
+                "benchmark": "data_formatter",
+                "params": {"records": size},
+                **summarize(latencies),
+            }
+        )
+    return results
+
+
+async def bench_rag_insert(utils, sizes, requests, run_id):
+    """Time LTM inserts of reports of each size."""
+    results = []
+    for size in sizes:
+        latencies = []
+        started = time.perf_counter()
+        for i in range(requests):
+            report = make_report(size, seed=f"{run_id}-{size}-{i}")
+            insert_started = time.perf_counter()
+            await utils.arun_with_rag(None, lambda rag: rag.ainsert(report))
+            latencies.append(time.perf_counter() - insert_started)
+        results.append(
+            {
+                "benchmark": "rag_insert",
+                "params": {"report_words": size},
+                **summarize(latencies, time.perf_counter() - started),
+            }
+        )
+    return results
+
+
+async def bench_retrieve(client, concurrency_levels, requests, mode, run_id):
+    """Time /retrieve at each concurrency level."""
+    results = []
+    for concurrency in concurrency_levels:
+
+        async def query(i):
+            response = await client.get(
+                "/retrieve",
+                params={
+                    "query": f"What affected Sensor{i} in run {run_id}-{concurrency}?",
+                    "mode": mode,
+                },
+            )
+            response.raise_for_status()
+
+        latencies, errors, elapsed = await run_concurrently(
+            [lambda i=i: query(i) for i in range(requests)], concurrency
+        )
+        results.append(
+            {
+                "benchmark": "retrieve",
+                "params": {"concurrency": concurrency, "mode": mode},
+                **summarize(latencies, elapsed, errors),
+            }
+        )
+    return results
+
+
+async def wait_for_jobs(job_queue, namespace, timeout=300):
+    """Wait for a namespace's post-approval jobs to finish."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        jobs = await asyncio.to_thread(job_queue.status, namespace)
+        if jobs and all(job["status"] in ("done", "failed") for job in jobs):
+            failed = [job for job in jobs if job["status"] == "failed"]
+            if failed:
+                raise RuntimeError(f"{failed[0]['kind']} failed: {failed[0]['error']}")
+            return
+        await asyncio.sleep(0.05)
+    raise TimeoutError(
+        f"Post-approval jobs for {namespace} did not finish in {timeout}s"
+    )
+
+
+async def bench_invoke(client, job_queue, sizes, concurrency_levels, requests, run_id):
+    """Run one report per namespace through generation and approval.
+
+    Each report is generated (waiting for approval), approved, then followed by
+    the queued post-approval jobs (STM update, LTM insert).
+    """
+    results = []
+    for size in sizes:
+        for concurrency in concurrency_levels:
+            phases = {"generate": [], "approve": [], "post_approval": []}
+
+            async def flow(i):
+                namespace = f"bench-{run_id}-{size}-{concurrency}-{i}"
+                started = time.perf_counter()
+                response = await client.post(
+                    "/invoke",
+                    json={
+                        "namespace": namespace,
+                        "data": make_records(size, seed=namespace),
+                    },
+                )
+                response.raise_for_status()
+                if response.json()["status"] != "waiting":
+                    raise RuntimeError(
+                        f"Expected the report to wait for approval, got {response.json()}"
+                    )
+                generated = time.perf_counter()
+                response = await client.post(
+                    "/invoke", json={"namespace": namespace, "approve": "True"}
+                )
+                response.raise_for_status()
+                approved = time.perf_counter()
+                await wait_for_jobs(job_queue, namespace)
+                phases["generate"].append(generated - started)
+                phases["approve"].append(approved - generated)
+                phases["post_approval"].append(time.perf_counter() - approved)
+
+            latencies, errors, elapsed = await run_concurrently(
+                [lambda i=i: flow(i) for i in range(requests)], concurrency
+            )
+            params = {"records": size, "concurrency": concurrency}
+            results.append(
+                {
+                    "benchmark": "invoke",
+                    "params": params,
+                    **summarize(latencies, elapsed, errors),
+                }
+            )
+            for phase, values in phases.items():
+                results.append(
+                    {
+                        "benchmark": f"invoke.{phase}",
+                        "params": params,
+                        **summarize(values),
+                    }
+                )
+    return results
+
+
+def git_revision():
+    """Return the short git revision of the working tree, if any."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    """Print the p50/p95 change of each benchmark against a previous results file."""
+    with open(baseline_path) as f:
+        baseline = {
+            (entry["benchmark"], json.dumps(entry["params"], sort_keys=True)): entry
+            for entry in json.load(f)["results"]
+        }
+    print(
+        f"{'benchmark':<22} {'params':<40} {'p50 ms':>18} {'p95 ms':>18}",
+        file=sys.stderr,
+    )
+    for entry in results:
+        key = (entry["benchmark"], json.dumps(entry["params"], sort_keys=True))
+        before = baseline.get(key)
+        if before is None or "p50_ms" not in entry or "p50_ms" not in before:
+            continue
+        cells = []
+        for metric in ("p50_ms", "p95_ms"):
+            change = (
+                (entry[metric] - before[metric]) / before[metric] * 100
+                if before[metric]
+                else 0.0
+            )
+            cells.append(f"{entry[metric]:>9.1f} ({change:+5.1f}%)")
+        print(
+            f"{entry['benchmark']:<22} {key[1]:<40} {cells[0]:>18} {cells[1]:>18}",
+            file=sys.stderr,
+        )
+
+
+async def run(args, config):
+    """Run the selected benchmarks in a scratch environment."""
+    from benchmarks.environment import install
+
+    utils = install(
+        args.workdir, config, store=args.store, response_cache=args.response_cache
+    )
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("lightrag").setLevel(logging.WARNING)
+
+    import httpx
+
+    from app import app
+
+    run_id = datetime.now(UTC).strftime("%Y%m%d%H%M%S")
+    results = []
+    if "data_formatter" in args.only:
+        results += bench_data_formatter(utils, args.sizes, args.repeats)
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://benchmark",
+            timeout=None,
+        ) as client:
+            if "rag_insert" in args.only:
+                results += await bench_rag_insert(
+                    utils, args.report_words, args.requests, run_id
+                )
+            if "retrieve" in args.only:
+                results += await bench_retrieve(
+                    client, args.concurrency, args.requests, args.mode, run_id
+                )
+            if "invoke" in args.only:
+                results += await bench_invoke(
+                    client,
+                    utils.get_job_queue(),
+                    args.sizes,
+                    args.concurrency,
+                    args.requests,
+                    run_id,
+                )
+    return results
+
+
+def int_list(value):
+    """Parse a comma-separated list of integers."""
+    return [int(item) for item in value.split(",") if item]
+
+
+def main():
+    """Parse the command line, run the benchmarks and write the results."""
+    parser = argparse.ArgumentParser(
+        description="Run the offline benchmarks and write JSON results."
+    )
+    parser.add_argument("--output", help="Write results to this file instead of stdout")
+    parser.add_argument("--compare", help="Previous results file to compare against")
+    parser.add_argument(
+        "--only",
+        default=",".join(BENCHMARKS),
+        help=f"Comma-separated subset of {', '.join(BENCHMARKS)}",
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int_list,
+        default=[10, 100, 1000],
+        help="Records per /invoke and data_formatter call",
+    )
+    parser.add_argument(
+        "--report-words",
+        type=int_list,
+        default=[200, 1000, 5000],
+        help="Report sizes for rag_insert",
+    )
+    parser.add_argument("--concurrency", type=int_list, default=[1, 4, 16])
+    parser.add_argument(
+        "--requests", type=int, default=16, help="Operations per parameter set"
+    )
+    parser.add_argument(
+        "--repeats", type=int, default=20, help="Repetitions per data_formatter size"
+    )
+    parser.add_argument(
+        "--mode", default="hybrid", help="LightRAG query mode for /retrieve"
+    )
+    parser.add_argument("--store", choices=("memory", "postgres"), default="memory")
+    parser.add_argument(
+        "--response-cache",
+        action="store_true",
+        help="Keep the report and /retrieve caches enabled",
+    )
+    parser.add_argument(
+        "--workdir", help="Scratch directory (default: a new temporary directory)"
+    )
+    parser.add_argument(
+        "--llm-latency",
+        type=float,
+        default=FakeModelConfig.llm_latency,
+        help="Seconds per LLM call",
+    )
+    parser.add_argument(
+        "--llm-tokens-per-second",
+        type=float,
+        default=FakeModelConfig.llm_tokens_per_second,
+    )
+    parser.add_argument(
+        "--output-tokens",
+        type=int,
+        default=FakeModelConfig.output_tokens,
+        help="Tokens per generated report",
+    )
+    parser.add_argument(
+        "--embed-latency",
+        type=float,
+        default=FakeModelConfig.embed_latency,
+        help="Seconds per embedding call",
+    )
+    args = parser.parse_args()
+    args.only = [name for name in args.only.split(",") if name]
+    unknown = set(args.only) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+    args.workdir = args.workdir or tempfile.mkdtemp(prefix="intelligent-index-bench-")
+
+    config = FakeModelConfig(
+        llm_latency=args.llm_latency,
+        llm_tokens_per_second=args.llm_tokens_per_second,
+        output_tokens=args.output_tokens,
+        embed_latency=args.embed_latency,
+    )
+    started = time.perf_counter()
+    results = asyncio.run(run(args, config))
+    output = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": datetime.now(UTC).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "store": args.store,
+            "response_cache": args.response_cache,
+            "fake_models": asdict(config),
+            "elapsed_s": round(time.perf_counter() - started, 3),
+        },
+        "results": results,
+    }
+
+    text = json.dumps(output, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
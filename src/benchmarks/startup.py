@@ -0,0 +1,152 @@
+"""Cold-start report: how long importing the API and the graph takes, and where the time goes.
+
+Usage (from src/):
+    python -m benchmarks.startup
+    python -m benchmarks.startup --module react_agent.graph --budget 1.5 --output startup.json
+
+Each run imports the module in a fresh interpreter under `python -X importtime`, from a
+scratch directory and, unless --keep-env is given, without DB_URI or Azure OpenAI
+settings, since importing must not need them (the models, store and checkpointer are
+built on first use). The report gives the median import wall time and the self time per
+top-level package. The exit status is 1 when the median exceeds --budget, so the check
+can run in CI.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+from typing import Dict, List, NamedTuple
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BUDGET_SECONDS = 2.0
+SERVICE_ENV_PREFIXES = ("DB_URI", "AZURE_OPENAI_", "AZURE_EMBEDDING_")
+
+
+class ImportRow(NamedTuple):
+    """One line of `-X importtime` output."""
+
+    self_us: int
+    cumulative_us: int
+    depth: int
+    name: str
+
+
+def parse_importtime(output: str) -> List[ImportRow]:
+    """Parse the `import time: self | cumulative | name` lines of -X importtime."""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|", 2)
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        rows.append(ImportRow(int(self_us), int(cumulative_us), depth, name.strip()))
+    return rows
+
+
+def time_by_package(rows: List[ImportRow]) -> Dict[str, int]:
+    """Self time in microseconds per top-level package, largest first."""
+    totals: Dict[str, int] = defaultdict(int)
+    for row in rows:
+        totals[row.name.split(".")[0]] += row.self_us
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+def measure(module: str, keep_env: bool = False) -> dict:
+    """Import `module` in a fresh interpreter and return its wall time and import rows."""
+    env = dict(os.environ)
+    if not keep_env:
+        env = {
+            name: value
+            for name, value in env.items()
+            if not name.startswith(SERVICE_ENV_PREFIXES)
+        }
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [SRC_DIR, env.get("PYTHONPATH")]))
+    code = f"import time; started = time.perf_counter(); import {module}; print(time.perf_counter() - started)"
+    with tempfile.TemporaryDirectory(prefix="intelligent-index-startup-") as workdir:
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=workdir,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    return {
+        "seconds": float(result.stdout.strip().splitlines()[-1]),
+        "rows": parse_importtime(result.stderr),
+    }
+
+
+def report(module: str, runs: int, top: int, keep_env: bool = False) -> dict:
+    """Return the import time of `module` over `runs` runs."""
+    # The first run also compiles bytecode; it is kept but the median discounts it
+    measurements = [measure(module, keep_env) for _ in range(runs)]
+    seconds = [measurement["seconds"] for measurement in measurements]
+    fastest = min(measurements, key=lambda measurement: measurement["seconds"])
+    packages = time_by_package(fastest["rows"])
+    return {
+        "module": module,
+        "runs": seconds,
+        "median_s": round(statistics.median(seconds), 3),
+        "packages_ms": {
+            name: round(us / 1000, 1) for name, us in list(packages.items())[:top]
+        },
+        "modules": len(fastest["rows"]),
+    }
+
+
+def main():
+    """Parse the command line and report the import times."""
+    parser = argparse.ArgumentParser(
+        description="Report the cold-start import time of the API and graph."
+    )
+    parser.add_argument(
+        "--module",
+        action="append",
+        help="Module to import (default: app and react_agent.graph)",
+    )
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15, help="Packages to list")
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=float(os.getenv("COLD_START_BUDGET_SECONDS", DEFAULT_BUDGET_SECONDS)),
+        help="Maximum median import time in seconds",
+    )
+    parser.add_argument(
+        "--keep-env",
+        action="store_true",
+        help="Keep DB_URI and Azure settings in the environment",
+    )
+    parser.add_argument("--output", help="Also write the report as JSON")
+    args = parser.parse_args()
+
+    results = [
+        report(module, args.runs, args.top, args.keep_env)
+        for module in args.module or ["app", "react_agent.graph"]
+    ]
+    over_budget = False
+    for result in results:
+        status = "ok" if result["median_s"] <= args.budget else "OVER BUDGET"
+        over_budget = over_budget or status != "ok"
+        print(
+            f"import {result['module']}: median {result['median_s']:.3f}s over {len(result['runs'])} runs, "
+            f"{result['modules']} modules (budget {args.budget:.2f}s, {status})"
+        )
+        for name, ms in result["packages_ms"].items():
+            print(f"  {name:<32} {ms:>9.1f} ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"budget_s": args.budget, "results": results}, f, indent=2)
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Latency summaries shared by the benchmark and load tools."""
+
+import math
+from typing import Dict, List, Sequence
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Linearly interpolated percentile (0-100) of already sorted values."""
+    if not sorted_values:
+        return math.nan
+    position = (len(sorted_values) - 1) * q / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (
+        position - lower
+    )
+
+
+def summarize(
+    latencies: List[float], elapsed: float | None = None, errors: int = 0
+) -> Dict[str, float]:
+    """Summarise latencies in seconds as milliseconds.
+
+    Throughput counts successful operations per second of `elapsed` wall time.
+    """
+    values = sorted(latencies)
+    summary: Dict[str, float] = {"n": len(values), "errors": errors}
+    if values:
+        summary.update(
+            {
+                "mean_ms": round(1000 * sum(values) / len(values), 3),
+                "p50_ms": round(1000 * percentile(values, 50), 3),
+                "p95_ms": round(1000 * percentile(values, 95), 3),
+                "p99_ms": round(1000 * percentile(values, 99), 3),
+                "max_ms": round(1000 * values[-1], 3),
+            }
+        )
+    if elapsed:
+        summary["throughput_per_s"] = round(len(values) / elapsed, 3)
+    return summary
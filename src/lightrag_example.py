@@ -1,9 +1,12 @@
-from react_agent.utils import initialize_rag
 import asyncio
 
+from react_agent.utils import initialize_rag
+
+
 def main():
     rag = asyncio.run(initialize_rag())
     print(rag.query("What happened on March 24"))
 
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
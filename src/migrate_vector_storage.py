@@ -0,0 +1,72 @@
+"""Copy the LTM vectors from LightRAG's NanoVectorDB JSON files into another vector storage.
+
+Usage:
+    python migrate_vector_storage.py MemmapVectorStorage [--batch-size 10000]
+    python migrate_vector_storage.py PooledPGVectorStorage
+
+Vectors are copied as they are, without re-embedding. The JSON files are left
+in place; set LTM_VECTOR_STORAGE to the new storage once the copy succeeds.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from nano_vectordb.dbs import buffer_string_to_array
+
+from react_agent.utils import close_openai_clients, load_rag
+from react_agent.vector_storage import VECTOR_STORAGES
+
+
+def read_nano_vdb(path):
+    """Return the records and (n, dim) float32 matrix of a NanoVectorDB JSON file."""
+    with open(path, encoding="utf-8") as f:
+        storage = json.load(f)
+    matrix = buffer_string_to_array(storage["matrix"]).reshape(
+        -1, storage["embedding_dim"]
+    )
+    return storage["data"], matrix
+
+
+async def migrate(target, batch_size):
+    """Copy the JSON vector files into the `target` vector storage."""
+    rag = load_rag(vector_storage=target)
+    working_dir = rag.working_dir
+    try:
+        for storage in (rag.chunks_vdb, rag.entities_vdb, rag.relationships_vdb):
+            path = os.path.join(working_dir, f"vdb_{storage.namespace}.json")
+            if not os.path.exists(path):
+                print(f"{path}: not found, skipping")
+                continue
+
+            started = time.perf_counter()
+            records, matrix = read_nano_vdb(path)
+            await storage.initialize()
+            for i in range(0, len(records), batch_size):
+                await storage.upsert_embeddings(
+                    records[i : i + batch_size], matrix[i : i + batch_size]
+                )
+            await storage.index_done_callback()
+            await storage.finalize()
+            print(
+                f"{path}: {len(records)} vectors -> {target} in {time.perf_counter() - started:.1f}s"
+            )
+    finally:
+        await close_openai_clients()
+
+
+def main():
+    """Parse the command line and run the migration."""
+    parser = argparse.ArgumentParser(
+        description="Migrate LightRAG JSON vector files to another vector storage."
+    )
+    parser.add_argument("target", choices=VECTOR_STORAGES)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    args = parser.parse_args()
+    asyncio.run(migrate(args.target, args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,34 @@
-from langgraph.store.memory import InMemoryStore
-from langgraph.store.postgres import PostgresStore
-from psycopg import Connection
-
 from langmem import create_memory_store_manager, create_prompt_optimizer
 
-from react_agent.utils import get_llm, load_postgres_store
 from react_agent.schemas import Episode
+from react_agent.utils import get_llm, load_postgres_store
 
 store = load_postgres_store()
 llm = get_llm()
 
+
 def get_episodic_memory(namespace, instructions, data, store):
-        similar = store.search(
-            ("episodes", namespace),
-            query=f"Instructions: {instructions}\n\nData:\n{data}",
-            limit=1,
-        )
+    similar = store.search(
+        ("episodes", namespace),
+        query=f"Instructions: {instructions}\n\nData:\n{data}",
+        limit=1,
+    )
 
-        # Step 2: Build system message with relevant experience
-        episodic_memory = "" 
-        if similar:
-            episodic_memory += "\n\n### EPISODIC MEMORY:"
-            for i, item in enumerate(similar, start=1):
-                episode = item.value["content"]
-                episodic_memory += f"""
+    # Step 2: Build system message with relevant experience
+    episodic_memory = ""
+    if similar:
+        episodic_memory += "\n\n### EPISODIC MEMORY:"
+        for i, item in enumerate(similar, start=1):
+            episode = item.value["content"]
+            episodic_memory += f"""
                     Episode {i}:
-                    When: {episode['observation']}
-                    Thought: {episode['thoughts']}
-                    Did: {episode['action']}
-                    Result: {episode['result']}
+                    When: {episode["observation"]}
+                    Thought: {episode["thoughts"]}
+                    Did: {episode["action"]}
+                    Result: {episode["result"]}
                 """
-        return episodic_memory
+    return episodic_memory
+
 
 episodic_memory_manager = create_memory_store_manager(
     llm,
@@ -38,13 +36,13 @@ episodic_memory_manager = create_memory_store_manager(
     schemas=[Episode],
     instructions="Extract exceptional examples of noteworthy information gathering and analysis scenarios, including what made them effective.",
     enable_inserts=True,
-    store=store
+    store=store,
 )
 
 # Create optimizer
 prompt_optimizer = create_prompt_optimizer(
     llm,
-    kind="metaprompt",  
+    kind="metaprompt",
     config={"max_reflection_steps": 3},
 )
 
@@ -63,8 +61,12 @@ conversation = [
     },
 ]
 
-episodic_memory_manager.invoke({"messages": conversation}, config={"configurable": {"namespace": "CS"}})
+episodic_memory_manager.invoke(
+    {"messages": conversation}, config={"configurable": {"namespace": "CS"}}
+)
 
-episodes = get_episodic_memory("CS", "You are a CS tutor", "A binary tree is complete", store)
+episodes = get_episodic_memory(
+    "CS", "You are a CS tutor", "A binary tree is complete", store
+)
 
-print(episodes)
\ No newline at end of file
+print(episodes)
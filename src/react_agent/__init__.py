@@ -4,6 +4,14 @@ This module defines a custom reasoning and action agent graph.
 It invokes tools in a simple loop.
 """
 
-from react_agent.graph import graph
-
 __all__ = ["graph"]
+
+
+def __getattr__(name):
+    # Building the graph creates model clients and opens the store, so it only
+    # happens when the graph is used, not when a submodule is imported
+    if name == "graph":
+        from react_agent.graph import graph
+
+        return graph
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
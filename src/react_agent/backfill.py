@@ -0,0 +1,187 @@
+"""Bulk loading of historical reports into the long term memory.
+
+`iter_reports` reads reports from a directory of text files or an NDJSON file
+(optionally gzipped). `run_backfill` skips reports whose content hash is already
+in LightRAG's doc status, inserts the rest in batches and records how far it got
+in a checkpoint file so an interrupted run resumes where it stopped.
+"""
+
+import gzip
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Iterator, List, Tuple
+
+from lightrag.utils import clean_text, compute_mdhash_id
+
+logger = logging.getLogger(__name__)
+
+REPORT_EXTENSIONS = (".txt", ".md")
+REPORT_FIELDS = ("report", "content", "text")
+
+
+@dataclass
+class BackfillProgress:
+    """Counts and elapsed time of a backfill."""
+
+    read: int = 0
+    inserted: int = 0
+    skipped: int = 0
+    invalid: int = 0
+    characters: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def docs_per_second(self) -> float:
+        """Return the documents inserted per second."""
+        return self.inserted / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def chars_per_second(self) -> float:
+        """Return the characters inserted per second."""
+        return self.characters / self.elapsed if self.elapsed else 0.0
+
+
+def doc_id(content: str) -> str:
+    """Return the id LightRAG gives a document inserted without an explicit id."""
+    return compute_mdhash_id(clean_text(content), prefix="doc-")
+
+
+def _source_name(record: dict, default: str) -> str:
+    # Shown by LightRAG as the citation for chunks of this report
+    if record.get("namespace") and record.get("date"):
+        return f"{record['namespace']}/{record['date']}"
+    return record.get("file_path") or record.get("namespace") or default
+
+
+def iter_reports(path: str) -> Iterator[Tuple[str, str] | None]:
+    """Yield (content, source) for each report in `path`, in a stable order.
+
+    A directory yields its .txt/.md files (recursively, sorted by path). An
+    NDJSON file (.gz allowed) yields one report per line, either a string or an
+    object with a "report", "content" or "text" field. Unusable lines yield None
+    so they still count towards the checkpoint position.
+    """
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if name.endswith(REPORT_EXTENSIONS):
+                    file_path = os.path.join(root, name)
+                    with open(file_path, encoding="utf-8") as f:
+                        yield f.read(), os.path.relpath(file_path, path)
+        return
+
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            default = f"{os.path.basename(path)}:{line_number}"
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logger.warning(f"{default}: not valid JSON, skipping")
+                yield None
+                continue
+            if isinstance(record, str):
+                yield record, default
+                continue
+            content = next(
+                (
+                    record[field]
+                    for field in REPORT_FIELDS
+                    if isinstance(record, dict) and record.get(field)
+                ),
+                None,
+            )
+            if not isinstance(content, str):
+                logger.warning(f"{default}: no report text, skipping")
+                yield None
+                continue
+            yield content, _source_name(record, default)
+
+
+def load_checkpoint(path: str) -> dict:
+    """Return the checkpoint saved at `path`, or an empty dict."""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_checkpoint(path: str, source: str, progress: BackfillProgress) -> None:
+    """Save the backfill progress for `source` to `path`."""
+    # Written to a temporary file first so a crash never leaves a truncated checkpoint
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"source": os.path.abspath(source), **asdict(progress)}, f)
+    os.replace(tmp_path, path)
+
+
+async def run_backfill(
+    rag,
+    source: str,
+    batch_size: int = 100,
+    checkpoint_path: str | None = None,
+    on_progress: Callable[[BackfillProgress], None] | None = None,
+) -> BackfillProgress:
+    """Insert the reports from `source` into `rag` in batches of `batch_size`.
+
+    Reports already in the doc status (from earlier runs, approvals or
+    duplicates within the source) are skipped without calling the LLM. The
+    checkpoint is updated after every batch; records before its position are not
+    re-read on resume. Documents left pending or failed by an interrupted run
+    are processed first.
+    """
+    progress = BackfillProgress()
+    checkpoint = load_checkpoint(checkpoint_path)
+    if checkpoint and checkpoint.get("source") != os.path.abspath(source):
+        raise ValueError(
+            f"Checkpoint {checkpoint_path} belongs to {checkpoint.get('source')}, not {source}"
+        )
+    resume_from = checkpoint.get("read", 0)
+    for field in ("read", "inserted", "skipped", "invalid", "characters"):
+        setattr(progress, field, checkpoint.get(field, 0))
+    previous_elapsed = checkpoint.get("elapsed", 0.0)
+    started = time.perf_counter()
+    await rag.apipeline_process_enqueue_documents()
+
+    async def flush(batch: List[Tuple[str, str]], position: int) -> None:
+        unique = {}
+        for content, file_path in batch:
+            unique.setdefault(doc_id(content), (content, file_path))
+        new_ids = await rag.doc_status.filter_keys(set(unique)) if unique else set()
+        new = [unique[key] for key in unique if key in new_ids]
+        if new:
+            await rag.ainsert(
+                [content for content, _ in new],
+                file_paths=[file_path for _, file_path in new],
+            )
+        progress.read = position
+        progress.inserted += len(new)
+        progress.skipped += len(batch) - len(new)
+        progress.characters += sum(len(content) for content, _ in new)
+        progress.elapsed = previous_elapsed + time.perf_counter() - started
+        if checkpoint_path:
+            save_checkpoint(checkpoint_path, source, progress)
+        if on_progress:
+            on_progress(progress)
+
+    batch: List[Tuple[str, str]] = []
+    position = 0
+    for position, report in enumerate(iter_reports(source), 1):
+        if position <= resume_from:
+            continue
+        if report is None:
+            progress.invalid += 1
+        else:
+            batch.append(report)
+        if len(batch) >= batch_size:
+            await flush(batch, position)
+            batch = []
+    if position > progress.read:
+        await flush(batch, position)
+    return progress
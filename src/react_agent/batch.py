@@ -0,0 +1,175 @@
+"""Concurrent report generation across many namespaces.
+
+`run_batch` fans (namespace, data) jobs out over the graph under a global
+concurrency limit. Model calls are separately capped per Azure deployment by
+`DeploymentLimiter`, and jobs that still hit rate limits are retried with
+exponential backoff.
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+def rate_limit_errors():
+    """Return the errors after which a job is retried with backoff.
+
+    openai is slow to import and already loaded by the time a job fails, so it is not
+    imported with this module.
+    """
+    import openai
+
+    return (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError)
+
+
+class DeploymentLimiter:
+    """Caps the number of in-flight model calls per deployment.
+
+    Limits apply to both sync callers (threads) and async callers. Async limits apply
+    per event loop, since asyncio semaphores cannot be shared across loops.
+    """
+
+    def __init__(self, limits: Dict[str, int], default_limit: int = 8):
+        """Create a limiter with a limit per deployment name."""
+        self.limits = limits
+        self.default_limit = default_limit
+        self._lock = threading.Lock()
+        self._sync: Dict[str, threading.BoundedSemaphore] = {}
+        self._async: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]
+        ] = weakref.WeakKeyDictionary()
+
+    def _limit(self, deployment: str) -> int:
+        return self.limits.get(deployment, self.default_limit)
+
+    @contextmanager
+    def slot(self, deployment: str):
+        """Hold one of the deployment's slots, blocking the thread until one is free."""
+        with self._lock:
+            semaphore = self._sync.setdefault(
+                deployment, threading.BoundedSemaphore(self._limit(deployment))
+            )
+        with semaphore:
+            yield
+
+    @asynccontextmanager
+    async def aslot(self, deployment: str):
+        """Hold one of the deployment's slots, waiting until one is free."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphores = self._async.setdefault(loop, {})
+            semaphore = semaphores.setdefault(
+                deployment, asyncio.Semaphore(self._limit(deployment))
+            )
+        async with semaphore:
+            yield
+
+
+async def _run_job(
+    graph, job: Dict[str, Any], retries: int, backoff: float
+) -> Dict[str, Any]:
+    namespace = job["namespace"]
+    config = {"configurable": {"thread_id": namespace}}
+    started = time.perf_counter()
+    attempt = 0
+    while True:
+        try:
+            await graph.ainvoke(
+                {"data": job["data"], "namespace": namespace}, config=config
+            )
+            break
+        except rate_limit_errors() as e:
+            if attempt >= retries:
+                return {
+                    "namespace": namespace,
+                    "status": "error",
+                    "error": str(e),
+                    "attempts": attempt + 1,
+                    "elapsed": time.perf_counter() - started,
+                }
+            delay = backoff * 2**attempt * (1 + random.random())
+            logger.warning(
+                "Rate limited on namespace %s, retrying in %.1fs", namespace, delay
+            )
+            await asyncio.sleep(delay)
+            attempt += 1
+        except Exception as e:
+            logger.exception("Batch job for namespace %s failed", namespace)
+            return {
+                "namespace": namespace,
+                "status": "error",
+                "error": str(e),
+                "attempts": attempt + 1,
+                "elapsed": time.perf_counter() - started,
+            }
+
+    state = await graph.aget_state(config)
+    interrupts = [
+        interrupt.value for task in state.tasks for interrupt in task.interrupts
+    ]
+    return {
+        "namespace": namespace,
+        "status": "waiting" if interrupts else "final",
+        "human_interrupt": interrupts[-1] if interrupts else None,
+        "attempts": attempt + 1,
+        "elapsed": time.perf_counter() - started,
+    }
+
+
+def merge_namespace_jobs(
+    jobs: List[Dict[str, Any]],
+) -> "OrderedDict[str, Dict[str, Any]]":
+    """Combine jobs that share a namespace into one job.
+
+    The combined job's data is their records in input order. A namespace has a single
+    graph thread (and so a single pending approval), so separate runs would overwrite
+    each other's interrupt.
+    """
+    merged: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+    for i, job in enumerate(jobs):
+        records = job["data"] if isinstance(job["data"], list) else [job["data"]]
+        entry = merged.setdefault(
+            job["namespace"], {"namespace": job["namespace"], "data": [], "indexes": []}
+        )
+        entry["data"].extend(records)
+        entry["indexes"].append(i)
+    return merged
+
+
+async def run_batch(
+    graph,
+    jobs: List[Dict[str, Any]],
+    max_concurrency: int = 16,
+    retries: int = 3,
+    backoff: float = 2.0,
+) -> List[Dict[str, Any]]:
+    """Run `{"namespace", "data"}` jobs through the graph.
+
+    At most `max_concurrency` run at a time. Returns one status per job in
+    input order.
+
+    Jobs for the same namespace are merged into one run (see
+    `merge_namespace_jobs`); each of them reports that run's status, with
+    `merged_jobs` giving how many were combined.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    results: List[Dict[str, Any] | None] = [None] * len(jobs)
+
+    async def run_namespace(job: Dict[str, Any]) -> None:
+        async with semaphore:
+            result = await _run_job(graph, job, retries, backoff)
+        for i in job["indexes"]:
+            results[i] = {**result, "merged_jobs": len(job["indexes"])}
+
+    await asyncio.gather(
+        *(run_namespace(job) for job in merge_namespace_jobs(jobs).values())
+    )
+    return results
@@ -0,0 +1,223 @@
+"""In-process read-through cache for small, hot store items (instructions, STM).
+
+Writes go through the cache so local entries are invalidated immediately.
+With `notify=True` invalidations are also broadcast over Postgres
+LISTEN/NOTIFY so every API worker drops its stale copy.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Tuple
+
+from psycopg import Connection
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "store_cache_invalidation"
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after `ttl` seconds.
+
+    Every invalidation bumps a generation counter. A read-through passes the
+    generation it started at to `set`, which skips the fill when the key was
+    invalidated in the meantime, so a slow read cannot cache a value older than
+    a concurrent write.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        """Create a cache of at most `maxsize` entries kept for `ttl` seconds."""
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+        self._generation = 0
+        # Generation of each key's latest invalidation; the oldest are forgotten
+        # past maxsize, and a key with no record counts as invalidated at _forgotten
+        self._invalidated: OrderedDict = OrderedDict()
+        self._forgotten = 0
+        self._lock = threading.Lock()
+
+    def generation(self) -> int:
+        """Return the current invalidation generation."""
+        with self._lock:
+            return self._generation
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the live value of `key`, or `default`."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, since: int | None = None) -> None:
+        """Cache `value`, unless `key` was invalidated after generation `since`."""
+        with self._lock:
+            if (
+                since is not None
+                and self._invalidated.get(key, self._forgotten) > since
+            ):
+                return
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop `key` and record its invalidation."""
+        with self._lock:
+            self._data.pop(key, None)
+            self._generation += 1
+            self._invalidated[key] = self._generation
+            self._invalidated.move_to_end(key)
+            while len(self._invalidated) > self.maxsize:
+                self._forgotten = self._invalidated.popitem(last=False)[1]
+
+    def clear(self) -> None:
+        """Drop every entry, invalidating them all."""
+        with self._lock:
+            self._data.clear()
+            self._generation += 1
+            self._invalidated.clear()
+            self._forgotten = self._generation
+
+    def __len__(self) -> int:
+        """Return the number of cached entries."""
+        return len(self._data)
+
+    def stats(self) -> dict:
+        """Return the hit and miss counts and the number of entries."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._data),
+        }
+
+
+class StoreItemCache:
+    """Caches `store.get` results per (namespace, key) and invalidates them on writes.
+
+    Works with both the sync `PostgresStore` (get/put) and the async store
+    (aget/aput). Only use it for items written through this cache, otherwise
+    readers may see a stale value for up to `ttl` seconds.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 60.0,
+        db_uri: str | None = None,
+        notify: bool = False,
+    ):
+        """Create the cache; `notify` publishes invalidations through `db_uri`."""
+        self.items = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.db_uri = db_uri
+        self.notify = notify and db_uri is not None
+        self._notify_conn: Connection | None = None
+        self._notify_lock = threading.Lock()
+        self._listener: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    def get(self, store, namespace: Tuple[str, ...], key: str):
+        """Return the store item, reading it from the store on a miss."""
+        item = self.items.get((namespace, key), _MISSING)
+        if item is _MISSING:
+            since = self.items.generation()
+            item = store.get(namespace, key=key)
+            self.items.set((namespace, key), item, since=since)
+        return item
+
+    async def aget(self, store, namespace: Tuple[str, ...], key: str):
+        """Return the store item, reading it from the store on a miss."""
+        item = self.items.get((namespace, key), _MISSING)
+        if item is _MISSING:
+            since = self.items.generation()
+            item = await store.aget(namespace, key=key)
+            self.items.set((namespace, key), item, since=since)
+        return item
+
+    def put(self, store, namespace: Tuple[str, ...], key: str, value: dict) -> None:
+        """Write the item to the store and invalidate it."""
+        store.put(namespace, key=key, value=value)
+        self.invalidate(namespace, key)
+
+    async def aput(
+        self, store, namespace: Tuple[str, ...], key: str, value: dict
+    ) -> None:
+        """Write the item to the store and invalidate it."""
+        await store.aput(namespace, key=key, value=value)
+        self.items.invalidate((namespace, key))
+        if self.notify:
+            await asyncio.to_thread(self._publish, namespace, key)
+
+    def invalidate(self, namespace: Tuple[str, ...], key: str) -> None:
+        """Drop the local entry and, if enabled, tell other workers to do the same."""
+        self.items.invalidate((namespace, key))
+        if self.notify:
+            self._publish(namespace, key)
+
+    def _publish(self, namespace: Tuple[str, ...], key: str) -> None:
+        payload = json.dumps({"namespace": list(namespace), "key": key})
+        try:
+            with self._notify_lock:
+                if self._notify_conn is None or self._notify_conn.closed:
+                    self._notify_conn = Connection.connect(self.db_uri, autocommit=True)
+                self._notify_conn.execute(
+                    "SELECT pg_notify(%s, %s)", (INVALIDATION_CHANNEL, payload)
+                )
+        except Exception:
+            # Other workers fall back to TTL expiry if the broadcast fails.
+            logger.exception(
+                "Failed to publish cache invalidation for %s/%s", namespace, key
+            )
+
+    def start_listener(self) -> None:
+        """Start a background thread applying invalidations published by other workers."""
+        if not self.notify or self._listener is not None:
+            return
+        self._stopped.clear()
+        self._listener = threading.Thread(
+            target=self._listen, name="store-cache-listener", daemon=True
+        )
+        self._listener.start()
+
+    def stop_listener(self) -> None:
+        """Stop listening for invalidations and close the connection."""
+        self._stopped.set()
+        self._listener = None
+        with self._notify_lock:
+            if self._notify_conn is not None:
+                self._notify_conn.close()
+                self._notify_conn = None
+
+    def _listen(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                with Connection.connect(self.db_uri, autocommit=True) as conn:
+                    conn.execute(f"LISTEN {INVALIDATION_CHANNEL}")
+                    # Anything published while we were disconnected is lost, so start clean.
+                    self.items.clear()
+                    while not self._stopped.is_set():
+                        for notify in conn.notifies(timeout=1.0):
+                            message = json.loads(notify.payload)
+                            self.items.invalidate(
+                                (tuple(message["namespace"]), message["key"])
+                            )
+            except Exception:
+                logger.exception("Cache invalidation listener disconnected, retrying")
+                self._stopped.wait(5.0)
@@ -0,0 +1,378 @@
+"""Durable, pooled Postgres checkpointer for the intelligent index graph.
+
+Paused human-approval threads are stored in Postgres instead of the API
+process's heap, so they survive restarts and can be resumed by any worker.
+Old checkpoints are compacted per thread to keep the tables bounded.
+"""
+
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    Sequence,
+    Tuple,
+)
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+)
+from langgraph.checkpoint.postgres import PostgresSaver
+from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
+from typing_extensions import override
+
+logger = logging.getLogger(__name__)
+
+# Keep the newest `retention` checkpoints of a thread (and the writes and
+# blobs they reference); everything older is deleted.
+COMPACT_WRITES_SQL = """
+DELETE FROM checkpoint_writes w
+USING (
+    SELECT checkpoint_ns, checkpoint_id FROM (
+        SELECT checkpoint_ns, checkpoint_id,
+               row_number() OVER (PARTITION BY checkpoint_ns ORDER BY checkpoint_id DESC) AS rn
+        FROM checkpoints WHERE thread_id = %(thread_id)s
+    ) ranked WHERE rn > %(retention)s
+) old
+WHERE w.thread_id = %(thread_id)s
+  AND w.checkpoint_ns = old.checkpoint_ns
+  AND w.checkpoint_id = old.checkpoint_id
+"""
+
+COMPACT_CHECKPOINTS_SQL = """
+DELETE FROM checkpoints c
+USING (
+    SELECT checkpoint_ns, checkpoint_id FROM (
+        SELECT checkpoint_ns, checkpoint_id,
+               row_number() OVER (PARTITION BY checkpoint_ns ORDER BY checkpoint_id DESC) AS rn
+        FROM checkpoints WHERE thread_id = %(thread_id)s
+    ) ranked WHERE rn > %(retention)s
+) old
+WHERE c.thread_id = %(thread_id)s
+  AND c.checkpoint_ns = old.checkpoint_ns
+  AND c.checkpoint_id = old.checkpoint_id
+"""
+
+COMPACT_BLOBS_SQL = """
+DELETE FROM checkpoint_blobs b
+WHERE b.thread_id = %(thread_id)s
+  AND NOT EXISTS (
+    SELECT 1 FROM checkpoints c
+    WHERE c.thread_id = b.thread_id
+      AND c.checkpoint_ns = b.checkpoint_ns
+      AND c.checkpoint -> 'channel_versions' ->> b.channel = b.version
+  )
+"""
+
+COMPACT_SQL = (COMPACT_WRITES_SQL, COMPACT_CHECKPOINTS_SQL, COMPACT_BLOBS_SQL)
+
+
+class PooledPostgresSaver(BaseCheckpointSaver):
+    """Checkpointer with a sync and an async Postgres saver.
+
+    `invoke` is served through `PostgresSaver` on a sync pool and `ainvoke`
+    through `AsyncPostgresSaver` on an async pool.
+
+    Both savers read and write the same tables. The async pool is bound to an
+    event loop, so it is requested lazily from `apool_factory` on first use.
+    Every `compact_every` checkpoints written for a thread, checkpoints beyond
+    the newest `retention` are deleted (`retention=0` disables compaction).
+    """
+
+    def __init__(
+        self,
+        pool: ConnectionPool,
+        apool_factory: Callable[[], Awaitable[AsyncConnectionPool]] | None = None,
+        retention: int = 20,
+        compact_every: int = 10,
+    ):
+        """Create the saver over `pool` and, on first async use, `apool_factory()`."""
+        super().__init__()
+        self.pool = pool
+        self.apool_factory = apool_factory
+        self.retention = retention
+        self.compact_every = compact_every
+        self.sync_saver = PostgresSaver(pool, serde=self.serde)
+        self._async_saver: AsyncPostgresSaver | None = None
+        self._async_saver_lock = asyncio.Lock()
+        self._puts: Dict[str, int] = defaultdict(int)
+        self._puts_lock = threading.Lock()
+
+    def setup(self) -> None:
+        """Create or migrate the checkpoint tables."""
+        self.sync_saver.setup()
+
+    async def _aget_saver(self) -> AsyncPostgresSaver:
+        if self._async_saver is None:
+            async with self._async_saver_lock:
+                if self._async_saver is None:
+                    if self.apool_factory is None:
+                        raise RuntimeError(
+                            "PooledPostgresSaver has no async connection pool configured"
+                        )
+                    self._async_saver = AsyncPostgresSaver(
+                        await self.apool_factory(), serde=self.serde
+                    )
+        return self._async_saver
+
+    def _should_compact(self, config: RunnableConfig) -> str | None:
+        if self.retention <= 0:
+            return None
+        thread_id = config["configurable"]["thread_id"]
+        with self._puts_lock:
+            self._puts[thread_id] += 1
+            if self._puts[thread_id] < self.compact_every:
+                return None
+            self._puts[thread_id] = 0
+        return thread_id
+
+    def compact(self, thread_id: str) -> None:
+        """Delete checkpoints of `thread_id` older than the newest `retention`."""
+        params = {"thread_id": thread_id, "retention": self.retention}
+        with self.pool.connection() as conn:
+            with conn.transaction():
+                for sql in COMPACT_SQL:
+                    conn.execute(sql, params)
+
+    async def acompact(self, thread_id: str) -> None:
+        """Async version of compact."""
+        saver = await self._aget_saver()
+        params = {"thread_id": thread_id, "retention": self.retention}
+        async with saver.conn.connection() as conn:
+            async with conn.transaction():
+                for sql in COMPACT_SQL:
+                    await conn.execute(sql, params)
+
+    # Sync API
+
+    @override
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        return self.sync_saver.get_tuple(config)
+
+    @override
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: Dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        return self.sync_saver.list(config, filter=filter, before=before, limit=limit)
+
+    @override
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        next_config = self.sync_saver.put(config, checkpoint, metadata, new_versions)
+        thread_id = self._should_compact(config)
+        if thread_id is not None:
+            try:
+                self.compact(thread_id)
+            except Exception:
+                logger.exception(
+                    "Checkpoint compaction failed for thread %s", thread_id
+                )
+        return next_config
+
+    @override
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        self.sync_saver.put_writes(config, writes, task_id, task_path)
+
+    # Async API
+
+    @override
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        return await (await self._aget_saver()).aget_tuple(config)
+
+    @override
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: Dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        saver = await self._aget_saver()
+        async for checkpoint in saver.alist(
+            config, filter=filter, before=before, limit=limit
+        ):
+            yield checkpoint
+
+    @override
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        next_config = await (await self._aget_saver()).aput(
+            config, checkpoint, metadata, new_versions
+        )
+        thread_id = self._should_compact(config)
+        if thread_id is not None:
+            try:
+                await self.acompact(thread_id)
+            except Exception:
+                logger.exception(
+                    "Checkpoint compaction failed for thread %s", thread_id
+                )
+        return next_config
+
+    @override
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await (await self._aget_saver()).aput_writes(config, writes, task_id, task_path)
+
+    @override
+    def get_next_version(self, current: str | None, channel: Any) -> str:
+        return self.sync_saver.get_next_version(current, channel)
+
+
+class LazyCheckpointer(BaseCheckpointSaver):
+    """Checkpointer that builds the real one with `factory` on first use.
+
+    The graph can then be compiled at import without connecting to the database.
+    Other attributes (e.g. `compact`) are looked up on the built checkpointer.
+    """
+
+    def __init__(self, factory: Callable[[], BaseCheckpointSaver]):
+        """Create a checkpointer that calls `factory` on first use."""
+        super().__init__()
+        self.factory = factory
+        self._saver: BaseCheckpointSaver | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def saver(self) -> BaseCheckpointSaver:
+        """Return the built checkpointer, building it if needed."""
+        if self._saver is None:
+            with self._lock:
+                if self._saver is None:
+                    self._saver = self.factory()
+        return self._saver
+
+    async def _asaver(self) -> BaseCheckpointSaver:
+        if self._saver is None:
+            # Building the saver connects to the database, so keep it off the event loop
+            await asyncio.to_thread(lambda: self.saver)
+        return self._saver
+
+    def __getattr__(self, name: str) -> Any:
+        """Look up attributes this class lacks on the built checkpointer."""
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.saver, name)
+
+    # Sync API
+
+    @override
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        return self.saver.get_tuple(config)
+
+    @override
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: Dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        return self.saver.list(config, filter=filter, before=before, limit=limit)
+
+    @override
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return self.saver.put(config, checkpoint, metadata, new_versions)
+
+    @override
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        self.saver.put_writes(config, writes, task_id, task_path)
+
+    # Async API
+
+    @override
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        return await (await self._asaver()).aget_tuple(config)
+
+    @override
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: Dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        saver = await self._asaver()
+        async for checkpoint in saver.alist(
+            config, filter=filter, before=before, limit=limit
+        ):
+            yield checkpoint
+
+    @override
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await (await self._asaver()).aput(
+            config, checkpoint, metadata, new_versions
+        )
+
+    @override
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await (await self._asaver()).aput_writes(config, writes, task_id, task_path)
+
+    @override
+    def get_next_version(self, current: str | None, channel: Any) -> str:
+        return self.saver.get_next_version(current, channel)
@@ -0,0 +1,231 @@
+"""Cached, batched embedding layer shared by LightRAG and the Postgres store index.
+
+Vectors are cached on disk keyed by (model, sha256(text)) so repeated inputs
+(instructions, STM, episodes, recurring log lines) are only embedded once.
+"""
+
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+from typing import Awaitable, Callable, Dict, List, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from typing_extensions import override
+
+
+def text_key(model: str, text: str) -> str:
+    """Return the cache key for a text embedded with the given model."""
+    return f"{model}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+
+class EmbeddingCache:
+    """SQLite-backed LRU cache of float32 embedding vectors.
+
+    Entries record when they were last read; once the cache grows past
+    `max_entries` the least recently used rows are evicted. Reads do not write:
+    last-used times are buffered and written `touch_batch_size` at a time (and
+    before any eviction), and the row count is kept in memory.
+    """
+
+    def __init__(
+        self, path: str, max_entries: int = 100_000, touch_batch_size: int = 256
+    ):
+        """Open the cache database at `path`."""
+        self.path = path
+        self.max_entries = max_entries
+        self.touch_batch_size = touch_batch_size
+        self.hits = 0
+        self.misses = 0
+        self._touched: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)"
+        )
+        self._conn.commit()
+        (self._entries,) = self._conn.execute(
+            "SELECT COUNT(*) FROM embeddings"
+        ).fetchone()
+
+    def _flush_touched(self) -> None:
+        # Caller holds self._lock
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                [(used, key) for key, used in self._touched.items()],
+            )
+            self._conn.commit()
+            self._touched.clear()
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Look up vectors for the given keys, returning only the ones that are cached."""
+        found: Dict[str, np.ndarray] = {}
+        if not keys:
+            return found
+        with self._lock:
+            # Keep well under SQLite's bound parameter limit.
+            for start in range(0, len(keys), 500):
+                chunk = list(keys[start : start + 500])
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+            now = time.time()
+            self._touched.update((key, now) for key in found)
+            if len(self._touched) >= self.touch_batch_size:
+                self._flush_touched()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, vectors: Dict[str, np.ndarray]) -> None:
+        """Store vectors and evict the least recently used entries above `max_entries`."""
+        if not vectors:
+            return
+        now = time.time()
+        with self._lock:
+            # A key already cached holds the same text embedded by the same model,
+            # so it is kept; rowcount is then the number of new rows
+            added = self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [
+                    (key, np.asarray(vec, dtype=np.float32).tobytes(), now)
+                    for key, vec in vectors.items()
+                ],
+            ).rowcount
+            self._entries += added
+            if self._entries > self.max_entries:
+                self._flush_touched()
+                evicted = self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN "
+                    "(SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                    (self._entries - self.max_entries,),
+                ).rowcount
+                self._entries -= evicted
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters and the current number of cached vectors."""
+        entries = self._entries
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+        }
+
+    def close(self) -> None:
+        """Write pending last-used times and close the database."""
+        with self._lock:
+            self._flush_touched()
+            self._conn.close()
+
+
+class CachedEmbedder:
+    """Dedupes, batches and caches calls to an embedding deployment.
+
+    `embed_fn` / `aembed_fn` take a list of texts (at most `max_batch_size`)
+    and return one vector per text.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        cache: EmbeddingCache,
+        embed_fn: Callable[[List[str]], List[List[float]]] | None = None,
+        aembed_fn: Callable[[List[str]], Awaitable[List[List[float]]]] | None = None,
+        max_batch_size: int = 2048,
+    ):
+        """Create an embedder for `model` using `embed_fn` and `aembed_fn` on misses."""
+        self.model = model
+        self.cache = cache
+        self.embed_fn = embed_fn
+        self.aembed_fn = aembed_fn
+        self.max_batch_size = max_batch_size
+
+    def _lookup(self, texts: Sequence[str]):
+        keys = [text_key(self.model, text) for text in texts]
+        unique = dict(zip(keys, texts))
+        vectors = self.cache.get_many(list(unique))
+        missing = [(key, text) for key, text in unique.items() if key not in vectors]
+        batches = [
+            missing[i : i + self.max_batch_size]
+            for i in range(0, len(missing), self.max_batch_size)
+        ]
+        return keys, vectors, batches
+
+    def _store(self, vectors: Dict[str, np.ndarray], batch, embedded) -> None:
+        new = {
+            key: np.asarray(vec, dtype=np.float32)
+            for (key, _), vec in zip(batch, embedded)
+        }
+        self.cache.put_many(new)
+        vectors.update(new)
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed texts, returning a float32 array with one row per input."""
+        keys, vectors, batches = self._lookup(texts)
+        for batch in batches:
+            if self.embed_fn is None:
+                raise RuntimeError(
+                    "CachedEmbedder has no synchronous embedding function"
+                )
+            self._store(vectors, batch, self.embed_fn([text for _, text in batch]))
+        return (
+            np.stack([vectors[key] for key in keys])
+            if keys
+            else np.empty((0, 0), dtype=np.float32)
+        )
+
+    async def aembed(self, texts: Sequence[str]) -> np.ndarray:
+        """Async version of embed; batches for missing texts are sent concurrently."""
+        keys, vectors, batches = await asyncio.to_thread(self._lookup, texts)
+        if batches:
+            if self.aembed_fn is None:
+                raise RuntimeError("CachedEmbedder has no async embedding function")
+            results = await asyncio.gather(
+                *(self.aembed_fn([text for _, text in batch]) for batch in batches)
+            )
+            for batch, embedded in zip(batches, results):
+                await asyncio.to_thread(self._store, vectors, batch, embedded)
+        return (
+            np.stack([vectors[key] for key in keys])
+            if keys
+            else np.empty((0, 0), dtype=np.float32)
+        )
+
+
+class CachedEmbeddings(Embeddings):
+    """LangChain `Embeddings` adapter so the Postgres store index shares the cache."""
+
+    def __init__(self, embedder: CachedEmbedder):
+        """Wrap `embedder` as LangChain embeddings."""
+        self.embedder = embedder
+
+    @override
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embedder.embed(texts).tolist()
+
+    @override
+    def embed_query(self, text: str) -> List[float]:
+        return self.embedder.embed([text])[0].tolist()
+
+    @override
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return (await self.embedder.aembed(texts)).tolist()
+
+    @override
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.embedder.aembed([text]))[0].tolist()
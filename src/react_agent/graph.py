@@ -3,106 +3,429 @@
 Works with a chat model with tool calling support.
 """
 
-from datetime import datetime, timezone
-from typing import Dict, List, Literal, cast
+import asyncio
+import threading
+from datetime import UTC, datetime
+from typing import List, Literal
+
+from langchain_core.messages import (
+    AIMessage,
+    HumanMessage,
+    messages_from_dict,
+    messages_to_dict,
+)
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableLambda
+from langgraph.graph import END, START, StateGraph
+from langgraph.types import Command, interrupt
+
+from react_agent.checkpoint import LazyCheckpointer
+from react_agent.prompt_builder import group_for_reduce, plan_report
+from react_agent.prompts import (
+    base_information_extraction_prompt,
+    report_reduce_prompt,
+    stm_delta_prompt,
+    stm_summary_prompt,
+)
+from react_agent.response_cache import content_hash, normalize_records
+from react_agent.schemas import Episode, STMDelta, STMSummary
+from react_agent.state import State
+from react_agent.stm import (
+    STMWindows,
+    apply_changes,
+    apply_delta,
+    compact,
+    delta_context,
+    load_or_migrate_rows,
+    load_rows,
+    parse_date,
+    save_changes,
+)
+from react_agent.utils import (
+    AZURE_OPENAI_ADVANCED_DEPLOYMENT,
+    AZURE_OPENAI_DEPLOYMENT,
+    REPORT_MAP_CONCURRENCY,
+    STM_DAY_WINDOW_DAYS,
+    STM_DELTA_RECENT_DAYS,
+    STM_MAX_POINTS,
+    STM_MONTH_WINDOW_DAYS,
+    STM_QUARTER_WINDOW_DAYS,
+    STM_RETENTION_DAYS,
+    STM_WEEK_WINDOW_DAYS,
+    aget_episodic_memory,
+    aget_postgres_store,
+    data_formatter,
+    get_advanced_llm,
+    get_deployment_limiter,
+    get_episodic_memory,
+    get_job_queue,
+    get_llm,
+    get_metrics,
+    get_postgres_store,
+    get_prompt_budget,
+    get_response_cache,
+    get_store_cache,
+    get_token_counter,
+    load_checkpointer,
+    ltm_version_name,
+    run_with_rag,
+)
 
-from langgraph.graph import StateGraph, START, END
+# Set up. The models, the store and the langmem helpers are built on first use and
+# then reused, so importing this module (the API, `langgraph dev`) needs neither
+# Azure credentials nor a database.
 
-from react_agent.state import State
-from react_agent.prompts import base_information_extraction_prompt, short_term_memory_manager_system
-from react_agent.utils import data_formatter, get_episodic_memory, initialize_rag, get_llm, get_advanced_llm, load_postgres_store
-from react_agent.schemas import Episode
+store_cache = get_store_cache()
 
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.messages import AIMessage, HumanMessage
+_components = {}
+_components_lock = threading.RLock()
 
-from langgraph.types import interrupt, Command
-from langgraph.checkpoint.memory import InMemorySaver
-from langmem import create_memory_store_manager, create_prompt_optimizer
 
+def _component(name, factory):
+    component = _components.get(name)
+    if component is None:
+        with _components_lock:
+            component = _components.get(name)
+            if component is None:
+                component = _components[name] = factory()
+    return component
 
-import asyncio
 
-# Set up
+def get_graph_llm():
+    """Return the chat model used for STM updates, episodes and prompt optimisation."""
+    return _component("llm", get_llm)
 
-llm = get_llm()
-advanced_llm = get_advanced_llm()
-store = load_postgres_store()
 
+def get_graph_advanced_llm():
+    """Return the chat model that writes and refines reports."""
+    return _component("advanced_llm", get_advanced_llm)
 
-episodic_memory_manager = create_memory_store_manager(
-    llm,
-    namespace=("episodes", "{namespace}"),
-    schemas=[Episode],
-    instructions="Extract exceptional examples of noteworthy information gathering and analysis scenarios, including what made them effective.",
-    enable_inserts=True,
-    store=store
-)
 
-# Create optimizer
-prompt_optimizer = create_prompt_optimizer(
-    llm,
-    kind="metaprompt",  
-    config={"max_reflection_steps": 3},
-)
+def build_episodic_memory_manager():
+    """Build the langmem manager that extracts episodes."""
+    from langmem import create_memory_store_manager
 
+    return create_memory_store_manager(
+        get_graph_llm(),
+        namespace=("episodes", "{namespace}"),
+        schemas=[Episode],
+        instructions="Extract exceptional examples of noteworthy information gathering and analysis scenarios, including what made them effective.",
+        enable_inserts=True,
+        store=get_postgres_store(),
+    )
 
-# Node: Generate report based on data
-def generate_report(state: State) -> State:
+
+def build_prompt_optimizer():
+    """Build the langmem prompt optimiser."""
+    from langmem import create_prompt_optimizer
+
+    return create_prompt_optimizer(
+        get_graph_llm(),
+        kind="metaprompt",
+        config={"max_reflection_steps": 3},
+    )
+
+
+def get_stm_delta_llm():
+    """Return the chat model that turns an approved report into STM changes."""
+    return _component(
+        "stm_delta_llm",
+        lambda: get_graph_llm().with_structured_output(
+            STMDelta, method="function_calling"
+        ),
+    )
+
+
+def get_stm_summary_llm():
+    """Return the chat model that condenses STM entries during compaction."""
+    return _component(
+        "stm_summary_llm",
+        lambda: get_graph_llm().with_structured_output(
+            STMSummary, method="function_calling"
+        ),
+    )
+
+
+def get_episodic_memory_manager():
+    """Return the shared episodic memory manager."""
+    return _component("episodic_memory_manager", build_episodic_memory_manager)
+
+
+def get_prompt_optimizer():
+    """Return the shared prompt optimiser."""
+    return _component("prompt_optimizer", build_prompt_optimizer)
+
+
+def warm_up():
+    """Build everything the graph builds lazily, e.g. before a worker takes traffic."""
+    get_episodic_memory_manager()
+    get_prompt_optimizer()
+    get_stm_delta_llm()
+    get_stm_summary_llm()
+    get_graph_advanced_llm()
+    checkpointer.saver
+
+
+# Tags the model call whose output is the report shown to the operator, as
+# opposed to map and intermediate reduce calls; /invoke/stream streams only these
+FINAL_REPORT_TAG = "final_report"
+FINAL_REPORT_CONFIG = {"tags": [FINAL_REPORT_TAG]}
+
+
+def call_advanced_llm(prompt, config=None):
+    """Invoke the advanced model within its deployment's concurrency limit."""
+    with get_deployment_limiter().slot(AZURE_OPENAI_ADVANCED_DEPLOYMENT):
+        return get_graph_advanced_llm().invoke(prompt, config=config)
+
+
+async def acall_advanced_llm(prompt, config=None):
+    """Async version of call_advanced_llm."""
+    async with get_deployment_limiter().aslot(AZURE_OPENAI_ADVANCED_DEPLOYMENT):
+        return await get_graph_advanced_llm().ainvoke(prompt, config=config)
+
+
+limited_advanced_llm = RunnableLambda(call_advanced_llm, afunc=acall_advanced_llm)
+
+
+def build_report_prompt(instructions, data):
+    """Build the generation prompt from the assembled system instructions and the data."""
+    prompt = ChatPromptTemplate.from_messages(
+        [("system", instructions), ("placeholder", "{messages}")]
+    )
+
+    return prompt.format(messages=[HumanMessage(content=data_formatter(data))])
+
+
+def build_reduce_prompt(system, partial_reports):
+    """Build the prompt that merges partial reports written for chunks of the data."""
+    prompt = ChatPromptTemplate.from_messages(
+        [
+            ("system", system + "\n\n" + report_reduce_prompt),
+            ("placeholder", "{messages}"),
+        ]
+    )
+
+    parts = "\n\n".join(
+        f"Partial report {i}:\n{report}"
+        for i, report in enumerate(partial_reports, start=1)
+    )
+    return prompt.format(messages=[HumanMessage(content=parts)])
+
+
+def plan_report_for(instructions, stm, episodic_memory, data):
+    """Plan the report prompt and data chunks with the configured budget."""
+    return plan_report(
+        instructions,
+        stm,
+        episodic_memory,
+        data,
+        counter=get_token_counter(),
+        budget=get_prompt_budget(),
+        formatter=data_formatter,
+    )
+
+
+def reduce_groups(plan, partial_reports):
+    """Group partial reports so each reduce prompt stays within the data budget."""
+    return group_for_reduce(partial_reports, plan.data_budget, get_token_counter())
+
+
+def run_report_plan(plan):
+    """Generate the report for a plan.
+
+    This is one call if the data fits, otherwise a map over the chunks in
+    parallel and a reduce of the partial reports into one.
     """
-    Generates a report based on data provided
+    prompts = [build_report_prompt(plan.system, chunk) for chunk in plan.chunks]
+    if len(prompts) == 1:
+        return call_advanced_llm(prompts[0], FINAL_REPORT_CONFIG)
+
+    partials = limited_advanced_llm.batch(
+        prompts, config={"max_concurrency": REPORT_MAP_CONCURRENCY}
+    )
+    plan.token_usage["reduce_calls"] = 0
+    while True:
+        groups = reduce_groups(plan, [partial.content for partial in partials])
+        plan.token_usage["reduce_calls"] += len(groups)
+        if len(groups) == 1:
+            return call_advanced_llm(
+                build_reduce_prompt(plan.system, groups[0]), FINAL_REPORT_CONFIG
+            )
+        partials = limited_advanced_llm.batch(
+            [build_reduce_prompt(plan.system, group) for group in groups],
+            config={"max_concurrency": REPORT_MAP_CONCURRENCY},
+        )
+
+
+async def arun_report_plan(plan):
+    """Async version of run_report_plan."""
+    prompts = [build_report_prompt(plan.system, chunk) for chunk in plan.chunks]
+    if len(prompts) == 1:
+        return await acall_advanced_llm(prompts[0], FINAL_REPORT_CONFIG)
+
+    partials = await limited_advanced_llm.abatch(
+        prompts, config={"max_concurrency": REPORT_MAP_CONCURRENCY}
+    )
+    plan.token_usage["reduce_calls"] = 0
+    while True:
+        groups = reduce_groups(plan, [partial.content for partial in partials])
+        plan.token_usage["reduce_calls"] += len(groups)
+        if len(groups) == 1:
+            return await acall_advanced_llm(
+                build_reduce_prompt(plan.system, groups[0]), FINAL_REPORT_CONFIG
+            )
+        partials = await limited_advanced_llm.abatch(
+            [build_reduce_prompt(plan.system, group) for group in groups],
+            config={"max_concurrency": REPORT_MAP_CONCURRENCY},
+        )
+
+
+def report_cache_key(namespace, instructions, stm, episodic_memory, data):
+    """Return the cache key of a generated report.
+
+    The key covers everything that shapes the report: the namespace, the
+    instructions and STM versions, the retrieved episodes and the normalised data.
     """
+    return ":".join(
+        [
+            namespace,
+            content_hash(instructions),
+            content_hash(stm),
+            content_hash(episodic_memory),
+            content_hash(normalize_records(data)),
+        ]
+    )
+
+
+# Node: Generate report based on data
+def generate_report(state: State) -> State:
+    """Generate a report based on data provided."""
     data = state.get("data", [])
     namespace = state.get("namespace")
 
-    if not data or not namespace: 
+    if not data or not namespace:
         return state
 
+    store = get_postgres_store()
+
     # Getting the current prompt for the namespace
-    instructions_item = store.get(("instructions",), key=namespace)
-    
+    instructions_item = store_cache.get(store, ("instructions",), namespace)
+
     if not instructions_item:
-        store.put(("instructions",), key=namespace, value={"prompt": base_information_extraction_prompt})
+        store_cache.put(
+            store,
+            ("instructions",),
+            namespace,
+            {"prompt": base_information_extraction_prompt},
+        )
         instructions = base_information_extraction_prompt
     else:
         instructions = instructions_item.value["prompt"]
 
     # Getting the current short term report / status for the namespace
-    stm_item = store.get(("stm",), key=namespace)
-    
+    stm_item = store_cache.get(store, ("stm",), namespace)
+
     stm = ""
 
     if stm_item:
         stm = stm_item.value["report"]
-    
-    instructions += f"\n\nShort Term Memory: {stm}"
 
     # Extracting similiar episodic memory from previous interactions with namespace
-    episodic_memory = get_episodic_memory(namespace, instructions, data, store)
-    
-    instructions += episodic_memory
+    episodic_memory = get_episodic_memory(
+        namespace, instructions + f"\n\nShort Term Memory: {stm}", data, store
+    )
 
-    prompt = ChatPromptTemplate.from_messages(
-        [
-            ("system", instructions),
-            ("placeholder", "{messages}")
-        ]
+    # Fit STM, episodic memory and data to the token budget, chunking the data if needed
+    plan = plan_report_for(instructions, stm, episodic_memory, data)
+
+    # Re-sent batches with unchanged instructions/STM reuse the previous report
+    response_cache = get_response_cache()
+    cache_key = report_cache_key(namespace, instructions, stm, episodic_memory, data)
+    cached = response_cache.get("report", cache_key) if response_cache else None
+    plan.token_usage["cache_hit"] = cached is not None
+    if cached is not None:
+        response = AIMessage(content=cached)
+    else:
+        response = run_report_plan(plan)
+        if response_cache:
+            response_cache.put("report", cache_key, response.content)
+    return {
+        "messages": [HumanMessage(content=data), response],
+        "report": response.content,
+        "token_usage": plan.token_usage,
+    }
+
+
+async def agenerate_report(state: State) -> State:
+    """Async version of generate_report, used when the graph is run with ainvoke."""
+    data = state.get("data", [])
+    namespace = state.get("namespace")
+
+    if not data or not namespace:
+        return state
+
+    astore = await aget_postgres_store()
+
+    # Getting the current prompt for the namespace
+    instructions_item = await store_cache.aget(astore, ("instructions",), namespace)
+
+    if not instructions_item:
+        await store_cache.aput(
+            astore,
+            ("instructions",),
+            namespace,
+            {"prompt": base_information_extraction_prompt},
+        )
+        instructions = base_information_extraction_prompt
+    else:
+        instructions = instructions_item.value["prompt"]
+
+    # Getting the current short term report / status for the namespace
+    stm_item = await store_cache.aget(astore, ("stm",), namespace)
+
+    stm = ""
+
+    if stm_item:
+        stm = stm_item.value["report"]
+
+    # Extracting similiar episodic memory from previous interactions with namespace
+    episodic_memory = await aget_episodic_memory(
+        namespace, instructions + f"\n\nShort Term Memory: {stm}", data, astore
     )
 
-    prompt = prompt.format(messages=[HumanMessage(content=data_formatter(data))])
-    response = advanced_llm.invoke(prompt)
-    return {"messages": [HumanMessage(content=data), response], "report": response.content}
+    # Fit STM, episodic memory and data to the token budget, chunking the data if needed
+    plan = plan_report_for(instructions, stm, episodic_memory, data)
+
+    # Re-sent batches with unchanged instructions/STM reuse the previous report
+    response_cache = get_response_cache()
+    cache_key = report_cache_key(namespace, instructions, stm, episodic_memory, data)
+    cached = await response_cache.aget("report", cache_key) if response_cache else None
+    plan.token_usage["cache_hit"] = cached is not None
+    if cached is not None:
+        response = AIMessage(content=cached)
+    else:
+        response = await arun_report_plan(plan)
+        if response_cache:
+            await response_cache.aput("report", cache_key, response.content)
+    return {
+        "messages": [HumanMessage(content=data), response],
+        "report": response.content,
+        "token_usage": plan.token_usage,
+    }
 
 
 # Node: Ask for human approval or feedback.
-def human_approval(state: State) -> Command[Literal["refine_report", "finalize_report"]]:
-    """
-    Pause execution and show the generated report for review.
-    """
-    feedback = interrupt({
-        "question": "Approve to finalize or provide feedback for refinement.",
-        "report": state.get("report", "No report generated")
-    })
+def human_approval(
+    state: State,
+) -> Command[Literal["refine_report", "finalize_report"]]:
+    """Pause execution and show the generated report for review."""
+    feedback = interrupt(
+        {
+            "question": "Approve to finalize or provide feedback for refinement.",
+            "report": state.get("report", "No report generated"),
+            "token_usage": state.get("token_usage", {}),
+        }
+    )
 
     # Expecting feedback in the form of a dict.
     # Example approved feedback: {"approve": True}
@@ -112,89 +435,277 @@ def human_approval(state: State) -> Command[Literal["refine_report", "finalize_r
     else:
         edits = feedback.get("feedback", "")
         message = HumanMessage(content=f"Report needs refinement. Feedback: {edits}")
-        return Command(goto="refine_report", update={"messages": [message], "feedback": edits})
+        return Command(
+            goto="refine_report", update={"messages": [message], "feedback": edits}
+        )
+
+
+REFINE_PROMPT = (
+    "The following report needs refinement based on the feedback provided.\n"
+    "Please provide a refined version of the report."
+)
+
+
+def build_refine_prompt(messages):
+    """Build a prompt that instructs the LLM to refine the report based on the feedback."""
+    prompt = ChatPromptTemplate.from_messages(
+        [("system", REFINE_PROMPT), ("placeholder", "{messages}")]
+    )
+
+    return prompt.format(messages=messages)
 
 
 # Node: Refine the report based on the human's feedback.
 def refine_report(state: State) -> State:
-    """
-    Refine the report based on the human's feedback
-    """
-    messages = state.get("messages", [])
-    
-    # Craft a prompt that instructs the LLM to refine the report based on the feedback.
-    refine_prompt = (
-        "The following report needs refinement based on the feedback provided.\n"
-        "Please provide a refined version of the report."
-    )
+    """Refine the report based on the human's feedback."""
+    prompt = build_refine_prompt(state.get("messages", []))
+
+    # Generate the refined report.
+    refined_report = call_advanced_llm(prompt, FINAL_REPORT_CONFIG)
+    return {"messages": [refined_report], "report": refined_report.content}
+
+
+async def arefine_report(state: State) -> State:
+    """Async version of refine_report."""
+    prompt = build_refine_prompt(state.get("messages", []))
+
+    # Generate the refined report.
+    refined_report = await acall_advanced_llm(prompt, FINAL_REPORT_CONFIG)
+    return {"messages": [refined_report], "report": refined_report.content}
 
+
+def build_stm_delta_prompt(stm, report):
+    """Build the prompt that turns a newly approved report into STM changes."""
     prompt = ChatPromptTemplate.from_messages(
-        [
-            ("system", refine_prompt),
-            ("placeholder", "{messages}")
+        [("system", stm_delta_prompt), ("placeholder", "{messages}")]
+    )
+
+    return prompt.format(
+        messages=[
+            HumanMessage(
+                content=f"Current STM:\n{stm or '(empty)'}\n\nNew report: {report}"
+            )
         ]
     )
 
-    prompt = prompt.format(messages=messages)
 
-    # Generate the refined report.
-    refined_report = advanced_llm.invoke(prompt)
-    return {"messages": [refined_report], "report": refined_report.content}
+def build_stm_summary_prompt(period, points):
+    """Build the prompt that condenses the points of an STM entry or section."""
+    prompt = ChatPromptTemplate.from_messages(
+        [("system", stm_summary_prompt), ("placeholder", "{messages}")]
+    )
+
+    content = "\n".join(f"- {point}" for point in points)
+    return prompt.format(
+        period=period,
+        max_points=STM_MAX_POINTS,
+        messages=[HumanMessage(content=content)],
+    )
 
 
-# Node: Finalize the report when approved.
-def finalize_report(state: State) -> State:
+# Post-approval jobs. These run on the background worker pool (see react_agent.jobs)
+# so approving a report does not wait on several LLM round-trips.
+def capture_episode(namespace: str, payload: dict) -> None:
+    """Capture episodic memory from the approved conversation."""
+    messages = messages_from_dict(payload["messages"])
+    get_episodic_memory_manager().invoke(
+        {"messages": messages}, config={"configurable": {"namespace": namespace}}
+    )
+
+
+def optimize_prompt(namespace: str, payload: dict) -> None:
+    """Optimise the namespace prompt using the feedback trajectory."""
+    trajectories = [(messages_from_dict(payload["messages"]), None)]
+    store = get_postgres_store()
+    prompt = store_cache.get(store, ("instructions",), namespace).value["prompt"]
+    updated_prompt = get_prompt_optimizer().invoke(
+        {"prompt": prompt, "trajectories": trajectories}
+    )
+
+    store_cache.put(store, ("instructions",), namespace, {"prompt": updated_prompt})
+
+
+def update_stm(namespace: str, payload: dict) -> None:
+    """Merge the approved report into the namespace's short term memory.
+
+    The model sees the general sections and recent days only and returns a delta, so
+    only the rows the report touches are rewritten.
     """
-    Finalise report when approved and update namespace state
+    store = get_postgres_store()
+    rows = load_or_migrate_rows(store, store_cache, namespace)
+
+    prompt = build_stm_delta_prompt(
+        delta_context(rows, STM_DELTA_RECENT_DAYS), payload["report"]
+    )
+    with get_deployment_limiter().slot(AZURE_OPENAI_DEPLOYMENT):
+        delta = get_stm_delta_llm().invoke(prompt)
+
+    # Points the model could not date belong to the day the report was approved
+    fallback_day = (
+        parse_date(payload.get("approved_at", "")) or datetime.now(UTC).date()
+    )
+    changes = apply_delta(rows, delta, fallback_day)
+    apply_changes(rows, changes)
+    save_changes(store, store_cache, namespace, rows, changes)
+
+
+def summarize_stm_points(period: str, points: List[str]) -> List[str]:
+    """Condense the points of an STM row with the chat model."""
+    with get_deployment_limiter().slot(AZURE_OPENAI_DEPLOYMENT):
+        return (
+            get_stm_summary_llm()
+            .invoke(build_stm_summary_prompt(period, points))
+            .points
+        )
+
+
+def stm_windows() -> STMWindows:
+    """Return the configured STM roll-up windows."""
+    return STMWindows(
+        day=STM_DAY_WINDOW_DAYS,
+        week=STM_WEEK_WINDOW_DAYS,
+        month=STM_MONTH_WINDOW_DAYS,
+        quarter=STM_QUARTER_WINDOW_DAYS,
+        retention=STM_RETENTION_DAYS,
+    )
+
+
+def compact_stm(namespace: str, payload: dict) -> None:
+    """Roll dated STM entries that have left their window up into coarser periods.
+
+    Only the entries that grow past STM_MAX_POINTS are summarised.
     """
+    store = get_postgres_store()
+    rows = load_rows(store, namespace)
+    changes = compact(rows, stm_windows(), STM_MAX_POINTS, summarize_stm_points)
+    save_changes(store, store_cache, namespace, rows, changes)
+
+
+_ltm_insert_lock = threading.Lock()
+
+
+def insert_ltm(namespace: str, payload: dict) -> None:
+    """Insert the approved report into the namespace's long term memory partition."""
+    # LightRAG's document pipeline is process-wide: an insert into one partition
+    # while another partition's pipeline is busy would be queued and never run
+    with _ltm_insert_lock, get_metrics().timer("rag_seconds", op="insert"):
+        # On the loop that owns the LightRAG instances (and serves /retrieve), not this thread
+        run_with_rag(namespace, lambda rag: rag.ainsert(payload["report"]))
+
+    # Cached /retrieve answers predate this report
+    response_cache = get_response_cache()
+    if response_cache:
+        response_cache.bump_version(ltm_version_name(namespace))
+
+
+JOB_HANDLERS = {
+    kind: get_metrics().instrument("job_seconds", kind=kind)(handler)
+    for kind, handler in {
+        "capture_episode": capture_episode,
+        "optimize_prompt": optimize_prompt,
+        "update_stm": update_stm,
+        "compact_stm": compact_stm,
+        "insert_ltm": insert_ltm,
+    }.items()
+}
+
+
+def build_finalize_jobs(messages, report, feedback, approved_at=None):
+    """List the post-approval jobs for a report, in the order they must run."""
+    jobs = []
+    if feedback:
+        serialized = messages_to_dict(messages)
+        jobs.append(("capture_episode", {"messages": serialized}))
+        jobs.append(("optimize_prompt", {"messages": serialized}))
+    jobs.append(("update_stm", {"report": report, "approved_at": approved_at}))
+    jobs.append(("compact_stm", {}))
+    jobs.append(("insert_ltm", {"report": report}))
+    return jobs
+
+
+# Node: Finalize the report when approved.
+def finalize_report(state: State) -> State:
+    """Finalise report when approved: persist it and queue the namespace updates."""
     messages = state.get("messages", [])
     namespace = state.get("namespace")
     report = state.get("report", "")
     feedback = state.get("feedback")
-    
-    if feedback:
-        # Captures episodic memory 
-        episodic_memory_manager.invoke({"messages": messages}, config={"configurable": {"namespace": namespace}})
 
-        # Optimises namespace prompt
-        trajectories = [(messages, None)]
-        prompt = store.get(("instructions",), key=namespace).value["prompt"]
-        updated_prompt = prompt_optimizer.invoke({"prompt": prompt, "trajectories": trajectories})
-
-        store.put(("instructions",), key=namespace, value={"prompt": updated_prompt})
+    approved_at = datetime.now(UTC).isoformat()
+    get_postgres_store().put(
+        ("reports", namespace),
+        key=approved_at,
+        value={"report": report, "approved_at": approved_at},
+    )
 
-    # Update STM
-    stm_item = store.get(("stm",), key=namespace)
-    stm = ""
-    if stm_item:
-        stm = stm_item.value["report"]
-    
-    prompt = ChatPromptTemplate.from_messages(
-        [
-            ("system", short_term_memory_manager_system),
-            ("placeholder", "{messages}")
+    job_queue = get_job_queue()
+    job_ids = [
+        job_queue.enqueue(namespace, kind, payload)
+        for kind, payload in build_finalize_jobs(
+            messages, report, feedback, approved_at
+        )
+    ]
+
+    return {
+        "messages": [
+            AIMessage(
+                content=f"Report approved. Queued post-processing jobs: {job_ids}"
+            )
         ]
+    }
+
+
+async def afinalize_report(state: State) -> State:
+    """Async version of finalize_report."""
+    messages = state.get("messages", [])
+    namespace = state.get("namespace")
+    report = state.get("report", "")
+    feedback = state.get("feedback")
+
+    astore = await aget_postgres_store()
+
+    approved_at = datetime.now(UTC).isoformat()
+    await astore.aput(
+        ("reports", namespace),
+        key=approved_at,
+        value={"report": report, "approved_at": approved_at},
     )
 
-    prompt = prompt.format(messages=[HumanMessage(content=f"Current STM report: {stm}\n\nNew information: {report}")])
-    new_stm = llm.invoke(prompt)
+    job_queue = get_job_queue()
+    jobs = build_finalize_jobs(messages, report, feedback, approved_at)
+    job_ids = await asyncio.to_thread(
+        lambda: [job_queue.enqueue(namespace, kind, payload) for kind, payload in jobs]
+    )
 
-    store.put(("stm",), key=namespace, value={"report": new_stm.content})
+    return {
+        "messages": [
+            AIMessage(
+                content=f"Report approved. Queued post-processing jobs: {job_ids}"
+            )
+        ]
+    }
 
-    # Update LongTerm
-    rag = asyncio.run(initialize_rag())
-    rag.insert(report)
 
-    messages.append(AIMessage(content=f"New STM:\n{new_stm.content}"))
+def timed_node(name, func, afunc):
+    """Wrap a node's sync and async implementations so their wall time is recorded per node."""
+    timed = get_metrics().instrument("node_seconds", node=name)
+    return RunnableLambda(timed(func), afunc=timed(afunc))
 
-    return {"messages": messages}
 
 # Build the agent graph.
 graph = StateGraph(State)
-graph.add_node("generate_report", generate_report)
+# Nodes that call out to LLMs or the store carry both a sync and an async
+# implementation, so `invoke` and `ainvoke` each run without blocking.
+graph.add_node(
+    "generate_report", timed_node("generate_report", generate_report, agenerate_report)
+)
 graph.add_node("human_approval", human_approval)
-graph.add_node("refine_report", refine_report)
-graph.add_node("finalize_report", finalize_report)
+graph.add_node(
+    "refine_report", timed_node("refine_report", refine_report, arefine_report)
+)
+graph.add_node(
+    "finalize_report", timed_node("finalize_report", finalize_report, afinalize_report)
+)
 
 graph.add_edge(START, "generate_report")
 
@@ -207,8 +718,10 @@ graph.add_edge("refine_report", "human_approval")
 
 graph.add_edge("finalize_report", END)
 
-# Compile the graph with a checkpointer to support interrupts.
-checkpointer = InMemorySaver()
+# Compile the graph with a checkpointer to support interrupts. Checkpoints live in
+# Postgres so paused approvals survive restarts and any worker can resume them;
+# the connection is made on the first run, not here.
+checkpointer = LazyCheckpointer(load_checkpointer)
 intelligent_index = graph.compile(checkpointer=checkpointer)
 
 intelligent_index.name = "Intelligent Index"
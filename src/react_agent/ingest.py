@@ -0,0 +1,417 @@
+"""Per-namespace micro-batching of ingested log records.
+
+Shippers send small batches many times per minute; records are buffered per
+namespace and flushed into a single graph run once a record count, byte size
+or time window is reached, so LLM calls scale with windows, not call rate.
+"""
+
+import asyncio
+import json
+import logging
+import time
+import zlib
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class BufferFullError(Exception):
+    """Raised when a namespace buffer cannot accept more records until it flushes."""
+
+
+class UploadError(Exception):
+    """Raised when an uploaded NDJSON body cannot be decoded."""
+
+
+@dataclass
+class NamespaceBuffer:
+    """Records buffered for a namespace and its flush history."""
+
+    records: List[Dict[str, Any]] = field(default_factory=list)
+    size_bytes: int = 0
+    opened_at: float = 0.0
+    flushes: int = 0
+    last_flush_at: float | None = None
+    last_error: str | None = None
+    failed_flushes: int = 0
+    dead_lettered_records: int = 0
+    dropped_records: int = 0
+    held_since: float | None = None
+
+
+class MicroBatcher:
+    """Buffers records per namespace and hands each window to `flush_fn(namespace, records)`.
+
+    A buffer is flushed when it holds `max_records` records or `max_bytes` of
+    JSON, or when its oldest record has waited `max_wait` seconds. Flushes for
+    the same namespace never overlap. Records beyond `max_buffered_records`
+    (including those waiting on an in-flight flush) are rejected with
+    `BufferFullError` so callers can back off.
+
+    A failed flush is retried up to `max_flush_attempts` times with exponential
+    backoff, holding the namespace so later windows stay in order. Records that
+    still fail are appended to `dead_letter_path` (NDJSON) if one is set, and
+    dropped otherwise; `status` counts both.
+
+    If `ready_fn(namespace)` is given, each window is held until it returns True
+    (polled every `ready_poll` seconds), e.g. while the namespace's previous report
+    waits for approval. Held windows count toward `max_buffered_records` and show
+    as `held_since` in `status`; windows still held at `stop` are dead-lettered.
+    """
+
+    def __init__(
+        self,
+        flush_fn: Callable[[str, List[Dict[str, Any]]], Awaitable[Any]],
+        max_records: int = 500,
+        max_bytes: int = 1_000_000,
+        max_wait: float = 60.0,
+        max_buffered_records: int = 10_000,
+        tick: float = 1.0,
+        max_flush_attempts: int = 3,
+        retry_backoff: float = 1.0,
+        dead_letter_path: str | None = None,
+        ready_fn: Callable[[str], Awaitable[bool]] | None = None,
+        ready_poll: float = 5.0,
+    ):
+        """Create a batcher handing each window to `flush_fn`."""
+        self.flush_fn = flush_fn
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.max_wait = max_wait
+        self.max_buffered_records = max_buffered_records
+        self.tick = tick
+        self.max_flush_attempts = max(1, max_flush_attempts)
+        self.retry_backoff = retry_backoff
+        self.dead_letter_path = dead_letter_path
+        self.ready_fn = ready_fn
+        self.ready_poll = ready_poll
+        self._stopping = False
+        self._buffers: Dict[str, NamespaceBuffer] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._tasks: set = set()
+        self._timer: asyncio.Task | None = None
+
+    def _buffer(self, namespace: str) -> NamespaceBuffer:
+        if namespace not in self._buffers:
+            self._buffers[namespace] = NamespaceBuffer()
+            self._locks[namespace] = asyncio.Lock()
+        return self._buffers[namespace]
+
+    def add(self, namespace: str, records: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Buffer records for a namespace, starting a flush if a size threshold is hit."""
+        buffer = self._buffer(namespace)
+        pending = len(buffer.records) + self._in_flight.get(namespace, 0)
+        if pending + len(records) > self.max_buffered_records:
+            raise BufferFullError(
+                f"Buffer for namespace '{namespace}' is full ({pending} records pending)."
+            )
+
+        if not buffer.records:
+            buffer.opened_at = time.monotonic()
+        buffer.records.extend(records)
+        buffer.size_bytes += sum(
+            len(json.dumps(record, default=str)) for record in records
+        )
+
+        flushing = (
+            len(buffer.records) >= self.max_records
+            or buffer.size_bytes >= self.max_bytes
+        )
+        if flushing:
+            self._start_flush(namespace)
+        return {
+            "namespace": namespace,
+            "buffered": len(buffer.records),
+            "flushing": flushing,
+        }
+
+    def _start_flush(self, namespace: str) -> asyncio.Task | None:
+        buffer = self._buffers.get(namespace)
+        if buffer is None or not buffer.records:
+            return None
+        records, buffer.records, buffer.size_bytes = buffer.records, [], 0
+        self._in_flight[namespace] = self._in_flight.get(namespace, 0) + len(records)
+        task = asyncio.create_task(self._flush(namespace, records))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _flush(self, namespace: str, records: List[Dict[str, Any]]) -> None:
+        buffer = self._buffers[namespace]
+        try:
+            async with self._locks[namespace]:
+                for attempt in range(1, self.max_flush_attempts + 1):
+                    try:
+                        if not await self._wait_until_ready(namespace, buffer):
+                            buffer.last_error = "Stopped while the window was held"
+                            break
+                        await self.flush_fn(namespace, records)
+                        buffer.last_error = None
+                        return
+                    except Exception as e:
+                        logger.exception(
+                            "Flushing %d records for namespace %s failed (attempt %d of %d)",
+                            len(records),
+                            namespace,
+                            attempt,
+                            self.max_flush_attempts,
+                        )
+                        buffer.failed_flushes += 1
+                        buffer.last_error = str(e)
+                    if attempt < self.max_flush_attempts:
+                        await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1))
+                await self._dead_letter(namespace, records, buffer)
+        finally:
+            self._in_flight[namespace] -= len(records)
+            buffer.flushes += 1
+            buffer.last_flush_at = time.time()
+
+    async def _wait_until_ready(self, namespace: str, buffer: NamespaceBuffer) -> bool:
+        if self.ready_fn is None:
+            return True
+        try:
+            while not await self.ready_fn(namespace):
+                if self._stopping:
+                    return False
+                if buffer.held_since is None:
+                    buffer.held_since = time.time()
+                    logger.info(
+                        "Holding a window for namespace %s until it is ready", namespace
+                    )
+                await asyncio.sleep(self.ready_poll)
+        finally:
+            buffer.held_since = None
+        return True
+
+    async def _dead_letter(
+        self, namespace: str, records: List[Dict[str, Any]], buffer: NamespaceBuffer
+    ) -> None:
+        if self.dead_letter_path:
+            line = json.dumps(
+                {
+                    "namespace": namespace,
+                    "failed_at": time.time(),
+                    "error": buffer.last_error,
+                    "records": records,
+                },
+                default=str,
+            )
+            try:
+                await asyncio.to_thread(_append_line, self.dead_letter_path, line)
+                buffer.dead_lettered_records += len(records)
+                return
+            except OSError:
+                logger.exception(
+                    "Writing %d records for namespace %s to the dead-letter file failed",
+                    len(records),
+                    namespace,
+                )
+        logger.error("Dropping %d records for namespace %s", len(records), namespace)
+        buffer.dropped_records += len(records)
+
+    async def put(
+        self, namespace: str, records: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Add records, waiting for buffer space if needed.
+
+        Unlike `add`, this waits for in-flight flushes to free space instead of
+        raising `BufferFullError`. Used by streaming uploads for backpressure.
+        """
+        if len(records) > self.max_buffered_records:
+            raise BufferFullError(
+                f"Cannot buffer {len(records)} records at once (limit {self.max_buffered_records})."
+            )
+        while True:
+            try:
+                return self.add(namespace, records)
+            except BufferFullError:
+                self._start_flush(namespace)
+                await asyncio.sleep(self.tick)
+
+    async def flush(self, namespace: str) -> None:
+        """Flush a namespace's buffer now and wait for the graph run to finish."""
+        task = self._start_flush(namespace)
+        if task is not None:
+            await task
+
+    def status(self, namespace: str) -> Dict[str, Any]:
+        """Return the buffer and flush state of a namespace."""
+        buffer = self._buffers.get(namespace) or NamespaceBuffer()
+        return {
+            "namespace": namespace,
+            "buffered": len(buffer.records),
+            "buffered_bytes": buffer.size_bytes,
+            "in_flight": self._in_flight.get(namespace, 0),
+            "flushes": buffer.flushes,
+            "last_flush_at": buffer.last_flush_at,
+            "last_error": buffer.last_error,
+            "failed_flushes": buffer.failed_flushes,
+            "dead_lettered_records": buffer.dead_lettered_records,
+            "dropped_records": buffer.dropped_records,
+            "held_since": buffer.held_since,
+        }
+
+    async def _run_timer(self) -> None:
+        while True:
+            await asyncio.sleep(self.tick)
+            now = time.monotonic()
+            for namespace, buffer in list(self._buffers.items()):
+                if buffer.records and now - buffer.opened_at >= self.max_wait:
+                    self._start_flush(namespace)
+
+    def start(self) -> None:
+        """Start the timer that flushes windows older than `max_wait`."""
+        self._stopping = False
+        if self._timer is None:
+            self._timer = asyncio.create_task(self._run_timer())
+
+    async def stop(self) -> None:
+        """Stop the window timer and flush everything still buffered."""
+        self._stopping = True
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for namespace in list(self._buffers):
+            self._start_flush(namespace)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+def _append_line(path: str, line: str) -> None:
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+
+# Decompressed output is produced in pieces of at most this many bytes (zstd: about this many)
+DECOMPRESS_STEP_BYTES = 64 * 1024
+# zstandard's streaming object has no output limit, so compressed input is fed in
+# slices small enough that one slice cannot expand to more than a few MB
+ZSTD_INPUT_STEP_BYTES = 256
+
+
+class _GzipDecoder:
+    def __init__(self):
+        self._obj = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+
+    def feed(self, data: bytes) -> Iterator[bytes]:
+        while data:
+            out = self._obj.decompress(data, DECOMPRESS_STEP_BYTES)
+            if out:
+                yield out
+            if self._obj.unconsumed_tail:
+                data = self._obj.unconsumed_tail
+            elif self._obj.eof and self._obj.unused_data:
+                # Concatenated gzip members (e.g. appended log files) start a new stream.
+                data = self._obj.unused_data
+                self._obj = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+            else:
+                data = b""
+
+    def finish(self) -> Iterator[bytes]:
+        out = self._obj.flush()
+        if out:
+            yield out
+
+
+class _ZstdDecoder:
+    def __init__(self):
+        try:
+            import zstandard
+        except ImportError as e:
+            raise UploadError("zstd uploads require the 'zstandard' package.") from e
+        self._obj = zstandard.ZstdDecompressor().decompressobj(
+            write_size=DECOMPRESS_STEP_BYTES
+        )
+
+    def feed(self, data: bytes) -> Iterator[bytes]:
+        for start in range(0, len(data), ZSTD_INPUT_STEP_BYTES):
+            out = self._obj.decompress(data[start : start + ZSTD_INPUT_STEP_BYTES])
+            if out:
+                yield out
+
+    def finish(self) -> Iterator[bytes]:
+        return iter(())
+
+
+def _decoder(compression: str):
+    if compression in ("", "none", "identity"):
+        return None
+    if compression in ("gzip", "x-gzip"):
+        return _GzipDecoder()
+    if compression == "zstd":
+        return _ZstdDecoder()
+    raise UploadError(f"Unsupported compression '{compression}'.")
+
+
+async def iter_ndjson(
+    chunks: AsyncIterator[bytes],
+    compression: str = "none",
+    max_line_bytes: int = 1_000_000,
+    max_total_bytes: int | None = None,
+) -> AsyncIterator[Any]:
+    """Incrementally decompresses and parses a newline-delimited JSON body.
+
+    Decompression runs in bounded steps and only one partial line is held in
+    memory at a time, so memory stays bounded however far the body expands.
+    Yields the decoded value of each non-empty line, or the `ValueError` raised
+    for an undecodable one. Raises `UploadError` once the decompressed body
+    exceeds `max_total_bytes`.
+    """
+    decoder = _decoder(compression.lower())
+    pending = bytearray()
+    total = 0
+
+    def lines(data: bytes) -> List[bytes]:
+        nonlocal total
+        total += len(data)
+        if max_total_bytes is not None and total > max_total_bytes:
+            raise UploadError(f"Upload expands to more than {max_total_bytes} bytes.")
+        start = len(pending)
+        pending.extend(data)
+        # Only the new bytes can hold a newline; earlier ones were already scanned
+        last = pending.rfind(b"\n", start)
+        complete = []
+        if last >= 0:
+            complete = bytes(pending[:last]).split(b"\n")
+            del pending[: last + 1]
+        if len(pending) > max_line_bytes:
+            raise UploadError(f"NDJSON line exceeds {max_line_bytes} bytes.")
+        return complete
+
+    def parse(line: bytes):
+        try:
+            return json.loads(line)
+        except ValueError as e:
+            return e
+
+    def decoded(pieces: Iterator[bytes]) -> Iterator[bytes]:
+        try:
+            yield from pieces
+        except UploadError:
+            raise
+        except Exception as e:
+            raise UploadError(f"Could not decompress upload: {e}") from e
+
+    async for chunk in chunks:
+        for piece in decoded(decoder.feed(chunk)) if decoder is not None else [chunk]:
+            for line in lines(piece):
+                if line.strip():
+                    yield parse(line)
+
+    if decoder is not None:
+        for piece in decoded(decoder.finish()):
+            for line in lines(piece):
+                if line.strip():
+                    yield parse(line)
+    if pending.strip():
+        yield parse(bytes(pending))
@@ -0,0 +1,288 @@
+"""Durable background job queue for post-approval processing.
+
+Jobs are persisted in a local SQLite database so queued work survives a
+restart. Workers never run two jobs for the same namespace at once, which
+keeps read-modify-write steps (STM, instructions) ordered per namespace.
+
+A claimed job holds a lease that its worker renews while the job runs. Only
+jobs whose lease has expired (their worker died) are put back in the queue,
+so several API processes can share one queue file. Failed jobs are retried
+with exponential backoff.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobQueue:
+    """SQLite-backed FIFO queue of (namespace, kind, payload) jobs."""
+
+    def __init__(
+        self,
+        path: str,
+        max_attempts: int = 3,
+        lease_seconds: float = 300.0,
+        retry_backoff: float = 5.0,
+        max_retry_backoff: float = 600.0,
+    ):
+        """Open the queue database at `path`."""
+        self.path = path
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.retry_backoff = retry_backoff
+        self.max_retry_backoff = max_retry_backoff
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                namespace TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                heartbeat_at REAL,
+                not_before REAL NOT NULL DEFAULT 0
+            )
+            """
+        )
+        # Queue files created before leases and backoff existed
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "heartbeat_at" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN heartbeat_at REAL")
+        if "not_before" not in columns:
+            self._conn.execute(
+                "ALTER TABLE jobs ADD COLUMN not_before REAL NOT NULL DEFAULT 0"
+            )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS jobs_namespace ON jobs (namespace, id)"
+        )
+
+    def enqueue(self, namespace: str, kind: str, payload: Dict[str, Any]) -> int:
+        """Queue a job and return its id."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO jobs (namespace, kind, payload, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, kind, json.dumps(payload), QUEUED, now, now),
+            )
+            return cursor.lastrowid
+
+    def claim(self) -> Dict[str, Any] | None:
+        """Mark the oldest runnable job as running and return it, or None if there is none.
+
+        A job is runnable when its retry backoff has passed, no other job for its
+        namespace is running and no older job for its namespace is still queued.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    """
+                    SELECT * FROM jobs AS j
+                    WHERE j.status = ? AND j.not_before <= ?
+                      AND NOT EXISTS (
+                        SELECT 1 FROM jobs AS o
+                        WHERE o.namespace = j.namespace
+                          AND (o.status = ? OR (o.status = ? AND o.id < j.id))
+                      )
+                    ORDER BY j.id LIMIT 1
+                    """,
+                    (QUEUED, now, RUNNING, QUEUED),
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, attempts = attempts + 1, updated_at = ?, heartbeat_at = ? WHERE id = ?",
+                        (RUNNING, now, now, row["id"]),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["attempts"] += 1
+        return job
+
+    # complete/fail/heartbeat match on attempts so a worker whose lease expired
+    # cannot touch the job once it has been claimed again
+    def complete(self, job_id: int, attempts: int) -> None:
+        """Mark a job done, unless its lease was lost to another attempt."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = NULL, updated_at = ? WHERE id = ? AND status = ? AND attempts = ?",
+                (DONE, time.time(), job_id, RUNNING, attempts),
+            )
+
+    def fail(self, job_id: int, error: str, attempts: int) -> None:
+        """Record a failure, re-queuing the job with exponential backoff.
+
+        The job is retried until it has used up `max_attempts`.
+        """
+        now = time.time()
+        status = QUEUED if attempts < self.max_attempts else FAILED
+        delay = min(self.retry_backoff * 2 ** (attempts - 1), self.max_retry_backoff)
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ?, not_before = ? "
+                "WHERE id = ? AND status = ? AND attempts = ?",
+                (status, error, now, now + delay, job_id, RUNNING, attempts),
+            )
+
+    def heartbeat(self, jobs: List[tuple]) -> None:
+        """Renew the leases of running (job_id, attempts) pairs."""
+        if not jobs:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = ? AND attempts = ?",
+                [(now, job_id, RUNNING, attempts) for job_id, attempts in jobs],
+            )
+
+    def requeue_expired(self) -> int:
+        """Return running jobs whose lease has expired (their worker is gone) to the queue."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE status = ? AND COALESCE(heartbeat_at, 0) < ?",
+                (QUEUED, now, RUNNING, now - self.lease_seconds),
+            )
+            return cursor.rowcount
+
+    def status(self, namespace: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """Return the most recent jobs for a namespace, newest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, kind, status, attempts, error, created_at, updated_at FROM jobs "
+                "WHERE namespace = ? ORDER BY id DESC LIMIT ?",
+                (namespace, limit),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self) -> None:
+        """Close the queue database."""
+        with self._lock:
+            self._conn.close()
+
+
+class JobWorker:
+    """Pool of threads that run queued jobs through `handlers[kind](namespace, payload)`.
+
+    A separate thread renews the leases of the jobs this pool is running and
+    re-queues jobs whose lease expired, e.g. after another process crashed.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handlers: Dict[str, Callable[[str, Dict[str, Any]], None]],
+        workers: int = 2,
+        poll_interval: float = 0.5,
+    ):
+        """Create a pool of `workers` threads running jobs with `handlers`."""
+        self.queue = queue
+        self.handlers = handlers
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._threads: List[threading.Thread] = []
+        self._running: Dict[int, int] = {}
+        self._running_lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        """Start the worker threads and the lease keeper."""
+        self._stopped.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._run, name=f"job-worker-{i}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        thread = threading.Thread(
+            target=self._maintain, name="job-lease-keeper", daemon=True
+        )
+        thread.start()
+        self._threads.append(thread)
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Stop taking jobs and wait up to `timeout` seconds in all for running ones."""
+        self._stopped.set()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(
+                None if deadline is None else max(0.0, deadline - time.monotonic())
+            )
+        self._threads = []
+
+    def run_once(self) -> bool:
+        """Run a single job if one is available; returns whether a job was run."""
+        job = self.queue.claim()
+        if job is None:
+            return False
+        handler = self.handlers.get(job["kind"])
+        with self._running_lock:
+            self._running[job["id"]] = job["attempts"]
+        try:
+            if handler is None:
+                raise KeyError(f"No handler registered for job kind '{job['kind']}'")
+            handler(job["namespace"], job["payload"])
+        except Exception as e:
+            logger.exception("Job %s (%s) failed", job["id"], job["kind"])
+            self.queue.fail(job["id"], str(e), job["attempts"])
+        else:
+            self.queue.complete(job["id"], job["attempts"])
+        finally:
+            with self._running_lock:
+                self._running.pop(job["id"], None)
+        return True
+
+    def maintain(self) -> None:
+        """Renew this pool's leases and re-queue jobs whose lease has expired."""
+        with self._running_lock:
+            running = list(self._running.items())
+        self.queue.heartbeat(running)
+        requeued = self.queue.requeue_expired()
+        if requeued:
+            logger.info(
+                "Re-queued %d jobs whose worker stopped renewing their lease", requeued
+            )
+
+    def _maintain(self) -> None:
+        interval = max(self.queue.lease_seconds / 3, self.poll_interval)
+        while not self._stopped.is_set():
+            try:
+                self.maintain()
+            except Exception:
+                logger.exception("Failed to renew job leases")
+            self._stopped.wait(interval)
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            if not self.run_once():
+                self._stopped.wait(self.poll_interval)
@@ -0,0 +1,178 @@
+"""Deterministic pre-aggregation of log lines before they reach the LLM.
+
+Lines in the `LEVEL [timestamp] [component] message` format are grouped into
+message templates (Drain-style: variable tokens are masked and similar
+messages of the same length are merged), repeats are collapsed into counts
+with first/last timestamps, and every WARN/ERROR line is kept verbatim.
+"""
+
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Tuple
+
+LOG_LINE = re.compile(
+    r"^(?P<level>[A-Z]+)\s+\[(?P<timestamp>[^\]]+)\]\s+\[(?P<component>[^\]]+)\]\s+(?P<message>.*)$"
+)
+
+# Levels whose lines are always passed through verbatim.
+IMPORTANT_LEVELS = {"WARN", "WARNING", "ERROR", "CRITICAL", "FATAL"}
+
+WILDCARD = "<*>"
+
+# Tokens that are almost certainly variables: anything with a digit, quoted
+# strings, paths, URLs and long hex ids.
+_VARIABLE_TOKEN = re.compile(r"\d|^['\"].*['\"][.,;:]?$|^/|://|^[0-9a-fA-F]{8,}$")
+
+
+@dataclass
+class LogLine:
+    """A parsed `LEVEL [timestamp] [component] message` log line."""
+
+    level: str
+    timestamp: str
+    component: str
+    message: str
+    raw: str
+
+
+@dataclass
+class LogTemplate:
+    """Log lines that differ only in their variable tokens."""
+
+    level: str
+    component: str
+    tokens: List[str]
+    count: int
+    first_seen: str
+    last_seen: str
+
+    @property
+    def text(self) -> str:
+        """Return the template's message with wildcards."""
+        return " ".join(self.tokens)
+
+
+def parse_line(line: str) -> LogLine | None:
+    """Parse a log line, or return None if it is not in the expected format."""
+    match = LOG_LINE.match(line.strip())
+    if match is None:
+        return None
+    return LogLine(raw=line.strip(), **match.groupdict())
+
+
+def mask_tokens(message: str) -> List[str]:
+    """Split a message into tokens, replacing variable ones with a wildcard."""
+    return [
+        WILDCARD if _VARIABLE_TOKEN.search(token) else token
+        for token in message.split()
+    ]
+
+
+class TemplateMiner:
+    """Online Drain-style clustering of log messages into templates.
+
+    Messages are bucketed by (level, component, token count, first token) and
+    merged into the first template in the bucket whose share of matching
+    positions is at least `similarity`; differing positions become `<*>`.
+    """
+
+    def __init__(self, similarity: float = 0.5):
+        """Create a miner merging lines whose tokens match by at least `similarity`."""
+        self.similarity = similarity
+        self.templates: List[LogTemplate] = []
+        self._buckets: Dict[Tuple[str, str, int, str], List[LogTemplate]] = {}
+
+    def add(self, line: LogLine) -> LogTemplate:
+        """Add a line to its matching template, or to a new one, and return it."""
+        tokens = mask_tokens(line.message)
+        key = (line.level, line.component, len(tokens), tokens[0] if tokens else "")
+        bucket = self._buckets.setdefault(key, [])
+
+        for template in bucket:
+            matches = sum(
+                1 for a, b in zip(template.tokens, tokens) if a == b or a == WILDCARD
+            )
+            if not tokens or matches / len(tokens) >= self.similarity:
+                template.tokens = [
+                    a if a == b else WILDCARD for a, b in zip(template.tokens, tokens)
+                ]
+                template.count += 1
+                template.first_seen = min(template.first_seen, line.timestamp)
+                template.last_seen = max(template.last_seen, line.timestamp)
+                return template
+
+        template = LogTemplate(
+            level=line.level,
+            component=line.component,
+            tokens=tokens,
+            count=1,
+            first_seen=line.timestamp,
+            last_seen=line.timestamp,
+        )
+        bucket.append(template)
+        self.templates.append(template)
+        return template
+
+
+def summarize_logs(
+    lines: Iterable[str], similarity: float = 0.5, min_parsed_ratio: float = 0.5
+) -> str | None:
+    """Return a compact summary of log lines.
+
+    Returns None if too few lines are in the expected format for a summary to
+    be faithful (e.g. free text payloads).
+    """
+    miner = TemplateMiner(similarity=similarity)
+    levels: Counter = Counter()
+    important: Counter = Counter()
+    unparsed: List[str] = []
+    first, last = None, None
+    total = 0
+
+    for line in lines:
+        if not line.strip():
+            continue
+        total += 1
+        parsed = parse_line(line)
+        if parsed is None:
+            unparsed.append(line.strip())
+            continue
+        miner.add(parsed)
+        levels[parsed.level] += 1
+        first = parsed.timestamp if first is None else min(first, parsed.timestamp)
+        last = parsed.timestamp if last is None else max(last, parsed.timestamp)
+        if parsed.level in IMPORTANT_LEVELS:
+            important[parsed.raw] += 1
+
+    parsed_count = total - len(unparsed)
+    if total == 0 or parsed_count / total < min_parsed_ratio:
+        return None
+
+    out = [
+        f"Log summary: {total} lines, {len(miner.templates)} message templates, {len(unparsed)} unparsed lines",
+        f"Time range: {first} to {last}",
+        "Levels: "
+        + ", ".join(f"{level}={count}" for level, count in levels.most_common()),
+        "",
+        "| Count | Level | Component | First seen | Last seen | Template |",
+        "|---|---|---|---|---|---|",
+    ]
+    for template in sorted(miner.templates, key=lambda t: (-t.count, t.first_seen)):
+        out.append(
+            f"| {template.count} | {template.level} | {template.component} | "
+            f"{template.first_seen} | {template.last_seen} | {template.text.replace('|', '/')} |"
+        )
+
+    if important:
+        out += ["", "Warnings and errors (verbatim):"]
+        out += [
+            raw if count == 1 else f"{raw} (x{count})"
+            for raw, count in important.items()
+        ]
+
+    if unparsed:
+        out += ["", "Unparsed lines (verbatim):"]
+        out += unparsed
+
+    return "\n".join(out)
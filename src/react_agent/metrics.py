@@ -0,0 +1,414 @@
+"""In-process metrics with a Prometheus text rendering and optional OpenTelemetry spans.
+
+`Metrics` keeps counters and latency histograms for graph nodes, post-approval
+jobs and external calls (LLMs, embeddings, the store, LightRAG), plus token
+counts and cost per deployment. Cache hit counters are read from the caches
+themselves through collectors at render time. The API serves `render()` at
+/metrics.
+
+When a tracer is given (see `load_tracer`), every timed block also becomes an
+OpenTelemetry span, nested under whatever span is current.
+"""
+
+import asyncio
+import functools
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langgraph.store.base import GetOp, ListNamespacesOp, PutOp, SearchOp
+from langgraph.store.postgres import PostgresStore
+from langgraph.store.postgres.aio import AsyncPostgresStore
+from typing_extensions import override
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+)
+
+METRIC_HELP = {
+    "node_seconds": "Wall time of graph nodes",
+    "job_seconds": "Wall time of post-approval jobs",
+    "llm_seconds": "Wall time of chat completion calls, excluding time queued for a deployment slot",
+    "llm_tokens_total": "Tokens sent to and generated by each chat deployment",
+    "llm_cost_total": "Cost of chat completion calls, from LLM_PRICES",
+    "embedding_seconds": "Wall time of embedding calls that missed the embedding cache",
+    "embedding_tokens_total": "Tokens sent to each embedding deployment",
+    "store_seconds": "Wall time of LangGraph store operations",
+    "rag_seconds": "Wall time of LightRAG inserts and queries",
+    "cache_hits_total": "Cache lookups served from the cache",
+    "cache_misses_total": "Cache lookups that missed",
+    "cache_hit_ratio": "Share of cache lookups served from the cache",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+Sample = Tuple[str, str, Dict[str, str], float]
+
+
+def load_tracer(name: str = "intelligent-index"):
+    """Return an OpenTelemetry tracer, or None if opentelemetry-api is not installed.
+
+    Spans are exported by whatever SDK the process configures (e.g.
+    opentelemetry-instrument).
+    """
+    try:
+        from opentelemetry import trace
+    except ImportError:
+        logger.warning("opentelemetry-api is not installed, tracing is disabled")
+        return None
+    return trace.get_tracer(name)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    pairs = ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels)
+    return "{" + pairs + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metrics:
+    """Thread-safe counters and histograms, rendered in the Prometheus text format."""
+
+    def __init__(
+        self,
+        prefix: str = "intelligent_index",
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+        tracer=None,
+    ):
+        """Create metrics named with `prefix` and histograms with `buckets`."""
+        self.prefix = prefix
+        self.buckets = tuple(sorted(buckets))
+        self.tracer = tracer
+        self._counters: Dict[str, Dict[Labels, float]] = defaultdict(
+            lambda: defaultdict(float)
+        )
+        # name -> labels -> [count per bucket..., sum, count]
+        self._histograms: Dict[str, Dict[Labels, List[float]]] = defaultdict(dict)
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+        """Add `value` to a counter."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._counters[name][key] += value
+
+    def observe(self, name: str, seconds: float, **labels: str) -> None:
+        """Record a duration in a histogram."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms[name].get(key)
+            if series is None:
+                series = self._histograms[name][key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[i] += 1
+            series[-2] += seconds
+            series[-1] += 1
+
+    @contextmanager
+    def timer(self, name: str, **labels: str):
+        """Time the block into histogram `name`, labelled status="ok" or "error".
+
+        The block runs inside a span named after the metric and its label values.
+        """
+        span = None
+        if self.tracer is not None:
+            span_name = " ".join([name.removesuffix("_seconds"), *labels.values()])
+            span = self.tracer.start_as_current_span(span_name, attributes=labels)
+            span.__enter__()
+        started = time.perf_counter()
+        status = "ok"
+        try:
+            yield
+        except BaseException as e:
+            status = "error"
+            if span is not None:
+                span.__exit__(type(e), e, e.__traceback__)
+                span = None
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - started, status=status, **labels)
+            if span is not None:
+                span.__exit__(None, None, None)
+
+    def instrument(self, name: str, **labels: str):
+        """Return a decorator timing every call of a sync or async function with `timer`."""
+
+        def decorator(func):
+            if asyncio.iscoroutinefunction(func):
+
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with self.timer(name, **labels):
+                        return await func(*args, **kwargs)
+
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, **labels):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def add_collector(self, collector: Callable[[], Iterable[Sample]]) -> None:
+        """Register a callable returning (name, type, labels, value) samples read at render time."""
+        self._collectors.append(collector)
+
+    def record_llm_usage(
+        self,
+        deployment: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        prices: Dict[str, Dict[str, float]] | None = None,
+    ) -> None:
+        """Count tokens for a chat deployment and, if it has a price per 1K tokens, the cost."""
+        self.inc(
+            "llm_tokens_total", prompt_tokens, deployment=deployment, type="prompt"
+        )
+        self.inc(
+            "llm_tokens_total",
+            completion_tokens,
+            deployment=deployment,
+            type="completion",
+        )
+        price = (prices or {}).get(deployment)
+        if price:
+            cost = (
+                prompt_tokens * price.get("prompt", 0)
+                + completion_tokens * price.get("completion", 0)
+            ) / 1000
+            self.inc("llm_cost_total", cost, deployment=deployment)
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text format."""
+        samples: Dict[str, Tuple[str, List[str]]] = {}
+
+        def add(name, kind, line):
+            samples.setdefault(name, (kind, []))[1].append(line)
+
+        with self._lock:
+            for name, series in self._counters.items():
+                full = f"{self.prefix}_{name}"
+                for labels, value in series.items():
+                    add(
+                        name,
+                        "counter",
+                        f"{full}{_format_labels(labels)} {_format_value(value)}",
+                    )
+            for name, series in self._histograms.items():
+                full = f"{self.prefix}_{name}"
+                for labels, values in series.items():
+                    for bound, count in zip(self.buckets, values):
+                        add(
+                            name,
+                            "histogram",
+                            f"{full}_bucket{_format_labels(labels + (('le', repr(bound)),))} {_format_value(count)}",
+                        )
+                    add(
+                        name,
+                        "histogram",
+                        f"{full}_bucket{_format_labels(labels + (('le', '+Inf'),))} {_format_value(values[-1])}",
+                    )
+                    add(
+                        name,
+                        "histogram",
+                        f"{full}_sum{_format_labels(labels)} {values[-2]!r}",
+                    )
+                    add(
+                        name,
+                        "histogram",
+                        f"{full}_count{_format_labels(labels)} {_format_value(values[-1])}",
+                    )
+
+        for collector in self._collectors:
+            try:
+                collected = list(collector())
+            except Exception:
+                logger.exception("Metrics collector %r failed", collector)
+                continue
+            for name, kind, labels, value in collected:
+                add(
+                    name,
+                    kind,
+                    f"{self.prefix}_{name}{_format_labels(sorted(labels.items()))} {_format_value(value)}",
+                )
+
+        lines = []
+        for name in sorted(samples):
+            kind, series = samples[name]
+            full = f"{self.prefix}_{name}"
+            if name in METRIC_HELP:
+                lines.append(f"# HELP {full} {METRIC_HELP[name]}")
+            lines.append(f"# TYPE {full} {kind}")
+            lines.extend(series)
+        return "\n".join(lines) + "\n"
+
+
+class LLMMetricsHandler(BaseCallbackHandler):
+    """LangChain callback recording wall time, tokens and cost of chat model calls.
+
+    Every call made through a chat model is recorded, including those made by
+    langmem.
+    """
+
+    run_inline = True
+
+    def __init__(
+        self,
+        metrics: Metrics,
+        deployment: str,
+        prices: Dict[str, Dict[str, float]] | None = None,
+    ):
+        """Create a handler recording calls to `deployment`, costed with `prices`."""
+        self.metrics = metrics
+        self.deployment = deployment or "unknown"
+        self.prices = prices
+        self._started: Dict[UUID, Tuple[float, Any]] = {}
+
+    def _start(self, run_id: UUID) -> None:
+        span = None
+        if self.metrics.tracer is not None:
+            span = self.metrics.tracer.start_span(
+                f"llm {self.deployment}", attributes={"deployment": self.deployment}
+            )
+        self._started[run_id] = (time.perf_counter(), span)
+
+    def _finish(self, run_id: UUID, status: str) -> None:
+        started, span = self._started.pop(run_id, (None, None))
+        if started is None:
+            return
+        self.metrics.observe(
+            "llm_seconds",
+            time.perf_counter() - started,
+            deployment=self.deployment,
+            status=status,
+        )
+        if span is not None:
+            span.end()
+
+    @override
+    def on_chat_model_start(
+        self, serialized, messages, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._start(run_id)
+
+    @override
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id)
+
+    @override
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, "ok")
+        prompt_tokens, completion_tokens = llm_result_tokens(response)
+        if prompt_tokens or completion_tokens:
+            self.metrics.record_llm_usage(
+                self.deployment, prompt_tokens, completion_tokens, self.prices
+            )
+
+    @override
+    def on_llm_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._finish(run_id, "error")
+
+
+def llm_result_tokens(response: LLMResult) -> Tuple[int, int]:
+    """Return the prompt and completion tokens of a chat result.
+
+    They come from the message usage metadata or else the provider's token_usage.
+    """
+    prompt_tokens = completion_tokens = 0
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(
+                getattr(generation, "message", None), "usage_metadata", None
+            )
+            if usage:
+                prompt_tokens += usage.get("input_tokens", 0)
+                completion_tokens += usage.get("output_tokens", 0)
+    if not (prompt_tokens or completion_tokens):
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        completion_tokens = usage.get("completion_tokens", 0)
+    return prompt_tokens, completion_tokens
+
+
+def store_op_labels(ops: List[Any]) -> Dict[str, str]:
+    """Label a store batch by operation and top-level namespace (e.g. "stm", "episodes")."""
+    kinds = {
+        GetOp: "get",
+        PutOp: "put",
+        SearchOp: "search",
+        ListNamespacesOp: "list_namespaces",
+    }
+    names = {kinds.get(type(op), "other") for op in ops}
+    op = names.pop() if len(names) == 1 else "batch"
+    namespace = ""
+    if len(ops) == 1:
+        prefix = (
+            getattr(ops[0], "namespace", None)
+            or getattr(ops[0], "namespace_prefix", None)
+            or ()
+        )
+        namespace = prefix[0] if prefix else ""
+    return {"op": op, "namespace": namespace}
+
+
+class TimedPostgresStore(PostgresStore):
+    """PostgresStore recording the wall time of every get/put/search (they all go through batch)."""
+
+    def __init__(self, *args, metrics: Metrics, **kwargs):
+        """Create the store, recording batch timings in `metrics`."""
+        super().__init__(*args, **kwargs)
+        self.metrics = metrics
+
+    @override
+    def batch(self, ops):
+        ops = list(ops)
+        with self.metrics.timer("store_seconds", **store_op_labels(ops)):
+            return super().batch(ops)
+
+
+class TimedAsyncPostgresStore(AsyncPostgresStore):
+    """Async version of TimedPostgresStore; its sync methods also run through abatch."""
+
+    def __init__(self, *args, metrics: Metrics, **kwargs):
+        """Create the store, recording batch timings in `metrics`."""
+        super().__init__(*args, **kwargs)
+        self.metrics = metrics
+
+    @override
+    async def abatch(self, ops):
+        ops = list(ops)
+        with self.metrics.timer("store_seconds", **store_op_labels(ops)):
+            return await super().abatch(ops)
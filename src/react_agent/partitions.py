@@ -0,0 +1,118 @@
+"""Bounded LRU of open per-partition instances (e.g. one LightRAG per tenant).
+
+Instances are created on first use and closed when more than `max_open` are
+open, least recently used first. An instance is never closed while a caller
+holds it through `use`; if every open instance is in use the limit is exceeded
+until they are released.
+
+Instances are created, used and closed on a single event loop; code running in
+other threads hands its work to that loop (see `react_agent.utils.run_with_rag`).
+"""
+
+import asyncio
+import threading
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, List
+
+
+class PartitionLRU:
+    """Open instances per partition, evicting the least recently used beyond `max_open`."""
+
+    def __init__(
+        self,
+        max_open: int,
+        acreate: Callable[[str], Awaitable[Any]],
+        aclose: Callable[[Any], Awaitable[None]],
+    ):
+        """Create the LRU with the functions that open and close an instance."""
+        self.max_open = max(1, max_open)
+        self._acreate = acreate
+        self._aclose = aclose
+        self._lock = threading.Lock()
+        self._open: OrderedDict[str, Any] = OrderedDict()
+        self._in_use: Dict[str, int] = {}
+        # Creation is serialised per partition so a burst of requests for a cold
+        # partition loads it once
+        self._async_locks: Dict[str, asyncio.Lock] = {}
+
+    def _checkout(self, partition: str) -> Any | None:
+        with self._lock:
+            instance = self._open.get(partition)
+            if instance is not None:
+                self._open.move_to_end(partition)
+                self._in_use[partition] = self._in_use.get(partition, 0) + 1
+            return instance
+
+    def _add(self, partition: str, created: Any) -> tuple:
+        """Register a new instance, returning the one to use and those to close."""
+        with self._lock:
+            to_close = []
+            instance = self._open.get(partition)
+            if instance is None:
+                instance = self._open[partition] = created
+            else:
+                self._open.move_to_end(partition)
+                to_close.append(created)
+            self._in_use[partition] = self._in_use.get(partition, 0) + 1
+            return instance, to_close + self._evict()
+
+    def _evict(self) -> List[Any]:
+        # Called with self._lock held
+        evicted = []
+        for partition in list(self._open):
+            if len(self._open) <= self.max_open:
+                break
+            if not self._in_use.get(partition):
+                evicted.append(self._open.pop(partition))
+                self._in_use.pop(partition, None)
+        return evicted
+
+    def _release(self, partition: str) -> List[Any]:
+        with self._lock:
+            self._in_use[partition] -= 1
+            return self._evict()
+
+    async def acquire(self, partition: str) -> Any:
+        """Return the partition's instance, opening it if needed, and mark it in use."""
+        instance = self._checkout(partition)
+        if instance is not None:
+            return instance
+        with self._lock:
+            creation_lock = self._async_locks.setdefault(partition, asyncio.Lock())
+        async with creation_lock:
+            instance = self._checkout(partition)
+            if instance is not None:
+                return instance
+            instance, to_close = self._add(partition, await self._acreate(partition))
+        for evicted in to_close:
+            await self._aclose(evicted)
+        return instance
+
+    async def release(self, partition: str) -> None:
+        """Mark one use of the partition's instance as finished."""
+        for evicted in self._release(partition):
+            await self._aclose(evicted)
+
+    @asynccontextmanager
+    async def use(self, partition: str):
+        """Yield the partition's instance, keeping it in use until the block exits."""
+        instance = await self.acquire(partition)
+        try:
+            yield instance
+        finally:
+            await self.release(partition)
+
+    def open_partitions(self) -> List[str]:
+        """Open partitions, least recently used first."""
+        with self._lock:
+            return list(self._open)
+
+    async def close(self) -> None:
+        """Close every open instance, whether or not it is in use."""
+        with self._lock:
+            instances = list(self._open.values())
+            self._open.clear()
+            self._in_use.clear()
+        for instance in instances:
+            await self._aclose(instance)
@@ -0,0 +1,201 @@
+"""Token-budgeted prompt assembly for report generation.
+
+The system prompt (instructions, STM, episodic memory) and the data are
+fitted to a token budget. STM and episodic memory are trimmed to their own
+budgets; data that does not fit is split into chunks that are reported on
+separately (map) and merged into one report (reduce).
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Rough characters-per-token ratio used when no tiktoken encoding is available.
+CHARS_PER_TOKEN = 4
+
+
+class TokenCounter:
+    """Counts tokens with a tiktoken encoding.
+
+    Falls back to a character estimate when the encoding cannot be loaded (e.g.
+    offline without a cache).
+    """
+
+    def __init__(self, encoding_name: str = "cl100k_base"):
+        """Create a counter for the tiktoken encoding `encoding_name`."""
+        self.encoding_name = encoding_name
+        try:
+            import tiktoken
+
+            self._encoding = tiktoken.get_encoding(encoding_name)
+        except Exception:
+            logger.warning(
+                "tiktoken encoding %s unavailable, estimating token counts",
+                encoding_name,
+            )
+            self._encoding = None
+
+    def count(self, text: str) -> int:
+        """Return the number of tokens in `text`."""
+        if not text:
+            return 0
+        if self._encoding is None:
+            return -(-len(text) // CHARS_PER_TOKEN)
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Keep the beginning of `text` up to `max_tokens`, noting how much was cut."""
+        tokens = self.count(text)
+        if tokens <= max_tokens:
+            return text
+        if self._encoding is None:
+            kept = text[: max_tokens * CHARS_PER_TOKEN]
+        else:
+            kept = self._encoding.decode(
+                self._encoding.encode(text, disallowed_special=())[:max_tokens]
+            )
+        return f"{kept}\n[... truncated {tokens - max_tokens} tokens]"
+
+
+@dataclass
+class PromptBudget:
+    """Token budget of the report prompt and its sections."""
+
+    max_input_tokens: int = 100_000
+    stm_tokens: int = 4_000
+    episodic_tokens: int = 2_000
+    min_data_tokens: int = 1_000
+
+
+@dataclass
+class ReportPlan:
+    """The system prompt and data chunks of a report."""
+
+    system: str
+    chunks: List[List[Dict[str, Any]]]
+    data_budget: int
+    token_usage: Dict[str, Any] = field(default_factory=dict)
+
+
+def split_records(
+    data: List[Dict[str, Any]],
+    budget: int,
+    counter: TokenCounter,
+    formatter: Callable[[List[Dict[str, Any]]], str],
+) -> List[List[Dict[str, Any]]]:
+    """Greedily packs records into chunks whose formatted text fits `budget` tokens.
+
+    A record too large on its own is split by lines into several records
+    sharing its other fields.
+    """
+    chunks: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    current_tokens = 0
+
+    def pieces(record):
+        if counter.count(formatter([record])) <= budget:
+            return [record]
+        lines = str(record.get("content", "")).splitlines() or [""]
+        parts, part, part_tokens = [], [], 0
+        for line in lines:
+            line_tokens = counter.count(line) + 1
+            if part and part_tokens + line_tokens > budget:
+                parts.append(part)
+                part, part_tokens = [], 0
+            part.append(
+                counter.truncate(line, budget) if line_tokens > budget else line
+            )
+            part_tokens += min(line_tokens, budget)
+        parts.append(part)
+        return [{**record, "content": "\n".join(part)} for part in parts]
+
+    for record in data:
+        for piece in pieces(record):
+            tokens = counter.count(formatter([piece]))
+            if current and current_tokens + tokens > budget:
+                chunks.append(current)
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def group_texts(
+    texts: List[str], budget: int, counter: TokenCounter
+) -> List[List[str]]:
+    """Group texts in order so each group's total token count fits `budget`."""
+    groups: List[List[str]] = []
+    current: List[str] = []
+    current_tokens = 0
+    for text in texts:
+        tokens = counter.count(text)
+        if current and current_tokens + tokens > budget:
+            groups.append(current)
+            current, current_tokens = [], 0
+        current.append(text)
+        current_tokens += tokens
+    if current:
+        groups.append(current)
+    return groups
+
+
+def group_for_reduce(
+    texts: List[str], budget: int, counter: TokenCounter
+) -> List[List[str]]:
+    """Group partial reports for one reduce round.
+
+    If no two of them fit the
+    budget together, they are truncated to half the budget each and merged in
+    pairs, so every round makes progress and the reduce always ends.
+    """
+    groups = group_texts(texts, budget, counter)
+    if len(texts) > 1 and len(groups) == len(texts):
+        half = max(budget // 2, 1)
+        truncated = [counter.truncate(text, half) for text in texts]
+        groups = [truncated[i : i + 2] for i in range(0, len(truncated), 2)]
+    return groups
+
+
+def plan_report(
+    instructions: str,
+    stm: str,
+    episodic_memory: str,
+    data: List[Dict[str, Any]],
+    counter: TokenCounter,
+    budget: PromptBudget,
+    formatter: Callable[[List[Dict[str, Any]]], str],
+) -> ReportPlan:
+    """Assemble the system prompt within budget and split data into chunks that fit alongside it."""
+    stm_section = counter.truncate(stm, budget.stm_tokens)
+    episodic_section = counter.truncate(episodic_memory, budget.episodic_tokens)
+    system = instructions + f"\n\nShort Term Memory: {stm_section}" + episodic_section
+
+    system_tokens = counter.count(system)
+    data_budget = max(budget.max_input_tokens - system_tokens, budget.min_data_tokens)
+    data_tokens = counter.count(formatter(data))
+    chunks = (
+        [data]
+        if data_tokens <= data_budget
+        else split_records(data, data_budget, counter, formatter)
+    )
+
+    return ReportPlan(
+        system=system,
+        chunks=chunks,
+        data_budget=data_budget,
+        token_usage={
+            "instructions": counter.count(instructions),
+            "stm": counter.count(stm_section),
+            "stm_original": counter.count(stm),
+            "episodic_memory": counter.count(episodic_section),
+            "episodic_memory_original": counter.count(episodic_memory),
+            "data": data_tokens,
+            "data_budget": data_budget,
+            "chunks": len(chunks),
+            "prompt_total": system_tokens * len(chunks) + data_tokens,
+        },
+    )
@@ -22,82 +22,37 @@ Organize your findings with clear headings and bullet points for easy reference.
 """
 
 
-short_term_memory_manager_system = """
-You are a **Short-Term Memory Manager System** designed to handle and process streaming data arriving at regular intervals. 
-Your goal is to maintain and continuously update a long-running **dynamic report**, structured into **dated** and 
-**undated (general knowledge)** sections. You will be given the current report and new information to update as input.
-
-## Core Requirements
-
-### 1. Data Intake
-- Accept structured or unstructured data inputs on a regular basis (e.g., daily).
-- Each data input will include:
-  - A **timestamp** (e.g., ISO 8601 format)
-  - A **category** or **tag** (optional)
-  - The **data content**
-
-### 2. Report Structure
-- Split the report into two major sections:
-  1. **Dated Data** - observations, facts, or events associated with specific timeframes.
-  2. **Undated Data** - timeless, reusable knowledge or conclusions inferred from dated data.
-
-### 3. Storage and Summarization Strategy
-- Initially store new data **by day**.
-- As data volume grows, **roll up older data** into increasingly coarse summaries:
-  - Day → Week → Month → Quarter → Year
-  - The summarization threshold is based on how far the data is from the current date.
-- When summarizing:
-  - Combine related entries where possible.
-  - Eliminate redundant or obsolete details.
-  - Preserve key insights, trends, and anomalies.
-
-### 4. General Knowledge Extraction
-- Regularly scan the dated data for:
-  - Persistent patterns  
-  - Inferred insights  
-  - Frequently observed behaviors  
-- Move these to the **Undated** section if they are:
-  - Not bound to a specific date
-  - Likely to remain useful over time
-- Keep the undated section concise and updated (remove outdated generalizations if they no longer hold true).
-
-### 5. Report Update Frequency
-- The report should be **updated immediately** as new data is received.
-- Update includes:
-  - Adding new daily entries
-  - Checking if any previous data needs summarizing
-  - Checking if general insights can be extracted
-  - Removing outdated or less relevant data
-
-### 6. Retention and Expiry
-- Keep **recent daily data** (e.g., from the past week) in fine detail.
-- Summarize older data rather than delete it, unless it's explicitly marked irrelevant.
-- Ensure the report never grows unbounded - manage size through summarization and strategic forgetting.
-
-## Output Report Format Example:
-
-```markdown
-# Long-Term Report
-
-## Section 1: Dated Data
-
-### 2025-03-29
-- *example data point 1*
-- *example data point 2*
-...
-
-### Week of 2025-03-18 to 2025-03-24 (weekly summary)
-- *example data point 3*
-- *example data point 4*
-...
-
-### February 2025 (monthly summary)
-- *example data point 5*
-- *example data point 6*
-...
-
-## Section 2: Undated (General Knowledge)
-- *example general knowledge point 1*
-- *example general knowledge point 2*
-...
+stm_delta_prompt = """
+You maintain the **short term memory** (STM) of a streaming analysis: dated facts, events and observations,
+plus undated general knowledge (persistent patterns, inferred insights, frequently observed behaviours)
+grouped into titled sections. You will be given the general knowledge sections and the recent dated entries
+of the current STM, then a newly approved report.
+
+Return only the changes the report calls for:
+
+- **dated**: the new facts, events and observations, grouped by the day they belong to (YYYY-MM-DD, taken
+  from the report's dates). Keep points short and self-contained; leave out anything already recorded.
+- **general**: for each general knowledge section the report affects, the points to add and the existing
+  points the report shows no longer hold (copied exactly). Reuse an existing section title when the points
+  fit it, otherwise give a short new title. Only add knowledge that is not bound to a specific date and is
+  likely to remain useful.
+
+Do not restate the rest of the STM; sections and days you leave out are kept as they are.
+"""
+
+
+stm_summary_prompt = """
+You condense part of a short term memory. Summarise the points below, which cover {period}, into at most
+{max_points} short, self-contained points. Combine related points, drop redundant or obsolete details and
+keep key insights, trends, anomalies and any dates that matter.
+"""
+
+
+report_reduce_prompt = """
+The data for this report was too large to analyse at once, so it was split into parts and a partial report
+was written for each part. Merge the partial reports below into a single report that follows the instructions above.
+
+- Combine the time periods of all parts into one "Title and Dates" section.
+- Deduplicate repeated events and points; keep every distinct anomaly, warning and error.
+- Keep the structure, headings and level of detail the instructions ask for.
 """
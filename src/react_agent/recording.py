@@ -0,0 +1,118 @@
+"""Recording of API requests for later replay (see benchmarks/replay.py).
+
+`RequestRecorder` is ASGI middleware that appends one NDJSON line per request
+to a log file: arrival time, method, path, query parameters and JSON body.
+Responses are not recorded.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from typing import Iterable
+from urllib.parse import parse_qsl
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RECORDED_PATHS = (
+    "/invoke",
+    "/invoke/batch",
+    "/invoke/stream",
+    "/ingest",
+    "/ingest/flush",
+    "/set-instructions",
+    "/set-short-term-report",
+    "/retrieve",
+    "/retrieve-short-term",
+    "/retrieve-instructions",
+)
+
+
+class RequestRecorder:
+    """ASGI middleware recording requests to `paths` in an NDJSON log."""
+
+    def __init__(
+        self,
+        app,
+        path: str,
+        paths: Iterable[str] = DEFAULT_RECORDED_PATHS,
+        max_body_bytes: int = 10_000_000,
+    ):
+        """Wrap `app`, appending recorded requests to the file at `path`."""
+        self.app = app
+        self.paths = set(paths)
+        self.max_body_bytes = max_body_bytes
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8", buffering=1)
+
+    def _write(self, entry: dict) -> None:
+        line = json.dumps(entry, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    async def __call__(self, scope, receive, send):
+        """Record the request, if its path is recorded, and pass it to the app."""
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            return await self.app(scope, receive, send)
+
+        arrived = time.time()
+        chunks = []
+        size = 0
+        oversized = False
+
+        async def recording_receive():
+            nonlocal size, oversized
+            message = await receive()
+            if message["type"] == "http.request":
+                if not oversized:
+                    body = message.get("body", b"")
+                    size += len(body)
+                    chunks.append(body)
+                    if size > self.max_body_bytes:
+                        oversized = True
+                        chunks.clear()
+                if not message.get("more_body"):
+                    # Parsing and writing the entry happen off the event loop
+                    await asyncio.to_thread(
+                        self._record,
+                        scope,
+                        arrived,
+                        None if oversized else b"".join(chunks),
+                    )
+            return message
+
+        if scope["method"] == "GET":
+            await asyncio.to_thread(self._record, scope, arrived, b"")
+            return await self.app(scope, receive, send)
+        return await self.app(scope, recording_receive, send)
+
+    def _record(self, scope, arrived: float, body: bytes | None) -> None:
+        entry = {
+            "t": arrived,
+            "method": scope["method"],
+            "path": scope["path"],
+            "params": dict(parse_qsl(scope.get("query_string", b"").decode())),
+        }
+        if body is None:
+            logger.warning(
+                "Not recording the body of a %s request over %d bytes",
+                scope["path"],
+                self.max_body_bytes,
+            )
+            return
+        if body:
+            try:
+                entry["body"] = json.loads(body)
+            except ValueError:
+                # Non-JSON bodies (e.g. compressed uploads) are not replayable
+                return
+        try:
+            self._write(entry)
+        except OSError:
+            logger.exception("Could not record request to %s", scope["path"])
+
+    def close(self) -> None:
+        """Close the log file."""
+        with self._lock:
+            self._file.close()
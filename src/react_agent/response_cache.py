@@ -0,0 +1,257 @@
+"""On-disk cache of LLM responses for report generation and LTM retrieval.
+
+Entries are grouped by scope ("report", "retrieve") and expire after a TTL;
+the least recently used entries are evicted past `max_entries`. Entries may
+carry an embedding of their input so near-identical queries can be served
+when their cosine similarity clears a threshold.
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict
+
+import numpy as np
+
+
+def content_hash(value: Any) -> str:
+    """Return a stable sha256 of a string or JSON-serialisable value."""
+    if not isinstance(value, str):
+        value = json.dumps(value, sort_keys=True, default=str)
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+def normalize_records(data) -> Any:
+    """Normalise a data payload for hashing.
+
+    Re-sent batches that differ only in whitespace hash to the same key.
+    """
+    if isinstance(data, list):
+        return [normalize_records(item) for item in data]
+    if isinstance(data, dict):
+        return {key: normalize_records(value) for key, value in data.items()}
+    if isinstance(data, str):
+        return "\n".join(" ".join(line.split()) for line in data.strip().splitlines())
+    return data
+
+
+def normalize_query(query: str) -> str:
+    """Normalise a query's case and whitespace."""
+    return " ".join(query.lower().split())
+
+
+class ResponseCache:
+    """SQLite-backed response cache with TTL expiry, LRU eviction and hit counters.
+
+    Reads never return expired entries; they are deleted in bulk every
+    `expire_every` puts rather than on each write. The row count is kept in
+    memory. The `a`-prefixed methods run the SQLite work in a thread, for
+    callers on an event loop.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float = 86_400,
+        max_entries: int = 10_000,
+        max_near_candidates: int = 2_000,
+        expire_every: int = 100,
+    ):
+        """Open the cache database at `path`."""
+        self.path = path
+        self.ttl = ttl
+        self.expire_every = max(1, expire_every)
+        self._puts = 0
+        self.max_entries = max_entries
+        self.max_near_candidates = max_near_candidates
+        self.hits: Dict[str, int] = {}
+        self.near_hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "scope TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, embedding BLOB, "
+            "created_at REAL NOT NULL, last_used REAL NOT NULL, PRIMARY KEY (scope, key))"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_created_at ON responses (created_at)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL)"
+        )
+        self._conn.commit()
+        (self._entries,) = self._conn.execute(
+            "SELECT COUNT(*) FROM responses"
+        ).fetchone()
+
+    def _count(self, counters: Dict[str, int], scope: str) -> None:
+        counters[scope] = counters.get(scope, 0) + 1
+
+    def get(self, scope: str, key: str, count_miss: bool = True) -> Any | None:
+        """Return the cached value for `key`, or None if missing or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE scope = ? AND key = ?",
+                (scope, key),
+            ).fetchone()
+            if row is not None and now - row[1] > self.ttl:
+                self._entries -= self._conn.execute(
+                    "DELETE FROM responses WHERE scope = ? AND key = ?", (scope, key)
+                ).rowcount
+                self._conn.commit()
+                row = None
+            if row is None:
+                if count_miss:
+                    self._count(self.misses, scope)
+                return None
+            self._conn.execute(
+                "UPDATE responses SET last_used = ? WHERE scope = ? AND key = ?",
+                (now, scope, key),
+            )
+            self._conn.commit()
+            self._count(self.hits, scope)
+        return json.loads(row[0])
+
+    def nearest(
+        self, scope: str, embedding: np.ndarray, threshold: float, key_prefix: str = ""
+    ) -> Any | None:
+        """Return the cached value whose input embedding is most similar to `embedding`.
+
+        Nothing is returned unless its cosine similarity is at least `threshold`.
+        """
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, value, embedding FROM responses "
+                "WHERE scope = ? AND substr(key, 1, ?) = ? AND embedding IS NOT NULL AND created_at >= ? "
+                "ORDER BY last_used DESC LIMIT ?",
+                (
+                    scope,
+                    len(key_prefix),
+                    key_prefix,
+                    now - self.ttl,
+                    self.max_near_candidates,
+                ),
+            ).fetchall()
+        if rows:
+            matrix = np.stack([np.frombuffer(row[2], dtype=np.float32) for row in rows])
+            query = np.asarray(embedding, dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(query) or 1.0)
+            similarities = matrix @ query / np.where(norms == 0, 1.0, norms)
+            best = int(np.argmax(similarities))
+            if similarities[best] >= threshold:
+                with self._lock:
+                    self._conn.execute(
+                        "UPDATE responses SET last_used = ? WHERE scope = ? AND key = ?",
+                        (now, scope, rows[best][0]),
+                    )
+                    self._conn.commit()
+                    self._count(self.near_hits, scope)
+                return json.loads(rows[best][1])
+        with self._lock:
+            self._count(self.misses, scope)
+        return None
+
+    def put(
+        self, scope: str, key: str, value: Any, embedding: np.ndarray | None = None
+    ) -> None:
+        """Cache `value`, with the embedding of its input if given."""
+        now = time.time()
+        blob = (
+            None
+            if embedding is None
+            else np.asarray(embedding, dtype=np.float32).tobytes()
+        )
+        with self._lock:
+            value = json.dumps(value, default=str)
+            updated = self._conn.execute(
+                "UPDATE responses SET value = ?, embedding = ?, created_at = ?, last_used = ? WHERE scope = ? AND key = ?",
+                (value, blob, now, now, scope, key),
+            ).rowcount
+            if not updated:
+                self._conn.execute(
+                    "INSERT INTO responses (scope, key, value, embedding, created_at, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                    (scope, key, value, blob, now, now),
+                )
+                self._entries += 1
+            self._puts += 1
+            if self._puts % self.expire_every == 0:
+                self._entries -= self._conn.execute(
+                    "DELETE FROM responses WHERE created_at < ?", (now - self.ttl,)
+                ).rowcount
+            if self._entries > self.max_entries:
+                self._entries -= self._conn.execute(
+                    "DELETE FROM responses WHERE rowid IN "
+                    "(SELECT rowid FROM responses ORDER BY last_used ASC LIMIT ?)",
+                    (self._entries - self.max_entries,),
+                ).rowcount
+            self._conn.commit()
+
+    async def aget(self, scope: str, key: str, count_miss: bool = True) -> Any | None:
+        """Return the cached value for `key` without blocking the event loop."""
+        return await asyncio.to_thread(self.get, scope, key, count_miss)
+
+    async def anearest(
+        self, scope: str, embedding: np.ndarray, threshold: float, key_prefix: str = ""
+    ) -> Any | None:
+        """Return the most similar cached value without blocking the event loop."""
+        return await asyncio.to_thread(
+            self.nearest, scope, embedding, threshold, key_prefix
+        )
+
+    async def aput(
+        self, scope: str, key: str, value: Any, embedding: np.ndarray | None = None
+    ) -> None:
+        """Cache `value` without blocking the event loop."""
+        await asyncio.to_thread(self.put, scope, key, value, embedding)
+
+    async def aversion(self, name: str) -> int:
+        """Return a named version without blocking the event loop."""
+        return await asyncio.to_thread(self.version, name)
+
+    def version(self, name: str) -> int:
+        """Return a named version, 0 if it was never bumped."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version FROM versions WHERE name = ?", (name,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def bump_version(self, name: str) -> int:
+        """Increment a named version (e.g. of the LTM) so keys that include it stop matching."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO versions (name, version) VALUES (?, 1) "
+                "ON CONFLICT(name) DO UPDATE SET version = version + 1",
+                (name,),
+            )
+            self._conn.commit()
+            (version,) = self._conn.execute(
+                "SELECT version FROM versions WHERE name = ?", (name,)
+            ).fetchone()
+        return version
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the hit, near hit and miss counts per scope and the entry count."""
+        entries = self._entries
+        scopes = set(self.hits) | set(self.near_hits) | set(self.misses)
+        by_scope = {}
+        for scope in sorted(scopes):
+            hits = self.hits.get(scope, 0) + self.near_hits.get(scope, 0)
+            lookups = hits + self.misses.get(scope, 0)
+            by_scope[scope] = {
+                "hits": self.hits.get(scope, 0),
+                "near_hits": self.near_hits.get(scope, 0),
+                "misses": self.misses.get(scope, 0),
+                "hit_ratio": hits / lookups if lookups else 0.0,
+            }
+        return {"entries": entries, "scopes": by_scope}
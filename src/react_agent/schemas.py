@@ -1,9 +1,13 @@
-from pydantic import BaseModel, Field
+"""Request and response models of the API and structured model outputs."""
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List
 
-class Episode(BaseModel):  
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class Episode(BaseModel):
     """Write the episode from the perspective of the agent within it. Use the benefit of hindsight to record the memory, saving the agent's key internal thought process so it can learn over time."""
+
     observation: str = Field(..., description="The context and setup - what happened")
     thoughts: str = Field(
         ...,
@@ -19,14 +23,109 @@ class Episode(BaseModel):
         description="Outcome and retrospective. What did you do well? What could you do better next time? I ...",
     )
 
+
+class STMDatedNote(BaseModel):
+    """New facts, events or observations from the report for one day."""
+
+    date: str = Field(..., description="The day the points belong to, as YYYY-MM-DD")
+    points: List[str] = Field(
+        ...,
+        description="Short, self-contained points that are not already in the short term memory",
+    )
+
+
+class STMSectionUpdate(BaseModel):
+    """Changes to one general knowledge section."""
+
+    section: str = Field(
+        ..., description="Section title; reuse an existing title when the points fit it"
+    )
+    add: List[str] = Field(
+        default_factory=list,
+        description="Persistent patterns or insights to add to the section",
+    )
+    remove: List[str] = Field(
+        default_factory=list,
+        description="Existing points the report shows no longer hold, copied exactly",
+    )
+
+
+class STMDelta(BaseModel):
+    """Changes to the short term memory for one approved report. Leave out anything already recorded."""
+
+    dated: List[STMDatedNote] = Field(default_factory=list)
+    general: List[STMSectionUpdate] = Field(default_factory=list)
+
+
+class STMSummary(BaseModel):
+    """Condensed short term memory points."""
+
+    points: List[str] = Field(..., description="The summarised points")
+
+
 class GraphInvocationRequest(BaseModel):
+    """An initial /invoke request with data, or a resume with approve or feedback."""
+
     data: Any | None = None
     namespace: str
     feedback: str | None = None
     approve: str | None = None
 
 
+class IngestRequest(BaseModel):
+    """Records to buffer for a namespace."""
+
+    namespace: str
+    data: List[Dict[str, Any]]
+
+
+class BatchJob(BaseModel):
+    """One namespace and its data in a batch."""
+
+    namespace: str
+    data: Any
+
+
+class BatchInvocationRequest(BaseModel):
+    """Jobs to run concurrently through the graph."""
+
+    jobs: List[BatchJob]
+    max_concurrency: int | None = Field(None, ge=1)
+
+
+class BatchJobResult(BaseModel):
+    """The outcome of one batch job."""
+
+    namespace: str
+    status: str
+    human_interrupt: Dict[str, Any] | None = None
+    error: str | None = None
+    attempts: int
+    elapsed: float
+    merged_jobs: int = 1
+
+
+class BatchResponse(BaseModel):
+    """The results of a batch, with counts per status."""
+
+    results: List[BatchJobResult]
+    counts: Dict[str, int]
+    elapsed: float
+
+
+class LogRecord(BaseModel):
+    """A single record of a streamed NDJSON upload."""
+
+    model_config = ConfigDict(extra="allow")
+
+    content: str
+    date: str | None = None
+    namespace: str | None = None
+
+
 class GraphResponse(BaseModel):
-    status: str    
+    """The status of a graph run and its result or pending interrupt."""
+
+    status: str
     result: Dict[str, Any] = None
     human_interrupt: Dict[str, Any] = None
@@ -0,0 +1,693 @@
+"""SQLite-backed LightRAG KV, doc status and graph storages.
+
+LightRAG's JSON and GraphML storages rewrite whole files after every insert and
+parse them completely on startup. These storages write only the rows an insert
+touches (SQLite in WAL mode) and read rows on demand, so insert cost tracks the
+new document and startup does not load the knowledge base.
+
+On first use, each storage imports the JSON/GraphML file it replaces, if any,
+in one transaction with a completion marker, so an interrupted import is redone.
+Select them with LTM_KV_STORAGE, LTM_DOC_STATUS_STORAGE and LTM_GRAPH_STORAGE.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Set, Tuple, final
+
+import networkx as nx
+from lightrag.base import (
+    BaseGraphStorage,
+    BaseKVStorage,
+    DocProcessingStatus,
+    DocStatus,
+    DocStatusStorage,
+)
+from lightrag.kg import STORAGE_ENV_REQUIREMENTS, STORAGE_IMPLEMENTATIONS, STORAGES
+from lightrag.namespace import NameSpace, is_namespace
+from lightrag.types import KnowledgeGraph
+from lightrag.utils import load_json, logger
+from typing_extensions import override
+
+SQLITE_STORAGES = {
+    "KV_STORAGE": "SQLiteKVStorage",
+    "DOC_STATUS_STORAGE": "SQLiteDocStatusStorage",
+    "GRAPH_STORAGE": "SQLiteGraphStorage",
+}
+
+
+def register_sqlite_storages() -> None:
+    """Make the storages in this module selectable by name in LightRAG."""
+    for storage_type, name in SQLITE_STORAGES.items():
+        STORAGES[name] = __name__
+        STORAGE_ENV_REQUIREMENTS.setdefault(name, [])
+        implementations = STORAGE_IMPLEMENTATIONS[storage_type]["implementations"]
+        if name not in implementations:
+            implementations.append(name)
+
+
+class _SQLiteStore:
+    """One WAL-mode SQLite file per storage.
+
+    The file is shared by the serving loop and the sync LightRAG API in worker
+    threads.
+    """
+
+    def _open(self, path: str, schema: List[str]) -> bool:
+        """Open the database, returning True if the file it replaces has not been imported yet."""
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # Tables and the pending-import marker are created together
+        self._conn.execute("BEGIN")
+        for statement in [
+            *schema,
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+        ]:
+            self._conn.execute(statement)
+        self._conn.execute(
+            "INSERT OR IGNORE INTO meta (key, value) VALUES ('imported', '0')"
+        )
+        self._conn.commit()
+        row = self._conn.execute(
+            "SELECT value FROM meta WHERE key = 'imported'"
+        ).fetchone()
+        return row[0] == "0"
+
+    def _import(self, path: str, load: Callable[[], None]) -> None:
+        """Run `load` if `path` exists and mark the import done, all in one transaction."""
+        # A crash part way through leaves neither rows nor the marker, so the
+        # next open starts the import again
+        with self._lock:
+            try:
+                if os.path.exists(path):
+                    load()
+                self._conn.execute("UPDATE meta SET value = '1' WHERE key = 'imported'")
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+
+    def _select_in(
+        self, sql: str, ids: List[Any], params: Tuple = (), batch_size: int = 500
+    ) -> List[tuple]:
+        # Keeps each statement under SQLite's bound-parameter limit
+        rows = []
+        for i in range(0, len(ids), batch_size):
+            batch = list(ids[i : i + batch_size])
+            rows.extend(
+                self._conn.execute(
+                    sql.format(",".join("?" * len(batch))), (*params, *batch)
+                ).fetchall()
+            )
+        return rows
+
+    def _close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                # Fold the WAL back into the database file
+                self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                self._conn.close()
+                self._conn = None
+
+
+@final
+@dataclass
+class SQLiteKVStorage(_SQLiteStore, BaseKVStorage):
+    """Key-value rows.
+
+    The LLM response cache is stored one row per (mode, hash)
+    rather than one value per mode, so caching a response writes one row.
+    """
+
+    def __post_init__(self):
+        """Derive the database and legacy JSON paths."""
+        working_dir = self.global_config["working_dir"]
+        self._db_path = os.path.join(working_dir, f"kv_store_{self.namespace}.sqlite")
+        self._json_path = os.path.join(working_dir, f"kv_store_{self.namespace}.json")
+        self._is_cache = is_namespace(
+            self.namespace, NameSpace.KV_STORE_LLM_RESPONSE_CACHE
+        )
+        self._conn = None
+
+    @override
+    async def initialize(self):
+        if self._conn is not None:
+            return
+        pending = self._open(
+            self._db_path,
+            [
+                "CREATE TABLE IF NOT EXISTS kv (id TEXT PRIMARY KEY, value TEXT NOT NULL)",
+                "CREATE TABLE IF NOT EXISTS cache (mode TEXT NOT NULL, id TEXT NOT NULL, value TEXT NOT NULL, "
+                "PRIMARY KEY (mode, id))",
+            ],
+        )
+        if pending:
+
+            def load():
+                data = load_json(self._json_path) or {}
+                logger.info(
+                    f"Importing {len(data)} records for {self.namespace} from {self._json_path}"
+                )
+                self._insert(data)
+
+            self._import(self._json_path, load)
+
+    def _insert(self, data: Dict[str, Any]) -> None:
+        if self._is_cache:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO cache (mode, id, value) VALUES (?, ?, ?)",
+                [
+                    (mode, key, json.dumps(value))
+                    for mode, entries in data.items()
+                    for key, value in entries.items()
+                ],
+            )
+        else:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO kv (id, value) VALUES (?, ?)",
+                [(key, json.dumps(value)) for key, value in data.items()],
+            )
+
+    def _write(self, data: Dict[str, Any]) -> None:
+        with self._lock:
+            self._insert(data)
+            self._conn.commit()
+
+    def _mode(self, mode: str) -> Dict[str, Any] | None:
+        rows = self._conn.execute(
+            "SELECT id, value FROM cache WHERE mode = ?", (mode,)
+        ).fetchall()
+        return {key: json.loads(value) for key, value in rows} or None
+
+    @override
+    async def get_by_id(self, id: str) -> Dict[str, Any] | None:
+        with self._lock:
+            if self._is_cache:
+                return self._mode(id)
+            row = self._conn.execute(
+                "SELECT value FROM kv WHERE id = ?", (id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    async def get_by_mode_and_id(self, mode: str, id: str) -> Dict[str, Any] | None:
+        """Return `{id: entry}` for one cached response; LightRAG uses this when available."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM cache WHERE mode = ? AND id = ?", (mode, id)
+            ).fetchone()
+        return {id: json.loads(row[0])} if row else None
+
+    @override
+    async def get_by_ids(self, ids: List[str]) -> List[Dict[str, Any] | None]:
+        with self._lock:
+            if self._is_cache:
+                return [self._mode(mode) for mode in ids]
+            stored = dict(
+                self._select_in("SELECT id, value FROM kv WHERE id IN ({})", ids)
+            )
+        return [json.loads(stored[key]) if key in stored else None for key in ids]
+
+    async def get_all(self) -> Dict[str, Any]:
+        """Return every record."""
+        with self._lock:
+            if self._is_cache:
+                data: Dict[str, Any] = {}
+                for mode, key, value in self._conn.execute(
+                    "SELECT mode, id, value FROM cache"
+                ):
+                    data.setdefault(mode, {})[key] = json.loads(value)
+                return data
+            return {
+                key: json.loads(value)
+                for key, value in self._conn.execute("SELECT id, value FROM kv")
+            }
+
+    @override
+    async def filter_keys(self, keys: Set[str]) -> Set[str]:
+        table, column = ("cache", "mode") if self._is_cache else ("kv", "id")
+        with self._lock:
+            existing = {
+                row[0]
+                for row in self._select_in(
+                    f"SELECT {column} FROM {table} WHERE {column} IN ({{}})", list(keys)
+                )
+            }
+        return set(keys) - existing
+
+    @override
+    async def upsert(self, data: Dict[str, Dict[str, Any]]) -> None:
+        if not data:
+            return
+        logger.info(f"Inserting {len(data)} records to {self.namespace}")
+        self._write(data)
+
+    async def delete(self, ids: List[str]) -> None:
+        """Delete records by id."""
+        table, column = ("cache", "mode") if self._is_cache else ("kv", "id")
+        with self._lock:
+            self._conn.executemany(
+                f"DELETE FROM {table} WHERE {column} = ?", [(key,) for key in ids]
+            )
+            self._conn.commit()
+
+    async def drop(self) -> None:
+        """Delete every record."""
+        with self._lock:
+            self._conn.execute("DELETE FROM kv")
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+
+    @override
+    async def index_done_callback(self) -> None:
+        # Every write is committed as it happens
+        pass
+
+    @override
+    async def finalize(self):
+        self._close()
+
+
+@final
+@dataclass
+class SQLiteDocStatusStorage(_SQLiteStore, DocStatusStorage):
+    """Document processing status rows, with the status in its own indexed column."""
+
+    def __post_init__(self):
+        """Derive the database and legacy JSON paths."""
+        working_dir = self.global_config["working_dir"]
+        self._db_path = os.path.join(working_dir, f"kv_store_{self.namespace}.sqlite")
+        self._json_path = os.path.join(working_dir, f"kv_store_{self.namespace}.json")
+        self._conn = None
+
+    @override
+    async def initialize(self):
+        if self._conn is not None:
+            return
+        pending = self._open(
+            self._db_path,
+            [
+                "CREATE TABLE IF NOT EXISTS docs (id TEXT PRIMARY KEY, status TEXT NOT NULL, value TEXT NOT NULL)",
+                "CREATE INDEX IF NOT EXISTS docs_status ON docs (status)",
+            ],
+        )
+        if pending:
+
+            def load():
+                data = load_json(self._json_path) or {}
+                logger.info(
+                    f"Importing {len(data)} records for {self.namespace} from {self._json_path}"
+                )
+                self._insert(data)
+
+            self._import(self._json_path, load)
+
+    def _insert(self, data: Dict[str, Dict[str, Any]]) -> None:
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO docs (id, status, value) VALUES (?, ?, ?)",
+            [
+                (key, value["status"], json.dumps(value, default=str))
+                for key, value in data.items()
+            ],
+        )
+
+    @override
+    async def filter_keys(self, keys: Set[str]) -> Set[str]:
+        with self._lock:
+            existing = {
+                row[0]
+                for row in self._select_in(
+                    "SELECT id FROM docs WHERE id IN ({})", list(keys)
+                )
+            }
+        return set(keys) - existing
+
+    @override
+    async def get_by_id(self, id: str) -> Dict[str, Any] | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM docs WHERE id = ?", (id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    @override
+    async def get_by_ids(self, ids: List[str]) -> List[Dict[str, Any]]:
+        with self._lock:
+            stored = dict(
+                self._select_in("SELECT id, value FROM docs WHERE id IN ({})", ids)
+            )
+        return [json.loads(stored[key]) for key in ids if key in stored]
+
+    @override
+    async def get_status_counts(self) -> Dict[str, int]:
+        counts = {status.value: 0 for status in DocStatus}
+        with self._lock:
+            for status, count in self._conn.execute(
+                "SELECT status, COUNT(*) FROM docs GROUP BY status"
+            ):
+                counts[status] = count
+        return counts
+
+    @override
+    async def get_docs_by_status(
+        self, status: DocStatus
+    ) -> Dict[str, DocProcessingStatus]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, value FROM docs WHERE status = ?", (status.value,)
+            ).fetchall()
+        result = {}
+        for key, value in rows:
+            data = json.loads(value)
+            # Same defaults as JsonDocStatusStorage
+            if "content" not in data and "content_summary" in data:
+                data["content"] = data["content_summary"]
+            data.setdefault("file_path", "no-file-path")
+            try:
+                result[key] = DocProcessingStatus(**data)
+            except (KeyError, TypeError) as e:
+                logger.error(f"Missing required field for document {key}: {e}")
+        return result
+
+    @override
+    async def upsert(self, data: Dict[str, Dict[str, Any]]) -> None:
+        if not data:
+            return
+        logger.info(f"Inserting {len(data)} records to {self.namespace}")
+        with self._lock:
+            self._insert(data)
+            self._conn.commit()
+
+    async def delete(self, doc_ids: List[str]) -> None:
+        """Delete document statuses by id."""
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM docs WHERE id = ?", [(key,) for key in doc_ids]
+            )
+            self._conn.commit()
+
+    async def drop(self) -> None:
+        """Delete every document status."""
+        with self._lock:
+            self._conn.execute("DELETE FROM docs")
+            self._conn.commit()
+
+    @override
+    async def index_done_callback(self) -> None:
+        pass
+
+    @override
+    async def finalize(self):
+        self._close()
+
+
+class _SubgraphView:
+    # Lets NetworkXStorage.get_knowledge_graph run over a subgraph loaded from SQLite
+    def __init__(self, graph: nx.Graph):
+        self._graph = graph
+
+    async def _get_graph(self) -> nx.Graph:
+        return self._graph
+
+
+@final
+@dataclass
+class SQLiteGraphStorage(_SQLiteStore, BaseGraphStorage):
+    """Undirected property graph stored as node and edge rows.
+
+    Edges are stored once with their endpoints in sorted order. Upserts merge
+    properties into existing rows, like `networkx.Graph.add_node/add_edge`.
+    """
+
+    def __post_init__(self):
+        """Derive the database and legacy GraphML paths."""
+        working_dir = self.global_config["working_dir"]
+        self._db_path = os.path.join(working_dir, f"graph_{self.namespace}.sqlite")
+        self._graphml_path = os.path.join(
+            working_dir, f"graph_{self.namespace}.graphml"
+        )
+        self._conn = None
+
+    @override
+    async def initialize(self):
+        if self._conn is not None:
+            return
+        pending = self._open(
+            self._db_path,
+            [
+                "CREATE TABLE IF NOT EXISTS nodes (id TEXT PRIMARY KEY, data TEXT NOT NULL)",
+                "CREATE TABLE IF NOT EXISTS edges (src TEXT NOT NULL, tgt TEXT NOT NULL, data TEXT NOT NULL, "
+                "PRIMARY KEY (src, tgt))",
+                "CREATE INDEX IF NOT EXISTS edges_tgt ON edges (tgt)",
+            ],
+        )
+        if pending:
+
+            def load():
+                graph = nx.read_graphml(self._graphml_path)
+                logger.info(
+                    f"Importing graph {self.namespace} with {graph.number_of_nodes()} nodes, "
+                    f"{graph.number_of_edges()} edges from {self._graphml_path}"
+                )
+                for node_id, data in graph.nodes(data=True):
+                    self._merge_node(node_id, data)
+                for src, tgt, data in graph.edges(data=True):
+                    self._merge_edge(src, tgt, data)
+
+            self._import(self._graphml_path, load)
+
+    @staticmethod
+    def _key(source: str, target: str) -> Tuple[str, str]:
+        return (source, target) if source <= target else (target, source)
+
+    def _degree(self, node_id: str) -> int:
+        (degree,) = self._conn.execute(
+            "SELECT (SELECT COUNT(*) FROM edges WHERE src = ?1) + (SELECT COUNT(*) FROM edges WHERE tgt = ?1 AND src != ?1)",
+            (node_id,),
+        ).fetchone()
+        return degree
+
+    def _neighbors(self, node_id: str) -> List[str]:
+        return [
+            row[0]
+            for row in self._conn.execute(
+                "SELECT tgt FROM edges WHERE src = ?1 UNION SELECT src FROM edges WHERE tgt = ?1",
+                (node_id,),
+            )
+        ]
+
+    @override
+    async def has_node(self, node_id: str) -> bool:
+        with self._lock:
+            return (
+                self._conn.execute(
+                    "SELECT 1 FROM nodes WHERE id = ?", (node_id,)
+                ).fetchone()
+                is not None
+            )
+
+    @override
+    async def has_edge(self, source_node_id: str, target_node_id: str) -> bool:
+        with self._lock:
+            return (
+                self._conn.execute(
+                    "SELECT 1 FROM edges WHERE src = ? AND tgt = ?",
+                    self._key(source_node_id, target_node_id),
+                ).fetchone()
+                is not None
+            )
+
+    @override
+    async def node_degree(self, node_id: str) -> int:
+        with self._lock:
+            return self._degree(node_id)
+
+    @override
+    async def edge_degree(self, src_id: str, tgt_id: str) -> int:
+        with self._lock:
+            return self._degree(src_id) + self._degree(tgt_id)
+
+    @override
+    async def get_node(self, node_id: str) -> Dict[str, str] | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM nodes WHERE id = ?", (node_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    @override
+    async def get_edge(
+        self, source_node_id: str, target_node_id: str
+    ) -> Dict[str, str] | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM edges WHERE src = ? AND tgt = ?",
+                self._key(source_node_id, target_node_id),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    @override
+    async def get_node_edges(self, source_node_id: str) -> List[Tuple[str, str]] | None:
+        with self._lock:
+            if (
+                self._conn.execute(
+                    "SELECT 1 FROM nodes WHERE id = ?", (source_node_id,)
+                ).fetchone()
+                is None
+            ):
+                return None
+            return [
+                (source_node_id, neighbor)
+                for neighbor in self._neighbors(source_node_id)
+            ]
+
+    def _merge_node(self, node_id: str, node_data: Dict[str, str]) -> None:
+        self._conn.execute(
+            "INSERT INTO nodes (id, data) VALUES (?, ?) "
+            "ON CONFLICT (id) DO UPDATE SET data = json_patch(nodes.data, excluded.data)",
+            (node_id, json.dumps(node_data, default=str)),
+        )
+
+    def _merge_edge(
+        self, source_node_id: str, target_node_id: str, edge_data: Dict[str, str]
+    ) -> None:
+        # Like networkx, adding an edge creates missing endpoints
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO nodes (id, data) VALUES (?, '{}')",
+            [(source_node_id,), (target_node_id,)],
+        )
+        self._conn.execute(
+            "INSERT INTO edges (src, tgt, data) VALUES (?, ?, ?) "
+            "ON CONFLICT (src, tgt) DO UPDATE SET data = json_patch(edges.data, excluded.data)",
+            (
+                *self._key(source_node_id, target_node_id),
+                json.dumps(edge_data, default=str),
+            ),
+        )
+
+    @override
+    async def upsert_node(self, node_id: str, node_data: Dict[str, str]) -> None:
+        with self._lock:
+            self._merge_node(node_id, node_data)
+            self._conn.commit()
+
+    @override
+    async def upsert_edge(
+        self, source_node_id: str, target_node_id: str, edge_data: Dict[str, str]
+    ) -> None:
+        with self._lock:
+            self._merge_edge(source_node_id, target_node_id, edge_data)
+            self._conn.commit()
+
+    @override
+    async def delete_node(self, node_id: str) -> None:
+        await self.remove_nodes([node_id])
+
+    async def remove_nodes(self, nodes: List[str]):
+        """Delete nodes and their edges."""
+        with self._lock:
+            for node_id in nodes:
+                self._conn.execute(
+                    "DELETE FROM edges WHERE src = ?1 OR tgt = ?1", (node_id,)
+                )
+                self._conn.execute("DELETE FROM nodes WHERE id = ?", (node_id,))
+            self._conn.commit()
+
+    async def remove_edges(self, edges: List[Tuple[str, str]]):
+        """Delete edges by their endpoints."""
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM edges WHERE src = ? AND tgt = ?",
+                [self._key(*edge) for edge in edges],
+            )
+            self._conn.commit()
+
+    @override
+    async def embed_nodes(self, algorithm: str):
+        raise ValueError(f"Node embedding algorithm {algorithm} not supported")
+
+    @override
+    async def get_all_labels(self) -> List[str]:
+        with self._lock:
+            return [
+                row[0] for row in self._conn.execute("SELECT id FROM nodes ORDER BY id")
+            ]
+
+    def _load_subgraph(self, node_ids: Set[str] | None) -> nx.Graph:
+        graph = nx.Graph()
+        if node_ids is None:
+            nodes = self._conn.execute("SELECT id, data FROM nodes").fetchall()
+            edges = self._conn.execute("SELECT src, tgt, data FROM edges").fetchall()
+        else:
+            ids = list(node_ids)
+            nodes = self._select_in("SELECT id, data FROM nodes WHERE id IN ({})", ids)
+            edges = [
+                row
+                for row in self._select_in(
+                    "SELECT src, tgt, data FROM edges WHERE src IN ({})", ids
+                )
+                if row[1] in node_ids
+            ]
+        graph.add_nodes_from((node_id, json.loads(data)) for node_id, data in nodes)
+        graph.add_edges_from((src, tgt, json.loads(data)) for src, tgt, data in edges)
+        return graph
+
+    async def get_knowledge_graph(
+        self,
+        node_label: str,
+        max_depth: int = 3,
+        min_degree: int = 0,
+        inclusive: bool = False,
+    ) -> KnowledgeGraph:
+        """Return the same result as NetworkXStorage.get_knowledge_graph.
+
+        Only the nodes within `max_depth` hops of the matching nodes are loaded.
+        """
+        from lightrag.kg.networkx_impl import NetworkXStorage
+
+        with self._lock:
+            if node_label == "*":
+                graph = self._load_subgraph(None)
+            else:
+                if inclusive:
+                    start = {
+                        row[0]
+                        for row in self._conn.execute(
+                            "SELECT id FROM nodes WHERE instr(id, ?) > 0", (node_label,)
+                        )
+                    }
+                else:
+                    start = {
+                        row[0]
+                        for row in self._conn.execute(
+                            "SELECT id FROM nodes WHERE id = ?", (node_label,)
+                        )
+                    }
+                seen, frontier = set(start), set(start)
+                for _ in range(max_depth):
+                    frontier = {
+                        neighbor
+                        for node_id in frontier
+                        for neighbor in self._neighbors(node_id)
+                    } - seen
+                    seen |= frontier
+                graph = self._load_subgraph(seen)
+        return await NetworkXStorage.get_knowledge_graph(
+            _SubgraphView(graph),
+            node_label,
+            max_depth=max_depth,
+            min_degree=min_degree,
+            inclusive=inclusive,
+        )
+
+    @override
+    async def index_done_callback(self) -> bool:
+        # Every write is committed as it happens
+        return True
+
+    @override
+    async def finalize(self):
+        self._close()
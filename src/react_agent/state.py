@@ -2,16 +2,19 @@
 
 from __future__ import annotations
 
-from typing import TypedDict, Dict, List, Any
+from typing import Any, Dict, List, TypedDict
 
 from langchain_core.messages import AnyMessage
 from langgraph.graph import add_messages
 from typing_extensions import Annotated
 
+
 class State(TypedDict):
+    """State of a report run on a namespace's graph thread."""
+
     messages: Annotated[list[AnyMessage], add_messages]
     data: List[Dict[str, Any]]
     namespace: str
     report: str
     feedback: str
-
+    token_usage: Dict[str, Any]
@@ -0,0 +1,498 @@
+"""Structured short-term memory (STM): dated entries and general knowledge sections.
+
+A namespace's STM is a set of rows in the store under ("stm_entries", namespace):
+
+- dated rows, one per day, week, month, quarter or year, keyed "<level>:<start date>"
+- general knowledge rows, one per section, keyed "general:<section>"
+
+An approved report is merged as a delta (`apply_delta`) that only touches the
+rows it names. `compact` rolls dated rows that have fallen out of their window
+into the next coarser period (day → week → month → quarter → year) and drops
+the oldest years, so the STM, and the cost of updating it, stays bounded however
+long a namespace runs. The rendered markdown is kept under ("stm",) for the
+report prompt and the API.
+"""
+
+import calendar
+import re
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterable, List, NamedTuple, Tuple
+
+from react_agent.schemas import STMDelta
+
+ROWS_NAMESPACE = "stm_entries"
+SNAPSHOT_NAMESPACE = "stm"
+LEVELS = ("day", "week", "month", "quarter", "year")
+MAX_ROWS = 10_000
+NOTES_SECTION = "Notes"
+
+# A change set maps row keys to their new value, or None to delete the row
+Changes = Dict[str, dict | None]
+Summarize = Callable[[str, List[str]], List[str]]
+
+
+@dataclass
+class STMWindows:
+    """Days after the end of its period before a dated row rolls up into the next level.
+
+    Year rows older than `retention` days are dropped.
+    """
+
+    day: int = 7
+    week: int = 35
+    month: int = 365
+    quarter: int = 1095
+    retention: int = 1825
+
+    def window(self, level: str) -> int:
+        """Return the window of a level in days."""
+        return self.retention if level == "year" else getattr(self, level)
+
+
+def period_start(day: date, level: str) -> date:
+    """Return the first day of the `level` period containing `day`."""
+    if level == "day":
+        return day
+    if level == "week":
+        return day - timedelta(days=day.weekday())
+    if level == "month":
+        return day.replace(day=1)
+    if level == "quarter":
+        return day.replace(month=3 * ((day.month - 1) // 3) + 1, day=1)
+    return day.replace(month=1, day=1)
+
+
+def period_end(start: date, level: str) -> date:
+    """Return the last day of the `level` period starting on `start`."""
+    if level == "day":
+        return start
+    if level == "week":
+        return start + timedelta(days=6)
+    if level == "month":
+        return start.replace(day=calendar.monthrange(start.year, start.month)[1])
+    if level == "quarter":
+        month = start.month + 2
+        return start.replace(month=month, day=calendar.monthrange(start.year, month)[1])
+    return start.replace(month=12, day=31)
+
+
+def period_label(start: date, level: str) -> str:
+    """Return the heading label of a period."""
+    if level == "day":
+        return start.isoformat()
+    if level == "week":
+        return f"Week of {start.isoformat()}"
+    if level == "month":
+        return f"{calendar.month_name[start.month]} {start.year}"
+    if level == "quarter":
+        return f"Q{(start.month - 1) // 3 + 1} {start.year}"
+    return str(start.year)
+
+
+def dated_key(level: str, start: date) -> str:
+    """Return the row key of a dated period."""
+    return f"{level}:{start.isoformat()}"
+
+
+def section_key(section: str) -> str:
+    """Return the row key of a general section."""
+    return "general:" + " ".join(section.split()).casefold()
+
+
+def parse_date(value: str) -> date | None:
+    """Return the first YYYY-MM-DD date in `value`, or None."""
+    match = re.search(r"\d{4}-\d{2}-\d{2}", value or "")
+    if not match:
+        return None
+    try:
+        return date.fromisoformat(match.group())
+    except ValueError:
+        return None
+
+
+def dated_row(level: str, start: date, points: List[str]) -> dict:
+    """Build a dated row."""
+    return {
+        "kind": "dated",
+        "level": level,
+        "start": start.isoformat(),
+        "points": points,
+    }
+
+
+def section_row(section: str, points: List[str]) -> dict:
+    """Build a general section row."""
+    return {"kind": "general", "section": " ".join(section.split()), "points": points}
+
+
+def _normalize(point: str) -> str:
+    return " ".join(point.split()).casefold().rstrip(".")
+
+
+def merge_points(
+    existing: Iterable[str], add: Iterable[str] = (), remove: Iterable[str] = ()
+) -> List[str]:
+    """Return the existing points minus `remove`, then the new points in `add`.
+
+    Duplicates (ignoring case, spacing and a trailing full stop) are kept once.
+    """
+    removed = {_normalize(point) for point in remove}
+    merged, seen = [], set()
+    for point in [*existing, *add]:
+        key = _normalize(point)
+        if key and key not in seen and key not in removed:
+            seen.add(key)
+            merged.append(point.strip())
+    return merged
+
+
+def apply_changes(rows: Dict[str, dict], changes: Changes) -> None:
+    """Apply row changes in place; a None value deletes the row."""
+    for key, value in changes.items():
+        if value is None:
+            rows.pop(key, None)
+        else:
+            rows[key] = value
+
+
+def apply_delta(rows: Dict[str, dict], delta: STMDelta, fallback_day: date) -> Changes:
+    """Return the row changes for a delta.
+
+    Notes for a day that has already been
+    rolled up are merged into the row covering it; notes with no usable date
+    go under `fallback_day`.
+    """
+    changes: Changes = {}
+
+    def current(key):
+        return changes[key] if key in changes else rows.get(key)
+
+    for note in delta.dated:
+        day = parse_date(note.date) or fallback_day
+        key, level = dated_key("day", day), "day"
+        for candidate in LEVELS:
+            if current(dated_key(candidate, period_start(day, candidate))) is not None:
+                key, level = (
+                    dated_key(candidate, period_start(day, candidate)),
+                    candidate,
+                )
+                break
+        existing = current(key)
+        points = merge_points(existing["points"] if existing else [], note.points)
+        if points:
+            changes[key] = dated_row(level, period_start(day, level), points)
+
+    for update in delta.general:
+        if not update.section.strip():
+            continue
+        key = section_key(update.section)
+        existing = current(key)
+        points = merge_points(
+            existing["points"] if existing else [], update.add, update.remove
+        )
+        if points:
+            changes[key] = section_row(
+                existing["section"] if existing else update.section, points
+            )
+        elif existing is not None:
+            changes[key] = None
+    return changes
+
+
+class Rollup(NamedTuple):
+    """Dated rows to merge into the row of a coarser period."""
+
+    key: str
+    level: str
+    start: date
+    sources: List[str]
+
+
+def _dated_rows(rows: Dict[str, dict]) -> List[Tuple[str, dict, date]]:
+    return [
+        (key, row, date.fromisoformat(row["start"]))
+        for key, row in rows.items()
+        if row.get("kind") == "dated"
+    ]
+
+
+def reference_day(rows: Dict[str, dict]) -> date | None:
+    """Return the newest day the STM has data for.
+
+    Windows are measured from it rather than the wall clock so back-filled or
+    replayed data ages the same way.
+    """
+    ends = [period_end(start, row["level"]) for _, row, start in _dated_rows(rows)]
+    return max(ends) if ends else None
+
+
+def plan_compaction(
+    rows: Dict[str, dict], reference: date, windows: STMWindows
+) -> Tuple[List[Rollup], List[str]]:
+    """Return the roll-ups due at each level and the year rows to drop.
+
+    A roll-up is the out-of-window rows grouped by the coarser period that
+    covers them.
+    """
+    groups: Dict[str, Rollup] = {}
+    drops = []
+    for key, row, start in _dated_rows(rows):
+        level = row["level"]
+        if (reference - period_end(start, level)).days <= windows.window(level):
+            continue
+        if level == "year":
+            drops.append(key)
+            continue
+        target_level = LEVELS[LEVELS.index(level) + 1]
+        target_start = period_start(start, target_level)
+        target = dated_key(target_level, target_start)
+        if target not in groups:
+            sources = [target] if target in rows else []
+            groups[target] = Rollup(target, target_level, target_start, sources)
+        groups[target].sources.append(key)
+    return sorted(
+        groups.values(), key=lambda rollup: (LEVELS.index(rollup.level), rollup.start)
+    ), sorted(drops)
+
+
+def compact(
+    rows: Dict[str, dict], windows: STMWindows, max_points: int, summarize: Summarize
+) -> Changes:
+    """Roll up out-of-window dated rows until none are left.
+
+    Also drops expired years and condenses general sections over `max_points`.
+    `summarize(description,
+    points)` is only called when a row would exceed `max_points`. Applies the
+    changes to `rows` and returns them.
+    """
+    changes: Changes = {}
+    reference = reference_day(rows)
+
+    def condense(description, points):
+        return (
+            summarize(description, points)[:max_points]
+            if len(points) > max_points
+            else points
+        )
+
+    while reference is not None:
+        rollups, drops = plan_compaction(rows, reference, windows)
+        if not rollups and not drops:
+            break
+        step: Changes = {key: None for key in drops}
+        for rollup in rollups:
+            points = merge_points(
+                point for source in rollup.sources for point in rows[source]["points"]
+            )
+            step.update({source: None for source in rollup.sources})
+            step[rollup.key] = dated_row(
+                rollup.level,
+                rollup.start,
+                condense(period_label(rollup.start, rollup.level), points),
+            )
+        apply_changes(rows, step)
+        changes.update(step)
+
+    for key, row in list(rows.items()):
+        if row.get("kind") == "general" and len(row["points"]) > max_points:
+            changes[key] = rows[key] = section_row(
+                row["section"], condense(row["section"], row["points"])
+            )
+    return changes
+
+
+def _bullets(points: List[str]) -> List[str]:
+    return [f"- {point}" for point in points]
+
+
+def render_stm(rows: Dict[str, dict]) -> str:
+    """Render the rows as Markdown for the report prompt and the API.
+
+    Dated rows come newest first, then the general knowledge sections.
+    """
+    if not rows:
+        return ""
+    lines = ["# Short-Term Memory Report", "", "## Dated Data"]
+    dated = sorted(
+        _dated_rows(rows),
+        key=lambda entry: (period_end(entry[2], entry[1]["level"]), entry[2]),
+        reverse=True,
+    )
+    for _, row, start in dated:
+        lines += [
+            "",
+            f"### {period_label(start, row['level'])}",
+            *_bullets(row["points"]),
+        ]
+    lines += ["", "## Undated (General Knowledge)"]
+    general = sorted(
+        (row for row in rows.values() if row.get("kind") == "general"),
+        key=lambda row: row["section"].casefold(),
+    )
+    for row in general:
+        lines += ["", f"### {row['section']}", *_bullets(row["points"])]
+    return "\n".join(lines) + "\n"
+
+
+def delta_context(rows: Dict[str, dict], recent_days: int) -> str:
+    """Render the part of the STM the delta prompt sees.
+
+    That is the general sections and the dated rows ending within `recent_days`
+    of the newest one. Older rows are
+    left out so the prompt does not grow with the namespace's history.
+    """
+    reference = reference_day(rows)
+    recent = {
+        key: row
+        for key, row in rows.items()
+        if row.get("kind") != "dated"
+        or (reference - period_end(date.fromisoformat(row["start"]), row["level"])).days
+        <= recent_days
+    }
+    return render_stm(recent)
+
+
+MONTHS = {
+    name.casefold(): number for number, name in enumerate(calendar.month_name) if name
+}
+
+
+def parse_heading(heading: str) -> Tuple[str, date] | None:
+    """Return the (level, start) of a dated heading written by `render_stm`, or None."""
+    # Also accepts the free-text STM's "(weekly summary)" suffixes and week ranges
+    heading = re.sub(r"\s*\(.*\)$", "", heading.strip())
+    if re.fullmatch(r"\d{4}-\d{2}-\d{2}", heading):
+        return "day", date.fromisoformat(heading)
+    match = re.fullmatch(
+        r"Week of (\d{4}-\d{2}-\d{2})(?: to .*)?", heading, re.IGNORECASE
+    )
+    if match:
+        return "week", period_start(date.fromisoformat(match.group(1)), "week")
+    match = re.fullmatch(r"([A-Za-z]+) (\d{4})", heading)
+    if match and match.group(1).casefold() in MONTHS:
+        return "month", date(int(match.group(2)), MONTHS[match.group(1).casefold()], 1)
+    match = re.fullmatch(r"Q([1-4]) (\d{4})", heading, re.IGNORECASE)
+    if match:
+        return "quarter", date(int(match.group(2)), 3 * int(match.group(1)) - 2, 1)
+    if re.fullmatch(r"\d{4}", heading):
+        return "year", date(int(heading), 1, 1)
+    return None
+
+
+def parse_stm(text: str) -> Dict[str, dict]:
+    """Parse rows from an STM report in the `render_stm` layout.
+
+    This is also the layout the previous free-text STM asked the model for. Lines
+    outside a recognised dated heading or general section are kept in a "Notes" section.
+    """
+    rows: Dict[str, dict] = {}
+    section = "notes"
+    key: str | None = None
+    pending: Dict[str, Tuple[Callable[[List[str]], dict], List[str]]] = {}
+
+    def target(new_key, build):
+        pending.setdefault(new_key, (build, []))
+        return new_key
+
+    for raw in (text or "").splitlines():
+        line = raw.strip()
+        if not line or line.startswith("# ") or line in ("---", "***"):
+            continue
+        if line.startswith("## "):
+            title = line[3:].strip().casefold()
+            section = (
+                "general"
+                if "undated" in title or "general" in title
+                else "dated"
+                if "dated" in title
+                else "notes"
+            )
+            key = None
+            continue
+        if line.startswith("###"):
+            heading = line.lstrip("#").strip()
+            parsed = parse_heading(heading)
+            if parsed is not None:
+                level, start = parsed
+                key = target(
+                    dated_key(level, start),
+                    lambda points, level=level, start=start: dated_row(
+                        level, start, points
+                    ),
+                )
+            elif section == "general":
+                key = target(
+                    section_key(heading),
+                    lambda points, heading=heading: section_row(heading, points),
+                )
+            else:
+                key = None
+            continue
+        point = re.sub(r"^([-*•]|\d+[.)])\s+", "", line).strip()
+        if key is None:
+            name = "General" if section == "general" else NOTES_SECTION
+            key = target(
+                section_key(name), lambda points, name=name: section_row(name, points)
+            )
+        pending[key][1].append(point)
+
+    for row_key, (build, points) in pending.items():
+        points = merge_points(points)
+        if points:
+            rows[row_key] = build(points)
+    return rows
+
+
+def load_rows(store, namespace: str) -> Dict[str, dict]:
+    """Return the stored rows of a namespace by key."""
+    items = store.search((ROWS_NAMESPACE, namespace), limit=MAX_ROWS)
+    return {item.key: item.value for item in items}
+
+
+def save_changes(
+    store, store_cache, namespace: str, rows: Dict[str, dict], changes: Changes
+) -> None:
+    """Write changed rows (not embedded for search) and refresh the rendered snapshot."""
+    for key, value in changes.items():
+        if value is None:
+            store.delete((ROWS_NAMESPACE, namespace), key)
+        else:
+            store.put((ROWS_NAMESPACE, namespace), key, value, index=False)
+    if changes:
+        store_cache.put(
+            store, (SNAPSHOT_NAMESPACE,), namespace, {"report": render_stm(rows)}
+        )
+
+
+def load_or_migrate_rows(store, store_cache, namespace: str) -> Dict[str, dict]:
+    """Return a namespace's rows.
+
+    A namespace that only has a free-text STM from before rows existed is
+    converted on first use.
+    """
+    rows = load_rows(store, namespace)
+    if rows:
+        return rows
+    snapshot = store_cache.get(store, (SNAPSHOT_NAMESPACE,), namespace)
+    if snapshot and snapshot.value.get("report"):
+        rows = parse_stm(snapshot.value["report"])
+        save_changes(store, store_cache, namespace, rows, dict(rows))
+    return rows
+
+
+def replace_rows(store, store_cache, namespace: str, report: str) -> Dict[str, dict]:
+    """Replace a namespace's STM with the rows parsed from a report."""
+    new_rows = parse_stm(report)
+    changes: Changes = {
+        key: None for key in load_rows(store, namespace) if key not in new_rows
+    }
+    changes.update(new_rows)
+    for key, value in changes.items():
+        if value is None:
+            store.delete((ROWS_NAMESPACE, namespace), key)
+        else:
+            store.put((ROWS_NAMESPACE, namespace), key, value, index=False)
+    # The snapshot keeps the report as given, so a manual STM reads back unchanged
+    store_cache.put(store, (SNAPSHOT_NAMESPACE,), namespace, {"report": report})
+    return new_rows
@@ -6,19 +6,19 @@ These tools are intended as free examples to get started. For production use,
 consider implementing more robust and specialized tools tailored to your needs.
 """
 
-from typing import Any, Callable, List, Optional, cast
+from typing import Any, Callable, List, cast
 
 from langchain_community.tools.tavily_search import TavilySearchResults
 from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import InjectedToolArg
-
 from typing_extensions import Annotated
 
 from react_agent.configuration import Configuration
 
+
 async def search(
     query: str, *, config: Annotated[RunnableConfig, InjectedToolArg]
-) -> Optional[list[dict[str, Any]]]:
+) -> list[dict[str, Any]] | None:
     """Search for general web results.
 
     This function performs a search using the Tavily search engine, which is designed
@@ -30,4 +30,5 @@ async def search(
     result = await wrapped.ainvoke({"query": query})
     return cast(list[dict[str, Any]], result)
 
+
 TOOLS: List[Callable[..., Any]] = [search]
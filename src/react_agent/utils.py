@@ -1,17 +1,43 @@
 """Utility & helper functions."""
-import os
+
 import asyncio
-from lightrag import LightRAG, QueryParam
-from lightrag.utils import EmbeddingFunc
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager
+
+import httpx
 import numpy as np
 from dotenv import load_dotenv
-import logging
-from openai import AzureOpenAI
-from langchain_openai.chat_models import AzureChatOpenAI
-from langchain_openai.embeddings import AzureOpenAIEmbeddings
+from langgraph.checkpoint.postgres import PostgresSaver
 from langgraph.store.postgres import PostgresStore
-from psycopg import Connection
-from lightrag.kg.shared_storage import initialize_pipeline_status
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
+
+from react_agent.batch import DeploymentLimiter
+from react_agent.cache import StoreItemCache
+from react_agent.checkpoint import PooledPostgresSaver
+from react_agent.embeddings import CachedEmbedder, CachedEmbeddings, EmbeddingCache
+from react_agent.jobs import JobQueue
+from react_agent.log_parser import summarize_logs
+from react_agent.metrics import (
+    LLMMetricsHandler,
+    Metrics,
+    TimedAsyncPostgresStore,
+    TimedPostgresStore,
+    load_tracer,
+)
+from react_agent.partitions import PartitionLRU
+from react_agent.prompt_builder import PromptBudget, TokenCounter
+from react_agent.response_cache import ResponseCache
+
+# LightRAG and the Azure OpenAI SDKs (over a second of imports between them) are
+# imported where first used, so importing the graph or the API stays fast.
 
 logging.basicConfig(level=logging.INFO)
 
@@ -31,42 +57,310 @@ AZURE_EMBEDDING_DEPLOYMENT = os.getenv("AZURE_EMBEDDING_DEPLOYMENT")
 AZURE_EMBEDDING_API_VERSION = os.getenv("AZURE_EMBEDDING_API_VERSION")
 AZURE_EMBEDDING_ENDPOINT = os.getenv("AZURE_EMBEDDING_ENDPOINT")
 
+# Connection pool settings shared by the LightRAG LLM and embedding clients
+AZURE_OPENAI_MAX_CONNECTIONS = int(os.getenv("AZURE_OPENAI_MAX_CONNECTIONS", "100"))
+AZURE_OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(
+    os.getenv("AZURE_OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20")
+)
+AZURE_OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("AZURE_OPENAI_KEEPALIVE_EXPIRY", "30"))
+AZURE_OPENAI_TIMEOUT = float(os.getenv("AZURE_OPENAI_TIMEOUT", "60"))
+AZURE_OPENAI_CONNECT_TIMEOUT = float(os.getenv("AZURE_OPENAI_CONNECT_TIMEOUT", "10"))
+
+# Retries on 429/5xx honour the Retry-After header; in-flight calls are capped per deployment
+AZURE_OPENAI_MAX_RETRIES = int(os.getenv("AZURE_OPENAI_MAX_RETRIES", "6"))
+AZURE_OPENAI_MAX_CONCURRENCY = int(os.getenv("AZURE_OPENAI_MAX_CONCURRENCY", "16"))
+AZURE_OPENAI_ADVANCED_MAX_CONCURRENCY = int(
+    os.getenv("AZURE_OPENAI_ADVANCED_MAX_CONCURRENCY", "8")
+)
+
+# On-disk embedding cache shared by LightRAG and the Postgres store index
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "./embedding_cache.sqlite")
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "100000"))
+AZURE_EMBEDDING_MAX_BATCH_SIZE = int(
+    os.getenv("AZURE_EMBEDDING_MAX_BATCH_SIZE", "2048")
+)
+
+# Cache for per-namespace instructions / STM items; NOTIFY keeps workers coherent
+STORE_CACHE_TTL = float(os.getenv("STORE_CACHE_TTL", "60"))
+STORE_CACHE_MAX_ENTRIES = int(os.getenv("STORE_CACHE_MAX_ENTRIES", "1024"))
+STORE_CACHE_NOTIFY = os.getenv("STORE_CACHE_NOTIFY", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+# Background post-approval processing (episodic memory, prompt optimisation, STM, LTM)
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", "./jobs.sqlite")
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# Running jobs renew a lease; a job whose lease lapses (its process died) is re-queued.
+# Failed jobs are retried after JOB_RETRY_BACKOFF * 2^(attempt - 1) seconds.
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "300"))
+JOB_RETRY_BACKOFF = float(os.getenv("JOB_RETRY_BACKOFF", "5"))
+JOB_MAX_RETRY_BACKOFF = float(os.getenv("JOB_MAX_RETRY_BACKOFF", "600"))
+# Seconds to wait for running jobs when the API shuts down
+JOB_STOP_TIMEOUT = float(os.getenv("JOB_STOP_TIMEOUT", "30"))
+
+# Postgres connection pools (sync and async each get their own pool of this size)
+POSTGRES_POOL_MIN_SIZE = int(os.getenv("POSTGRES_POOL_MIN_SIZE", "2"))
+POSTGRES_POOL_MAX_SIZE = int(os.getenv("POSTGRES_POOL_MAX_SIZE", "10"))
+POSTGRES_POOL_TIMEOUT = float(os.getenv("POSTGRES_POOL_TIMEOUT", "30"))
+POSTGRES_POOL_MAX_IDLE = float(os.getenv("POSTGRES_POOL_MAX_IDLE", "600"))
+
+# Checkpoint retention: newest checkpoints kept per thread, compacted every N writes
+CHECKPOINT_RETENTION = int(os.getenv("CHECKPOINT_RETENTION", "20"))
+CHECKPOINT_COMPACT_EVERY = int(os.getenv("CHECKPOINT_COMPACT_EVERY", "10"))
+
+# Micro-batching of /ingest records into one graph run per window and namespace
+INGEST_MAX_RECORDS = int(os.getenv("INGEST_MAX_RECORDS", "500"))
+INGEST_MAX_BYTES = int(os.getenv("INGEST_MAX_BYTES", "1000000"))
+INGEST_MAX_WAIT_SECONDS = float(os.getenv("INGEST_MAX_WAIT_SECONDS", "60"))
+INGEST_MAX_BUFFERED_RECORDS = int(os.getenv("INGEST_MAX_BUFFERED_RECORDS", "10000"))
+UPLOAD_MAX_LINE_BYTES = int(os.getenv("UPLOAD_MAX_LINE_BYTES", "1000000"))
+UPLOAD_MAX_DECOMPRESSED_BYTES = int(
+    os.getenv("UPLOAD_MAX_DECOMPRESSED_BYTES", str(1024**3))
+)
+# Failed window flushes are retried with backoff, then written to the dead-letter file (if set)
+INGEST_FLUSH_ATTEMPTS = int(os.getenv("INGEST_FLUSH_ATTEMPTS", "3"))
+INGEST_RETRY_BACKOFF = float(os.getenv("INGEST_RETRY_BACKOFF", "2"))
+INGEST_DEAD_LETTER_PATH = os.getenv(
+    "INGEST_DEAD_LETTER_PATH", "./ingest_dead_letter.ndjson"
+)
+# Windows for a namespace whose report awaits approval are held, re-checked at this interval
+INGEST_APPROVAL_POLL_SECONDS = float(os.getenv("INGEST_APPROVAL_POLL_SECONDS", "5"))
+
+# Token budgets for report prompts; data over budget is reported on in chunks and merged
+PROMPT_TOKEN_ENCODING = os.getenv("PROMPT_TOKEN_ENCODING", "cl100k_base")
+PROMPT_MAX_INPUT_TOKENS = int(os.getenv("PROMPT_MAX_INPUT_TOKENS", "100000"))
+PROMPT_STM_TOKENS = int(os.getenv("PROMPT_STM_TOKENS", "4000"))
+PROMPT_EPISODIC_TOKENS = int(os.getenv("PROMPT_EPISODIC_TOKENS", "2000"))
+# Episode search text is embedded, so it must fit the embedding model's input (8191 tokens)
+EPISODIC_QUERY_MAX_TOKENS = int(os.getenv("EPISODIC_QUERY_MAX_TOKENS", "6000"))
+REPORT_MAP_CONCURRENCY = int(os.getenv("REPORT_MAP_CONCURRENCY", "4"))
+
+# Structured STM: days after a dated entry's period ends before it is rolled up into
+# the next level (day -> week -> month -> quarter -> year), years kept, and the number
+# of points an entry or general section may hold before it is summarised
+STM_DAY_WINDOW_DAYS = int(os.getenv("STM_DAY_WINDOW_DAYS", "7"))
+STM_WEEK_WINDOW_DAYS = int(os.getenv("STM_WEEK_WINDOW_DAYS", "35"))
+STM_MONTH_WINDOW_DAYS = int(os.getenv("STM_MONTH_WINDOW_DAYS", "365"))
+STM_QUARTER_WINDOW_DAYS = int(os.getenv("STM_QUARTER_WINDOW_DAYS", "1095"))
+STM_RETENTION_DAYS = int(os.getenv("STM_RETENTION_DAYS", "1825"))
+STM_MAX_POINTS = int(os.getenv("STM_MAX_POINTS", "10"))
+STM_DELTA_RECENT_DAYS = int(os.getenv("STM_DELTA_RECENT_DAYS", "7"))
+
+# Log pre-aggregation in data_formatter for large batches
+LOG_AGGREGATION_ENABLED = os.getenv("LOG_AGGREGATION_ENABLED", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+LOG_AGGREGATION_MIN_LINES = int(os.getenv("LOG_AGGREGATION_MIN_LINES", "200"))
+LOG_TEMPLATE_SIMILARITY = float(os.getenv("LOG_TEMPLATE_SIMILARITY", "0.5"))
+
+# Cache of generated reports and /retrieve answers; similarity 0 disables near hits
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", "./response_cache.sqlite")
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "86400"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "10000"))
+RETRIEVE_CACHE_SIMILARITY = float(os.getenv("RETRIEVE_CACHE_SIMILARITY", "0"))
+
+# Defaults for /retrieve when the caller does not choose (LightRAG's own defaults)
+RETRIEVE_DEFAULT_MODE = os.getenv("RETRIEVE_DEFAULT_MODE", "global")
+RETRIEVE_DEFAULT_TOP_K = int(os.getenv("RETRIEVE_DEFAULT_TOP_K", "60"))
+
+# Batch report generation across namespaces (/invoke/batch and batch_reports.py)
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "16"))
+BATCH_JOB_RETRIES = int(os.getenv("BATCH_JOB_RETRIES", "3"))
+BATCH_RETRY_BACKOFF = float(os.getenv("BATCH_RETRY_BACKOFF", "2"))
+
+# LightRAG vector storage for the LTM: NanoVectorDBStorage (JSON files),
+# MemmapVectorStorage (on-disk matrix + HNSW) or PooledPGVectorStorage (pgvector on DB_URI)
+LTM_VECTOR_STORAGE = os.getenv("LTM_VECTOR_STORAGE", "NanoVectorDBStorage")
+LTM_VECTOR_INDEX = os.getenv("LTM_VECTOR_INDEX", "hnsw")
+LTM_HNSW_M = int(os.getenv("LTM_HNSW_M", "16"))
+LTM_HNSW_EF_CONSTRUCTION = int(os.getenv("LTM_HNSW_EF_CONSTRUCTION", "200"))
+LTM_HNSW_EF_SEARCH = int(os.getenv("LTM_HNSW_EF_SEARCH", "128"))
+LTM_COMPACT_DEAD_RATIO = float(os.getenv("LTM_COMPACT_DEAD_RATIO", "0.5"))
+LTM_COMPACT_MIN_DEAD_ROWS = int(os.getenv("LTM_COMPACT_MIN_DEAD_ROWS", "1024"))
+
+# LightRAG KV, doc status and graph storages for the LTM: the JSON/GraphML files
+# (rewritten on every insert) or SQLiteKVStorage, SQLiteDocStatusStorage and
+# SQLiteGraphStorage (row-level writes, imports the existing files on first use)
+LTM_KV_STORAGE = os.getenv("LTM_KV_STORAGE", "JsonKVStorage")
+LTM_DOC_STATUS_STORAGE = os.getenv("LTM_DOC_STATUS_STORAGE", "JsonDocStatusStorage")
+LTM_GRAPH_STORAGE = os.getenv("LTM_GRAPH_STORAGE", "NetworkXStorage")
+
+# LTM partitioning: "shared" (one LightRAG store for every namespace) or
+# "namespace" (one store per namespace under WORKING_DIR/partitions). Namespaces
+# listed in LTM_PARTITION_GROUPS ({"namespace": "group"}) share their group's store.
+LTM_PARTITIONING = os.getenv("LTM_PARTITIONING", "shared")
+LTM_PARTITION_GROUPS = json.loads(os.getenv("LTM_PARTITION_GROUPS", "{}"))
+LTM_MAX_OPEN_PARTITIONS = int(os.getenv("LTM_MAX_OPEN_PARTITIONS", "8"))
+
+# Append every API request to this NDJSON file for replay (benchmarks/replay.py); off when unset
+REQUEST_LOG_PATH = os.getenv("REQUEST_LOG_PATH")
+
+# Build LightRAG, the stores, models and checkpointer at API startup (off: on first use)
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "true").lower() in ("1", "true", "yes")
+
+# Metrics (served at /metrics); spans are also emitted when tracing is on and opentelemetry-api is installed
+OTEL_TRACING_ENABLED = os.getenv("OTEL_TRACING_ENABLED", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+# Price per 1K tokens by deployment, e.g. {"gpt-4o": {"prompt": 0.0025, "completion": 0.01}}
+LLM_PRICES = json.loads(os.getenv("LLM_PRICES", "{}"))
+
 WORKING_DIR = "./intellidesign"
 DB_URI = os.getenv("DB_URI")
 EMBEDDINGS_DIMENSION = 1536
 
+
 def get_llm():
+    """Build the Azure chat model."""
+    from langchain_openai.chat_models import AzureChatOpenAI
+
     return AzureChatOpenAI(
         api_key=AZURE_OPENAI_API_KEY,
         azure_endpoint=AZURE_OPENAI_ENDPOINT,
         azure_deployment=AZURE_OPENAI_DEPLOYMENT,
-        api_version=AZURE_OPENAI_API_VERSION
+        api_version=AZURE_OPENAI_API_VERSION,
+        max_retries=AZURE_OPENAI_MAX_RETRIES,
+        callbacks=[
+            LLMMetricsHandler(get_metrics(), AZURE_OPENAI_DEPLOYMENT, LLM_PRICES)
+        ],
     )
 
+
 def get_advanced_llm():
+    """Build the Azure chat model that writes reports."""
+    from langchain_openai.chat_models import AzureChatOpenAI
+
     return AzureChatOpenAI(
         api_key=AZURE_OPENAI_ADVANCED_API_KEY,
         azure_endpoint=AZURE_OPENAI_ADVANCED_ENDPOINT,
         azure_deployment=AZURE_OPENAI_ADVANCED_DEPLOYMENT,
-        api_version=AZURE_OPENAI_ADVANCED_API_VERSION
+        api_version=AZURE_OPENAI_ADVANCED_API_VERSION,
+        max_retries=AZURE_OPENAI_MAX_RETRIES,
+        callbacks=[
+            LLMMetricsHandler(
+                get_metrics(), AZURE_OPENAI_ADVANCED_DEPLOYMENT, LLM_PRICES
+            )
+        ],
     )
 
+
+_embeddings = None
+_embeddings_lock = threading.Lock()
+
+
 def get_embeddings():
-    return AzureOpenAIEmbeddings(
-        api_key=AZURE_OPENAI_API_KEY,
-        azure_endpoint=AZURE_EMBEDDING_ENDPOINT,
-        azure_deployment=AZURE_EMBEDDING_DEPLOYMENT,
-        api_version=AZURE_EMBEDDING_API_VERSION
-    )
+    """Return the process-wide Azure embeddings client, built on first use."""
+    global _embeddings
+    if _embeddings is None:
+        with _embeddings_lock:
+            if _embeddings is None:
+                from langchain_openai.embeddings import AzureOpenAIEmbeddings
+
+                _embeddings = AzureOpenAIEmbeddings(
+                    api_key=AZURE_OPENAI_API_KEY,
+                    azure_endpoint=AZURE_EMBEDDING_ENDPOINT,
+                    azure_deployment=AZURE_EMBEDDING_DEPLOYMENT,
+                    api_version=AZURE_EMBEDDING_API_VERSION,
+                )
+    return _embeddings
+
+
+# Pooled async clients, one set per event loop. httpx connections cannot be
+# shared across loops, and LightRAG's sync API runs its own loop per call.
+_openai_clients = weakref.WeakKeyDictionary()
+
+
+def _get_openai_clients():
+    loop = asyncio.get_running_loop()
+    clients = _openai_clients.get(loop)
+    if clients is None:
+        from openai import AsyncAzureOpenAI
+
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=AZURE_OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=AZURE_OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=AZURE_OPENAI_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(
+                AZURE_OPENAI_TIMEOUT, connect=AZURE_OPENAI_CONNECT_TIMEOUT
+            ),
+        )
+        clients = {
+            "http": http_client,
+            "llm": AsyncAzureOpenAI(
+                api_key=AZURE_OPENAI_API_KEY,
+                api_version=AZURE_OPENAI_API_VERSION,
+                azure_endpoint=AZURE_OPENAI_ENDPOINT,
+                http_client=http_client,
+                max_retries=AZURE_OPENAI_MAX_RETRIES,
+            ),
+            "embedding": AsyncAzureOpenAI(
+                api_key=AZURE_OPENAI_API_KEY,
+                api_version=AZURE_EMBEDDING_API_VERSION,
+                azure_endpoint=AZURE_EMBEDDING_ENDPOINT,
+                http_client=http_client,
+                max_retries=AZURE_OPENAI_MAX_RETRIES,
+            ),
+        }
+        _openai_clients[loop] = clients
+    return clients
+
+
+async def close_openai_clients():
+    """Close the pooled Azure OpenAI connections opened on the current event loop."""
+    clients = _openai_clients.pop(asyncio.get_running_loop(), None)
+    if clients is not None:
+        await clients["http"].aclose()
+
+
+async def _stream_completion(client, messages, **kwargs):
+    async with get_deployment_limiter().aslot(AZURE_OPENAI_DEPLOYMENT):
+        # Timed by hand: a span would have to stay open across the generator's yields
+        started = time.perf_counter()
+        status = "error"
+        try:
+            stream = await client.chat.completions.create(
+                model=AZURE_OPENAI_DEPLOYMENT,
+                messages=messages,
+                temperature=kwargs.get("temperature", 0),
+                top_p=kwargs.get("top_p", 1),
+                stream=True,
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+            status = "ok"
+        finally:
+            get_metrics().observe(
+                "llm_seconds",
+                time.perf_counter() - started,
+                deployment=AZURE_OPENAI_DEPLOYMENT,
+                status=status,
+            )
+
 
 async def llm_model_func(
     prompt, system_prompt=None, history_messages=[], keyword_extraction=False, **kwargs
-) -> str:
-    client = AzureOpenAI(
-        api_key=AZURE_OPENAI_API_KEY,
-        api_version=AZURE_OPENAI_API_VERSION,
-        azure_endpoint=AZURE_OPENAI_ENDPOINT,
-    )
+):
+    """Answer a LightRAG prompt with the Azure chat model.
+
+    Returns the answer text, or an async iterator of text deltas when LightRAG
+    asks for a streamed answer (`stream=True`).
+    """
+    client = _get_openai_clients()["llm"]
 
     messages = []
     if system_prompt:
@@ -75,77 +369,787 @@ async def llm_model_func(
         messages.extend(history_messages)
     messages.append({"role": "user", "content": prompt})
 
-    chat_completion = client.chat.completions.create(
-        model=AZURE_OPENAI_DEPLOYMENT, 
-        messages=messages,
-        temperature=kwargs.get("temperature", 0),
-        top_p=kwargs.get("top_p", 1),
-        n=kwargs.get("n", 1),
-    )
+    if kwargs.get("stream"):
+        return _stream_completion(client, messages, **kwargs)
+
+    metrics = get_metrics()
+    async with get_deployment_limiter().aslot(AZURE_OPENAI_DEPLOYMENT):
+        with metrics.timer("llm_seconds", deployment=AZURE_OPENAI_DEPLOYMENT):
+            chat_completion = await client.chat.completions.create(
+                model=AZURE_OPENAI_DEPLOYMENT,
+                messages=messages,
+                temperature=kwargs.get("temperature", 0),
+                top_p=kwargs.get("top_p", 1),
+                n=kwargs.get("n", 1),
+            )
+    if chat_completion.usage is not None:
+        metrics.record_llm_usage(
+            AZURE_OPENAI_DEPLOYMENT,
+            chat_completion.usage.prompt_tokens,
+            chat_completion.usage.completion_tokens,
+            LLM_PRICES,
+        )
     return chat_completion.choices[0].message.content
 
 
+async def _azure_embed(texts: list[str]) -> list[list[float]]:
+    client = _get_openai_clients()["embedding"]
+    metrics = get_metrics()
+    with metrics.timer(
+        "embedding_seconds", deployment=AZURE_EMBEDDING_DEPLOYMENT or "embedding"
+    ):
+        embedding = await client.embeddings.create(
+            model=AZURE_EMBEDDING_DEPLOYMENT, input=texts
+        )
+    if embedding.usage is not None:
+        metrics.inc(
+            "embedding_tokens_total",
+            embedding.usage.prompt_tokens,
+            deployment=AZURE_EMBEDDING_DEPLOYMENT or "embedding",
+        )
+    return [item.embedding for item in embedding.data]
+
+
+def _embed_documents(texts: list[str]) -> list[list[float]]:
+    with get_metrics().timer(
+        "embedding_seconds", deployment=AZURE_EMBEDDING_DEPLOYMENT or "embedding"
+    ):
+        return get_embeddings().embed_documents(texts)
+
+
+_embedder = None
+_embedder_lock = threading.Lock()
+
+
+def get_cached_embedder():
+    """Return the process-wide cached embedder for the Azure embedding deployment."""
+    global _embedder
+    if _embedder is None:
+        with _embedder_lock:
+            if _embedder is None:
+                _embedder = CachedEmbedder(
+                    model=AZURE_EMBEDDING_DEPLOYMENT or "embedding",
+                    cache=EmbeddingCache(
+                        EMBEDDING_CACHE_PATH, max_entries=EMBEDDING_CACHE_MAX_ENTRIES
+                    ),
+                    embed_fn=_embed_documents,
+                    aembed_fn=_azure_embed,
+                    max_batch_size=AZURE_EMBEDDING_MAX_BATCH_SIZE,
+                )
+    return _embedder
+
+
 async def embedding_func(texts: list[str]) -> np.ndarray:
-    client = AzureOpenAI(
-        api_key=AZURE_OPENAI_API_KEY,
-        api_version=AZURE_EMBEDDING_API_VERSION,
-        azure_endpoint=AZURE_EMBEDDING_ENDPOINT,
+    """Embed texts for LightRAG through the cached embedder."""
+    return await get_cached_embedder().aembed(texts)
+
+
+# Settings required by both the langgraph Postgres store and checkpointer
+POSTGRES_CONNECTION_KWARGS = {
+    "autocommit": True,
+    "prepare_threshold": 0,
+    "row_factory": dict_row,
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_connection_pool():
+    """Return the process-wide Postgres connection pool shared by the store and checkpointer."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    DB_URI,
+                    kwargs=POSTGRES_CONNECTION_KWARGS,
+                    min_size=POSTGRES_POOL_MIN_SIZE,
+                    max_size=POSTGRES_POOL_MAX_SIZE,
+                    timeout=POSTGRES_POOL_TIMEOUT,
+                    max_idle=POSTGRES_POOL_MAX_IDLE,
+                    # Health-check connections on checkout so dropped ones are replaced.
+                    check=ConnectionPool.check_connection,
+                    name="intelligent-index",
+                    open=True,
+                )
+    return _pool
+
+
+# Latest migration version of each langgraph table; setup() is skipped when the
+# database already has them all applied.
+STORE_MIGRATIONS = {
+    "store_migrations": len(PostgresStore.MIGRATIONS) - 1,
+    "vector_migrations": len(PostgresStore.VECTOR_MIGRATIONS) - 1,
+}
+CHECKPOINT_MIGRATIONS = {
+    "checkpoint_migrations": len(PostgresSaver.MIGRATIONS) - 1,
+}
+
+
+def _migrations_query(migrations):
+    # to_regclass() is NULL for a missing table, so the version check never errors.
+    return " UNION ALL ".join(
+        f"SELECT '{table}' AS tbl, to_regclass('{table}') IS NOT NULL AS present"
+        for table in migrations
     )
-    embedding = client.embeddings.create(model=AZURE_EMBEDDING_DEPLOYMENT, input=texts)
 
-    embeddings = [item.embedding for item in embedding.data]
-    return np.array(embeddings)
+
+def _versions_query(migrations):
+    return " UNION ALL ".join(
+        f"SELECT '{table}' AS tbl, coalesce(max(v), -1) AS v FROM {table}"
+        for table in migrations
+    )
+
+
+def schema_is_current(migrations):
+    """Return whether the store migrations are applied."""
+    with get_connection_pool().connection() as conn:
+        present = conn.execute(_migrations_query(migrations)).fetchall()
+        if not all(row["present"] for row in present):
+            return False
+        versions = conn.execute(_versions_query(migrations)).fetchall()
+    return all(row["v"] >= migrations[row["tbl"]] for row in versions)
+
+
+async def aschema_is_current(migrations):
+    """Return whether the store migrations are applied."""
+    async with (await aget_connection_pool()).connection() as conn:
+        present = await (await conn.execute(_migrations_query(migrations))).fetchall()
+        if not all(row["present"] for row in present):
+            return False
+        versions = await (await conn.execute(_versions_query(migrations))).fetchall()
+    return all(row["v"] >= migrations[row["tbl"]] for row in versions)
+
 
 def load_postgres_store():
-    connection_kwargs = {
-        "autocommit": True,
-        "prepare_threshold": 0,
-    }
+    """Build the sync Postgres store, migrating it if needed."""
+    postgres_store = TimedPostgresStore(
+        get_connection_pool(),
+        index={
+            "dims": EMBEDDINGS_DIMENSION,
+            "embed": CachedEmbeddings(get_cached_embedder()),
+        },
+        metrics=get_metrics(),
+    )
+    if not schema_is_current(STORE_MIGRATIONS):
+        postgres_store.setup()
+    return postgres_store
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_postgres_store():
+    """Return the process-wide Postgres store, shared by the graph and the API."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = load_postgres_store()
+    return _store
+
+
+def load_checkpointer():
+    """Build the Postgres checkpointer for the graph, sharing the store's connection pools."""
+    checkpointer = PooledPostgresSaver(
+        get_connection_pool(),
+        apool_factory=aget_connection_pool,
+        retention=CHECKPOINT_RETENTION,
+        compact_every=CHECKPOINT_COMPACT_EVERY,
+    )
+    if not schema_is_current(CHECKPOINT_MIGRATIONS):
+        checkpointer.setup()
+    return checkpointer
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    """Return the process-wide metrics registry served at /metrics."""
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                metrics = Metrics(
+                    tracer=load_tracer() if OTEL_TRACING_ENABLED else None
+                )
+                metrics.add_collector(_cache_metrics)
+                _metrics = metrics
+    return _metrics
+
+
+def _cache_metrics():
+    # Read from caches that are already open; collecting must not open them
+    caches = []
+    if _embedder is not None:
+        caches.append(({"cache": "embedding"}, _embedder.cache.stats()))
+    if _store_cache is not None:
+        caches.append(({"cache": "store"}, _store_cache.items.stats()))
+    if _response_cache is not None:
+        for scope, stats in _response_cache.stats()["scopes"].items():
+            caches.append(
+                (
+                    {"cache": f"response_{scope}"},
+                    {**stats, "hits": stats["hits"] + stats["near_hits"]},
+                )
+            )
+    for labels, stats in caches:
+        yield "cache_hits_total", "counter", labels, stats["hits"]
+        yield "cache_misses_total", "counter", labels, stats["misses"]
+        yield "cache_hit_ratio", "gauge", labels, stats["hit_ratio"]
+
+
+_token_counter = None
+
+
+def get_token_counter():
+    """Return the shared token counter used to budget report prompts."""
+    global _token_counter
+    if _token_counter is None:
+        _token_counter = TokenCounter(PROMPT_TOKEN_ENCODING)
+    return _token_counter
+
+
+def get_prompt_budget():
+    """Return the configured report prompt budget."""
+    return PromptBudget(
+        max_input_tokens=PROMPT_MAX_INPUT_TOKENS,
+        stm_tokens=PROMPT_STM_TOKENS,
+        episodic_tokens=PROMPT_EPISODIC_TOKENS,
+    )
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Return the process-wide response cache, or None if RESPONSE_CACHE_ENABLED is off."""
+    global _response_cache
+    if _response_cache is None and RESPONSE_CACHE_ENABLED:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = ResponseCache(
+                    RESPONSE_CACHE_PATH,
+                    ttl=RESPONSE_CACHE_TTL,
+                    max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+                )
+    return _response_cache
+
+
+_store_cache = None
+_store_cache_lock = threading.Lock()
+
+
+def get_store_cache():
+    """Return the process-wide cache for namespaced instructions and STM items."""
+    global _store_cache
+    if _store_cache is None:
+        with _store_cache_lock:
+            if _store_cache is None:
+                _store_cache = StoreItemCache(
+                    maxsize=STORE_CACHE_MAX_ENTRIES,
+                    ttl=STORE_CACHE_TTL,
+                    db_uri=DB_URI,
+                    notify=STORE_CACHE_NOTIFY,
+                )
+    return _store_cache
+
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """Return the process-wide durable queue for post-approval jobs."""
+    global _job_queue
+    if _job_queue is None:
+        with _job_queue_lock:
+            if _job_queue is None:
+                _job_queue = JobQueue(
+                    JOB_QUEUE_PATH,
+                    max_attempts=JOB_MAX_ATTEMPTS,
+                    lease_seconds=JOB_LEASE_SECONDS,
+                    retry_backoff=JOB_RETRY_BACKOFF,
+                    max_retry_backoff=JOB_MAX_RETRY_BACKOFF,
+                )
+    return _job_queue
+
+
+_deployment_limiter = None
+_deployment_limiter_lock = threading.Lock()
+
+
+def get_deployment_limiter():
+    """Return the process-wide cap on in-flight calls per Azure OpenAI deployment."""
+    global _deployment_limiter
+    if _deployment_limiter is None:
+        with _deployment_limiter_lock:
+            if _deployment_limiter is None:
+                _deployment_limiter = DeploymentLimiter(
+                    {
+                        AZURE_OPENAI_DEPLOYMENT: AZURE_OPENAI_MAX_CONCURRENCY,
+                        AZURE_OPENAI_ADVANCED_DEPLOYMENT: AZURE_OPENAI_ADVANCED_MAX_CONCURRENCY,
+                    },
+                    default_limit=AZURE_OPENAI_MAX_CONCURRENCY,
+                )
+    return _deployment_limiter
+
+
+_async_pool = None
+_async_pool_lock = asyncio.Lock()
+
 
-    conn = Connection.connect(DB_URI, **connection_kwargs)
+async def aget_connection_pool():
+    """Return the process-wide async Postgres connection pool.
 
-    postgres_store = PostgresStore(
-        conn,
+    The pool is bound to the event loop that first requests it, so this should
+    be called from the API's loop (e.g. at startup).
+    """
+    global _async_pool
+    if _async_pool is None:
+        async with _async_pool_lock:
+            if _async_pool is None:
+                pool = AsyncConnectionPool(
+                    DB_URI,
+                    kwargs=POSTGRES_CONNECTION_KWARGS,
+                    min_size=POSTGRES_POOL_MIN_SIZE,
+                    max_size=POSTGRES_POOL_MAX_SIZE,
+                    timeout=POSTGRES_POOL_TIMEOUT,
+                    max_idle=POSTGRES_POOL_MAX_IDLE,
+                    check=AsyncConnectionPool.check_connection,
+                    name="intelligent-index-async",
+                    open=False,
+                )
+                await pool.open()
+                _async_pool = pool
+    return _async_pool
+
+
+_async_store = None
+_async_store_lock = asyncio.Lock()
+
+
+async def aload_postgres_store():
+    """Build the async Postgres store, migrating it if needed."""
+    postgres_store = TimedAsyncPostgresStore(
+        await aget_connection_pool(),
         index={
             "dims": EMBEDDINGS_DIMENSION,
-            "embed": get_embeddings()
-        }
+            "embed": CachedEmbeddings(get_cached_embedder()),
+        },
+        metrics=get_metrics(),
     )
-    postgres_store.setup()
+    if not await aschema_is_current(STORE_MIGRATIONS):
+        await postgres_store.setup()
     return postgres_store
 
-async def initialize_rag():
-    rag = LightRAG(
-        working_dir=WORKING_DIR,
-        llm_model_func=llm_model_func,
-        embedding_func=EmbeddingFunc(
-            embedding_dim=EMBEDDINGS_DIMENSION,
-            max_token_size=8192,
-            func=embedding_func,
-        ),
+
+async def aget_postgres_store():
+    """Return the process-wide async Postgres store used by the async graph nodes."""
+    global _async_store
+    if _async_store is None:
+        async with _async_store_lock:
+            if _async_store is None:
+                _async_store = await aload_postgres_store()
+    return _async_store
+
+
+async def close_postgres_store():
+    """Close the async store and the Postgres connection pools, if they were opened."""
+    global _store, _async_store, _async_pool, _pool
+    _store = None
+    _async_store = None
+    if _async_pool is not None:
+        pool, _async_pool = _async_pool, None
+        await pool.close()
+    if _pool is not None:
+        pool, _pool = _pool, None
+        pool.close()
+
+
+_rag = None
+_rag_async_lock = asyncio.Lock()
+
+# LightRAG's storages and shared pipeline state use asyncio locks, which belong to
+# one event loop and are not thread-safe. Every LightRAG instance is therefore
+# created, used and closed on a single loop. The API starts a dedicated thread for
+# it (`start_rag_loop`) so inserts, compactions and storage writes don't stall
+# request handling; single-loop scripts use the first loop that touches the LTM.
+# Other loops and threads (the job workers) submit coroutines to the owning loop.
+_rag_loop = None
+_rag_loop_thread = None
+_rag_loop_lock = threading.Lock()
+
+
+def _start_rag_loop_thread():
+    # Called with _rag_loop_lock held
+    global _rag_loop, _rag_loop_thread
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(
+        target=loop.run_forever, name="lightrag-loop", daemon=True
     )
+    thread.start()
+    _rag_loop, _rag_loop_thread = loop, thread
+    return loop
+
+
+def start_rag_loop():
+    """Run the LightRAG instances on a dedicated thread's event loop and return that loop."""
+    with _rag_loop_lock:
+        if _rag_loop_thread is not None and _rag_loop_thread.is_alive():
+            return _rag_loop
+        return _start_rag_loop_thread()
+
+
+def stop_rag_loop(timeout=10.0):
+    """Stop the thread started by `start_rag_loop`.
+
+    Close the instances on it
+    (`arun_on_rag_loop(close_rag)`) first.
+    """
+    global _rag_loop, _rag_loop_thread
+    with _rag_loop_lock:
+        loop, thread = _rag_loop, _rag_loop_thread
+        if thread is None:
+            return
+        _rag_loop = _rag_loop_thread = None
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(timeout)
+    if not thread.is_alive():
+        loop.close()
+
+
+def _claim_rag_loop():
+    # Called from a coroutine: the running loop owns the LTM unless a live loop already does
+    global _rag_loop
+    running = asyncio.get_running_loop()
+    with _rag_loop_lock:
+        if _rag_loop is None or _rag_loop.is_closed():
+            _rag_loop = running
+        elif _rag_loop is not running:
+            raise RuntimeError(
+                "LightRAG instances belong to another event loop; use arun_with_rag or run_with_rag"
+            )
+
+
+def _owning_rag_loop():
+    # Returns the live loop that owns LightRAG, or None
+    with _rag_loop_lock:
+        if _rag_loop is None or _rag_loop.is_closed() or not _rag_loop.is_running():
+            return None
+        return _rag_loop
+
+
+def run_on_rag_loop(coro_factory):
+    """Run `coro_factory()` on the loop that owns the LightRAG instances.
+
+    Returns its result, blocking the calling thread (which must not be that
+    loop's thread).
+    """
+    with _rag_loop_lock:
+        if _rag_loop is None or _rag_loop.is_closed() or not _rag_loop.is_running():
+            _start_rag_loop_thread()
+        loop = _rag_loop
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        raise RuntimeError(
+            "run_on_rag_loop would block the loop that owns LightRAG; await the coroutine instead"
+        )
+    return asyncio.run_coroutine_threadsafe(coro_factory(), loop).result()
+
+
+async def arun_on_rag_loop(coro_factory):
+    """Await `coro_factory()` on the loop that owns LightRAG.
+
+    The async counterpart of `run_on_rag_loop`, which does not block the
+    calling loop. With no owning loop yet, the
+    calling loop becomes the owner.
+    """
+    loop = _owning_rag_loop()
+    if loop is None or loop is asyncio.get_running_loop():
+        return await coro_factory()
+    return await asyncio.wrap_future(
+        asyncio.run_coroutine_threadsafe(coro_factory(), loop)
+    )
+
+
+async def initialize_rag(vector_storage=None, partition=None, **kwargs):
+    """Build a LightRAG instance and initialise its storages."""
+    from lightrag.kg.shared_storage import initialize_pipeline_status
+
+    rag = load_rag(vector_storage, partition=partition, **kwargs)
 
     await rag.initialize_storages()
     await initialize_pipeline_status()
 
     return rag
 
-def load_rag():
+
+async def aget_rag():
+    """Return the process-wide LightRAG instance, initializing it on first use.
+
+    The instance is shared by the API and the graph so storages are only
+    loaded from WORKING_DIR once per process.
+    """
+    global _rag
+    _claim_rag_loop()
+    if _rag is None:
+        async with _rag_async_lock:
+            if _rag is None:
+                _rag = await initialize_rag()
+    return _rag
+
+
+def get_rag():
+    """Return the shared LightRAG instance to callers outside the loop that owns it.
+
+    The synchronous counterpart of `aget_rag`. The instance must only be used through
+    `run_on_rag_loop`.
+    """
+    return run_on_rag_loop(aget_rag)
+
+
+async def close_rag():
+    """Flush and release the shared LightRAG instance and any open partitions."""
+    global _rag, _rag_partitions
+    if _rag_partitions is not None:
+        partitions, _rag_partitions = _rag_partitions, None
+        await partitions.close()
+    if _rag is not None:
+        rag, _rag = _rag, None
+        await rag.finalize_storages()
+
+
+def ltm_partition(namespace=None):
+    """Return the LTM partition a namespace reads and writes, or None for the shared store."""
+    if LTM_PARTITIONING != "namespace" or not namespace:
+        return None
+    return LTM_PARTITION_GROUPS.get(namespace, namespace)
+
+
+def ltm_version_name(namespace=None):
+    """Name of the response cache version that covers a namespace's LTM answers."""
+    partition = ltm_partition(namespace)
+    return "ltm" if partition is None else f"ltm:{partition}"
+
+
+def _partition_dirname(partition):
+    # Namespaces are arbitrary strings; keep them readable but filesystem-safe and distinct
+    safe = re.sub(r"[^A-Za-z0-9_-]", "_", partition)
+    if safe != partition:
+        safe = f"{safe}-{hashlib.sha256(partition.encode()).hexdigest()[:8]}"
+    return safe
+
+
+def partition_working_dir(partition=None):
+    """Return the working directory of an LTM partition."""
+    if partition is None:
+        return WORKING_DIR
+    return os.path.join(WORKING_DIR, "partitions", _partition_dirname(partition))
+
+
+_rag_partitions = None
+_rag_partitions_lock = threading.Lock()
+
+
+async def _close_partition_rag(rag):
+    await rag.finalize_storages()
+
+
+def get_rag_partitions():
+    """Return the process-wide LRU of open per-partition LightRAG instances."""
+    global _rag_partitions
+    if _rag_partitions is None:
+        with _rag_partitions_lock:
+            if _rag_partitions is None:
+                _rag_partitions = PartitionLRU(
+                    LTM_MAX_OPEN_PARTITIONS,
+                    lambda partition: initialize_rag(partition=partition),
+                    _close_partition_rag,
+                )
+    return _rag_partitions
+
+
+@asynccontextmanager
+async def arag_for(namespace=None):
+    """Yield the LightRAG instance holding a namespace's LTM.
+
+    Partitions stay open
+    (not evicted from the LRU) until the block exits.
+    """
+    partition = ltm_partition(namespace)
+    if partition is None:
+        yield await aget_rag()
+    else:
+        _claim_rag_loop()
+        async with get_rag_partitions().use(partition) as rag:
+            yield rag
+
+
+async def _with_rag(namespace, fn):
+    async with arag_for(namespace) as rag:
+        return await fn(rag)
+
+
+def run_with_rag(namespace, fn):
+    """Run `fn(rag)` with a namespace's LightRAG instance and return its result.
+
+    The synchronous counterpart of `arag_for`. `fn` is a coroutine function and
+    runs on the loop that owns the instance.
+    """
+    return run_on_rag_loop(lambda: _with_rag(namespace, fn))
+
+
+async def arun_with_rag(namespace, fn):
+    """Like `run_with_rag`, but awaited from another event loop (e.g. the API's)."""
+    return await arun_on_rag_loop(lambda: _with_rag(namespace, fn))
+
+
+async def astream_with_rag(namespace, fn, max_pending=64):
+    """Yield the items of the async iterator returned by `fn(rag)`.
+
+    `fn` runs on the loop that owns LightRAG (a plain result is yielded once).
+    The namespace's
+    instance stays checked out until the items have been consumed or the
+    consumer stops.
+    """
+
+    async def items(rag):
+        results = await fn(rag)
+        if hasattr(results, "__aiter__"):
+            async for item in results:
+                yield item
+        else:
+            yield results
+
+    loop = _owning_rag_loop()
+    consumer = asyncio.get_running_loop()
+    if loop is None or loop is consumer:
+        async with arag_for(namespace) as rag:
+            async for item in items(rag):
+                yield item
+        return
+
+    # Items cross loops through a bounded queue on the consumer's loop, so a slow
+    # client holds the producer back instead of buffering the whole answer
+    queue = asyncio.Queue(max_pending)
+    end = object()
+
+    async def produce():
+        async def put(entry):
+            await asyncio.wrap_future(
+                asyncio.run_coroutine_threadsafe(queue.put(entry), consumer)
+            )
+
+        try:
+            async with arag_for(namespace) as rag:
+                async for item in items(rag):
+                    await put((item, None))
+        except Exception as e:
+            await put((end, e))
+        else:
+            await put((end, None))
+
+    producer = asyncio.run_coroutine_threadsafe(produce(), loop)
+    try:
+        while True:
+            item, error = await queue.get()
+            if item is end:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        producer.cancel()
+
+
+def get_vector_storage_kwargs(vector_storage=None):
+    """Return LightRAG's `vector_db_storage_cls_kwargs` for a vector storage name."""
+    vector_storage = vector_storage or LTM_VECTOR_STORAGE
+    if vector_storage == "MemmapVectorStorage":
+        return {
+            "index": LTM_VECTOR_INDEX,
+            "hnsw_m": LTM_HNSW_M,
+            "hnsw_ef_construction": LTM_HNSW_EF_CONSTRUCTION,
+            "hnsw_ef_search": LTM_HNSW_EF_SEARCH,
+            "compact_dead_ratio": LTM_COMPACT_DEAD_RATIO,
+            "compact_min_dead_rows": LTM_COMPACT_MIN_DEAD_ROWS,
+        }
+    if vector_storage == "PooledPGVectorStorage":
+        return {
+            "connection_pool": get_connection_pool,
+            "hnsw_ef_search": LTM_HNSW_EF_SEARCH,
+        }
+    return {}
+
+
+def load_rag(vector_storage=None, partition=None, **kwargs):
+    """Build the LightRAG instance for an LTM partition (None for the shared store).
+
+    Extra keyword arguments are passed to LightRAG.
+    """
+    from lightrag import LightRAG
+    from lightrag.utils import EmbeddingFunc
+
+    from react_agent.sqlite_storage import register_sqlite_storages
+    from react_agent.vector_storage import register_vector_storages
+
+    register_vector_storages()
+    register_sqlite_storages()
+    vector_storage = vector_storage or LTM_VECTOR_STORAGE
     rag = LightRAG(
-        working_dir=WORKING_DIR,
+        working_dir=partition_working_dir(partition),
+        # LightRAG shares storage data in-process by namespace name, so each
+        # partition needs its own prefix as well as its own directory
+        namespace_prefix=f"{_partition_dirname(partition)}_"
+        if partition is not None
+        else "",
         llm_model_func=llm_model_func,
         embedding_func=EmbeddingFunc(
             embedding_dim=EMBEDDINGS_DIMENSION,
             max_token_size=8192,
             func=embedding_func,
         ),
+        kv_storage=LTM_KV_STORAGE,
+        doc_status_storage=LTM_DOC_STATUS_STORAGE,
+        graph_storage=LTM_GRAPH_STORAGE,
+        vector_storage=vector_storage,
+        vector_db_storage_cls_kwargs=get_vector_storage_kwargs(vector_storage),
+        **kwargs,
     )
     return rag
 
+
+def build_query_param(
+    mode=RETRIEVE_DEFAULT_MODE,
+    top_k=RETRIEVE_DEFAULT_TOP_K,
+    only_need_context=False,
+    stream=False,
+):
+    """Build LightRAG query parameters."""
+    from lightrag import QueryParam
+
+    return QueryParam(
+        mode=mode, top_k=top_k, only_need_context=only_need_context, stream=stream
+    )
+
+
 def data_formatter(data):
-    """
-    Converts a list of dictionaries with 'namespace', 'date', and 'contents'
-    keys into a structured string for LLM parsing.
+    """Convert dictionaries with 'namespace', 'date' and 'contents' keys into a string.
+
+    The string is structured for LLM parsing.
+
+    Large batches of `LEVEL [timestamp] [component] message` logs are
+    pre-aggregated into a template summary table (see react_agent.log_parser)
+    instead of being pasted verbatim.
 
     Parameters:
         data_list (list): A list of dictionaries. Each dictionary should have
@@ -155,43 +1159,98 @@ def data_formatter(data):
     Returns:
         str: A structured string with the formatted data.
     """
+    if LOG_AGGREGATION_ENABLED:
+        summary = aggregate_logs(data)
+        if summary is not None:
+            return summary
+
     formatted_entries = []
-    
+
     for entry in data:
         namespace = entry.get("namespace", "N/A")
         date = entry.get("date", "N/A")
         contents = entry.get("content", "N/A")
-        
+
         # Format each entry as a structured block
         formatted_entry = (
-            f"Namespace: {namespace}\n"
-            f"Date: {date}\n"
-            "Contents:\n"
-            f"{contents}\n"
+            f"Namespace: {namespace}\nDate: {date}\nContents:\n{contents}\n"
         )
         formatted_entries.append(formatted_entry)
-    
+
     # Combine all entries with a separating newline between each entry
     return "\n".join(formatted_entries)
 
+
+def aggregate_logs(data):
+    """Summarise the log lines of all entries.
+
+    Returns None when the batch is below LOG_AGGREGATION_MIN_LINES or is not
+    mostly in the expected log format.
+    """
+    lines = [
+        line for entry in data for line in str(entry.get("content", "")).splitlines()
+    ]
+    if len(lines) < LOG_AGGREGATION_MIN_LINES:
+        return None
+
+    summary = summarize_logs(lines, similarity=LOG_TEMPLATE_SIMILARITY)
+    if summary is None:
+        return None
+
+    namespaces = sorted({str(entry.get("namespace", "N/A")) for entry in data})
+    dates = sorted(str(entry["date"]) for entry in data if entry.get("date"))
+    header = (
+        f"Namespace: {', '.join(namespaces)}\n"
+        f"Entries: {len(data)}\n"
+        f"Date: {dates[0] + ' to ' + dates[-1] if dates else 'N/A'}\n"
+        "Contents (pre-aggregated):\n"
+    )
+    return header + summary
+
+
+def episodic_query(instructions, data):
+    """Return the search text for episodes similar to an input.
+
+    That is the instructions and the formatted (aggregated) data, cut to the
+    embedding model's input budget.
+    """
+    query = f"Instructions: {instructions}\n\nData:\n{data_formatter(data)}"
+    return get_token_counter().truncate(query, EPISODIC_QUERY_MAX_TOKENS)
+
+
 def get_episodic_memory(namespace, instructions, data, store):
-        similar = store.search(
-            ("episodes", namespace),
-            query=f"Instructions: {instructions}\n\nData:\n{data}",
-            limit=1,
-        )
+    """Return the most similar stored episode, formatted for the prompt."""
+    similar = store.search(
+        ("episodes", namespace),
+        query=episodic_query(instructions, data),
+        limit=1,
+    )
+    return format_episodic_memory(similar)
+
+
+async def aget_episodic_memory(namespace, instructions, data, store):
+    """Return the most similar stored episode, formatted for the prompt."""
+    similar = await store.asearch(
+        ("episodes", namespace),
+        query=episodic_query(instructions, data),
+        limit=1,
+    )
+    return format_episodic_memory(similar)
+
 
-        # Step 2: Build system message with relevant experience
-        episodic_memory = "" 
-        if similar:
-            episodic_memory += "\n\n### EPISODIC MEMORY:"
-            for i, item in enumerate(similar, start=1):
-                episode = item.value["content"]
-                episodic_memory += f"""
+def format_episodic_memory(similar):
+    """Format episodes for the report prompt."""
+    # Build system message with relevant experience
+    episodic_memory = ""
+    if similar:
+        episodic_memory += "\n\n### EPISODIC MEMORY:"
+        for i, item in enumerate(similar, start=1):
+            episode = item.value["content"]
+            episodic_memory += f"""
                     Episode {i}:
-                    When: {episode['observation']}
-                    Thought: {episode['thoughts']}
-                    Did: {episode['action']}
-                    Result: {episode['result']}
+                    When: {episode["observation"]}
+                    Thought: {episode["thoughts"]}
+                    Did: {episode["action"]}
+                    Result: {episode["result"]}
                 """
-        return episodic_memory
\ No newline at end of file
+    return episodic_memory
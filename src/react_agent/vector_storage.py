@@ -0,0 +1,696 @@
+"""LightRAG vector storages for the long-term memory, selected with LTM_VECTOR_STORAGE.
+
+`MemmapVectorStorage` appends normalised float32 vectors to an on-disk matrix
+that is memory-mapped on load, keeps ids and metadata in SQLite and searches
+with an hnswlib index (or exactly, without hnswlib). Insert cost is
+proportional to the new vectors rather than the whole store.
+
+`PooledPGVectorStorage` keeps vectors in the existing Postgres with pgvector,
+through the process-wide connection pool.
+
+Both expose `upsert_embeddings` so vectors can be migrated without re-embedding.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, List, final
+
+import numpy as np
+from lightrag.base import BaseVectorStorage
+from lightrag.kg import STORAGE_ENV_REQUIREMENTS, STORAGE_IMPLEMENTATIONS, STORAGES
+from lightrag.utils import compute_mdhash_id, logger
+from typing_extensions import override
+
+VECTOR_STORAGES = ("MemmapVectorStorage", "PooledPGVectorStorage")
+
+
+def register_vector_storages() -> None:
+    """Make the storages in this module selectable as LightRAG `vector_storage` names."""
+    implementations = STORAGE_IMPLEMENTATIONS["VECTOR_STORAGE"]["implementations"]
+    for name in VECTOR_STORAGES:
+        STORAGES[name] = __name__
+        STORAGE_ENV_REQUIREMENTS.setdefault(name, [])
+        if name not in implementations:
+            implementations.append(name)
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale vectors to unit length, leaving zero vectors as they are."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def _result(
+    record_id: str, meta: Dict[str, Any], created_at: float, similarity: float
+) -> Dict[str, Any]:
+    # Same shape as NanoVectorDBStorage results
+    return {
+        **meta,
+        "__id__": record_id,
+        "__metrics__": similarity,
+        "id": record_id,
+        "distance": similarity,
+        "created_at": created_at,
+    }
+
+
+class _BaseEmbeddedStorage(BaseVectorStorage, ABC):
+    def _configure(self) -> Dict[str, Any]:
+        kwargs = self.global_config.get("vector_db_storage_cls_kwargs", {})
+        threshold = kwargs.get("cosine_better_than_threshold")
+        if threshold is None:
+            raise ValueError(
+                "cosine_better_than_threshold must be specified in vector_db_storage_cls_kwargs"
+            )
+        self.cosine_better_than_threshold = threshold
+        self._max_batch_size = self.global_config["embedding_batch_num"]
+        return kwargs
+
+    async def upsert(self, data: Dict[str, Dict[str, Any]]) -> None:
+        logger.info(f"Inserting {len(data)} to {self.namespace}")
+        if not data:
+            return
+        contents = [value["content"] for value in data.values()]
+        batches = [
+            contents[i : i + self._max_batch_size]
+            for i in range(0, len(contents), self._max_batch_size)
+        ]
+        embeddings = np.concatenate(
+            await asyncio.gather(*(self.embedding_func(batch) for batch in batches))
+        )
+        if len(embeddings) != len(data):
+            logger.error(
+                f"embedding is not 1-1 with data, {len(embeddings)} != {len(data)}"
+            )
+            return
+        now = time.time()
+        records = [
+            {
+                "__id__": key,
+                "__created_at__": now,
+                **{k: v for k, v in value.items() if k in self.meta_fields},
+            }
+            for key, value in data.items()
+        ]
+        await self.upsert_embeddings(records, embeddings)
+
+    @abstractmethod
+    async def upsert_embeddings(
+        self, records: List[Dict[str, Any]], embeddings: np.ndarray
+    ) -> None:
+        """Store already-embedded records (`__id__`, optional `__created_at__`, metadata)."""
+
+    async def delete_entity(self, entity_name: str) -> None:
+        await self.delete([compute_mdhash_id(entity_name, prefix="ent-")])
+
+    async def get_by_id(self, id: str) -> Dict[str, Any] | None:
+        results = await self.get_by_ids([id])
+        return results[0] if results else None
+
+
+@final
+@dataclass
+class MemmapVectorStorage(_BaseEmbeddedStorage):
+    """Append-only memory-mapped matrix with ids/metadata in SQLite and an optional HNSW index.
+
+    Replaced or deleted vectors leave dead rows in the matrix; they are masked
+    out of searches and dropped from the index. Once dead rows make up more than
+    `compact_dead_ratio` of the matrix (and at least `compact_min_dead_rows`),
+    `index_done_callback` rewrites the live rows into a new matrix file and
+    rebuilds the index.
+    """
+
+    def __post_init__(self):
+        """Read the index settings and derive the file paths."""
+        kwargs = self._configure()
+        self._index_kind = kwargs.get("index", "hnsw")
+        self._hnsw_m = kwargs.get("hnsw_m", 16)
+        self._hnsw_ef_construction = kwargs.get("hnsw_ef_construction", 200)
+        self._hnsw_ef_search = kwargs.get("hnsw_ef_search", 128)
+        self._compact_dead_ratio = kwargs.get("compact_dead_ratio", 0.5)
+        self._compact_min_dead_rows = kwargs.get("compact_min_dead_rows", 1024)
+        base = os.path.join(self.global_config["working_dir"], f"vdb_{self.namespace}")
+        self._base_path = base
+        self._db_path = base + ".sqlite"
+        self._index_path = base + ".hnsw"
+        self._dim = self.embedding_func.embedding_dim
+        # Storages are shared by the serving loop and the sync LightRAG API in worker threads.
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._index = None
+        self._index_dirty = False
+
+    @override
+    async def initialize(self):
+        with self._lock:
+            if self._conn is None:
+                self._load()
+
+    def _load(self) -> None:
+        self._conn = sqlite3.connect(self._db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS vectors (id TEXT PRIMARY KEY, row INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, meta TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS state (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+        )
+        self._conn.commit()
+
+        saved = self._conn.execute(
+            "SELECT value FROM state WHERE name = 'matrix_generation'"
+        ).fetchone()
+        self._generation = saved[0] if saved is not None else 0
+        self._matrix_path = self._matrix_file(self._generation)
+        # Leftovers of a compaction interrupted before (next) or after (previous) its commit
+        for stale in (
+            self._matrix_file(self._generation + 1),
+            self._matrix_file(self._generation - 1),
+        ):
+            if stale != self._matrix_path and os.path.exists(stale):
+                os.remove(stale)
+
+        rows = 0
+        if os.path.exists(self._matrix_path):
+            rows = os.path.getsize(self._matrix_path) // (4 * self._dim)
+            # Drop a partially written row left by an interrupted append
+            os.truncate(self._matrix_path, rows * 4 * self._dim)
+        self._row_ids: List[str | None] = [None] * rows
+        self._live = 0
+        for record_id, row in self._conn.execute("SELECT id, row FROM vectors"):
+            if row < rows:
+                self._row_ids[row] = record_id
+                self._live += 1
+        self._map_matrix(rows)
+        if self._index_kind == "hnsw":
+            self._load_index(rows)
+        logger.info(f"Loaded {self._live} vectors ({rows} rows) for {self.namespace}")
+
+    def _matrix_file(self, generation: int) -> str:
+        return self._base_path + (".f32" if generation <= 0 else f".{generation}.f32")
+
+    def _map_matrix(self, rows: int) -> None:
+        if rows == 0:
+            self._matrix = np.zeros((0, self._dim), dtype=np.float32)
+        else:
+            self._matrix = np.memmap(
+                self._matrix_path, dtype=np.float32, mode="r", shape=(rows, self._dim)
+            )
+
+    def _select_in(
+        self, sql: str, ids: List[str], batch_size: int = 500
+    ) -> List[tuple]:
+        # Keeps each statement under SQLite's bound-parameter limit
+        rows = []
+        for i in range(0, len(ids), batch_size):
+            batch = ids[i : i + batch_size]
+            rows.extend(
+                self._conn.execute(
+                    sql.format(",".join("?" * len(batch))), batch
+                ).fetchall()
+            )
+        return rows
+
+    def _load_index(self, rows: int) -> None:
+        try:
+            import hnswlib
+        except ImportError:
+            logger.warning(
+                "hnswlib is not installed, %s uses exact search", self.namespace
+            )
+            self._index_kind = "exact"
+            return
+
+        self._index = hnswlib.Index(space="cosine", dim=self._dim)
+        saved = self._conn.execute(
+            "SELECT value FROM state WHERE name = 'indexed_rows'"
+        ).fetchone()
+        if os.path.exists(self._index_path) and saved is not None and saved[0] == rows:
+            self._index.load_index(self._index_path, max_elements=max(rows, 1024))
+        else:
+            # No index yet, or it was not saved after the last write (e.g. a crash): rebuild
+            self._index.init_index(
+                max_elements=max(rows, 1024),
+                ef_construction=self._hnsw_ef_construction,
+                M=self._hnsw_m,
+            )
+            live = [row for row in range(rows) if self._row_ids[row] is not None]
+            if live:
+                self._index.add_items(np.asarray(self._matrix[live]), live)
+                self._index_dirty = True
+        self._index.set_ef(self._hnsw_ef_search)
+
+    def _mark_index_stale(self) -> None:
+        if self._index is not None and not self._index_dirty:
+            self._conn.execute("DELETE FROM state WHERE name = 'indexed_rows'")
+            self._index_dirty = True
+
+    @override
+    async def upsert_embeddings(
+        self, records: List[Dict[str, Any]], embeddings: np.ndarray
+    ) -> None:
+        if not records:
+            return
+        vectors = normalize(embeddings)
+        with self._lock:
+            start = len(self._row_ids)
+            with open(self._matrix_path, "ab") as f:
+                f.write(vectors.tobytes())
+            new_rows = list(range(start, start + len(records)))
+            ids = [record["__id__"] for record in records]
+            replaced = [
+                row
+                for _, row in self._select_in(
+                    "SELECT id, row FROM vectors WHERE id IN ({})", ids
+                )
+                if row < start and self._row_ids[row] is not None
+            ]
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO vectors (id, row, created_at, meta) VALUES (?, ?, ?, ?)",
+                [
+                    (
+                        record["__id__"],
+                        row,
+                        record.get("__created_at__", time.time()),
+                        json.dumps(
+                            {k: v for k, v in record.items() if not k.startswith("__")},
+                            default=str,
+                        ),
+                    )
+                    for record, row in zip(records, new_rows)
+                ],
+            )
+            self._mark_index_stale()
+            self._conn.commit()
+
+            for row in replaced:
+                self._row_ids[row] = None
+            # A record repeated within the batch keeps only its last row
+            latest = {record["__id__"]: row for record, row in zip(records, new_rows)}
+            self._row_ids.extend(
+                record["__id__"] if latest[record["__id__"]] == row else None
+                for record, row in zip(records, new_rows)
+            )
+            self._live += len(latest) - len(replaced)
+            self._map_matrix(len(self._row_ids))
+
+            if self._index is not None:
+                needed = self._index.element_count + len(new_rows)
+                if needed > self._index.get_max_elements():
+                    self._index.resize_index(
+                        max(needed, 2 * self._index.get_max_elements())
+                    )
+                self._index.add_items(vectors, new_rows)
+                for row in replaced + [
+                    row for row in new_rows if self._row_ids[row] is None
+                ]:
+                    self._index.mark_deleted(row)
+
+    @override
+    async def query(
+        self, query: str, top_k: int, ids: List[str] | None = None
+    ) -> List[Dict[str, Any]]:
+        embedding = normalize((await self.embedding_func([query]))[0])
+        with self._lock:
+            if ids is not None:
+                rows = [
+                    row
+                    for _, row in self._select_in(
+                        "SELECT id, row FROM vectors WHERE id IN ({})", ids
+                    )
+                ]
+                found = self._exact(embedding, top_k, sorted(rows))
+            elif self._index is not None:
+                k = min(top_k, self._live)
+                if k == 0:
+                    return []
+                labels, distances = self._index.knn_query(embedding, k=k)
+                found = [
+                    (int(row), 1.0 - float(distance))
+                    for row, distance in zip(labels[0], distances[0])
+                ]
+            else:
+                found = self._exact(
+                    embedding,
+                    top_k,
+                    [row for row, record_id in enumerate(self._row_ids) if record_id],
+                )
+            found = [
+                (row, score)
+                for row, score in found
+                if score >= self.cosine_better_than_threshold
+            ]
+            return self._fetch(found)
+
+    def _exact(self, embedding: np.ndarray, top_k: int, rows: List[int]) -> List[tuple]:
+        if not rows:
+            return []
+        scores = np.asarray(self._matrix[rows]) @ embedding
+        best = np.argsort(-scores)[:top_k]
+        return [(rows[i], float(scores[i])) for i in best]
+
+    def _fetch(self, found: List[tuple]) -> List[Dict[str, Any]]:
+        found = [(row, score) for row, score in found if self._row_ids[row] is not None]
+        if not found:
+            return []
+        ids = [self._row_ids[row] for row, _ in found]
+        stored = {
+            record_id: (meta, created_at)
+            for record_id, meta, created_at in self._select_in(
+                "SELECT id, meta, created_at FROM vectors WHERE id IN ({})", ids
+            )
+        }
+        return [
+            _result(
+                record_id, json.loads(stored[record_id][0]), stored[record_id][1], score
+            )
+            for record_id, (_, score) in zip(ids, found)
+            if record_id in stored
+        ]
+
+    async def delete(self, ids: List[str]) -> None:
+        """Delete vectors by id."""
+        if not ids:
+            return
+        with self._lock:
+            rows = [
+                row
+                for _, row in self._select_in(
+                    "SELECT id, row FROM vectors WHERE id IN ({})", ids
+                )
+            ]
+            self._conn.executemany(
+                "DELETE FROM vectors WHERE id = ?", [(record_id,) for record_id in ids]
+            )
+            self._mark_index_stale()
+            self._conn.commit()
+            for row in rows:
+                if row < len(self._row_ids) and self._row_ids[row] is not None:
+                    self._row_ids[row] = None
+                    self._live -= 1
+                    if self._index is not None:
+                        self._index.mark_deleted(row)
+
+    @override
+    async def delete_entity_relation(self, entity_name: str) -> None:
+        with self._lock:
+            ids = [
+                record_id
+                for (record_id,) in self._conn.execute(
+                    "SELECT id FROM vectors WHERE json_extract(meta, '$.src_id') = ? OR json_extract(meta, '$.tgt_id') = ?",
+                    (entity_name, entity_name),
+                )
+            ]
+        logger.debug(f"Found {len(ids)} relations for entity {entity_name}")
+        await self.delete(ids)
+
+    @override
+    async def get_by_ids(self, ids: List[str]) -> List[Dict[str, Any]]:
+        if not ids:
+            return []
+        with self._lock:
+            stored = {
+                record_id: {
+                    **json.loads(meta),
+                    "__id__": record_id,
+                    "__created_at__": created_at,
+                }
+                for record_id, meta, created_at in self._select_in(
+                    "SELECT id, meta, created_at FROM vectors WHERE id IN ({})", ids
+                )
+            }
+        return [stored[record_id] for record_id in ids if record_id in stored]
+
+    async def search_by_prefix(self, prefix: str) -> List[Dict[str, Any]]:
+        """Return the records whose id starts with `prefix`."""
+        with self._lock:
+            return [
+                {
+                    **json.loads(meta),
+                    "__id__": record_id,
+                    "id": record_id,
+                    "__created_at__": created_at,
+                }
+                for record_id, meta, created_at in self._conn.execute(
+                    "SELECT id, meta, created_at FROM vectors WHERE substr(id, 1, ?) = ?",
+                    (len(prefix), prefix),
+                )
+            ]
+
+    async def index_done_callback(self) -> bool:
+        """Persist the HNSW index; vectors and metadata are already durable."""
+        with self._lock:
+            dead = len(self._row_ids) - self._live
+            if dead >= max(
+                self._compact_min_dead_rows, 1
+            ) and dead > self._compact_dead_ratio * len(self._row_ids):
+                self._compact()
+            if self._index is not None and self._index_dirty:
+                self._index.save_index(self._index_path)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO state (name, value) VALUES ('indexed_rows', ?)",
+                    (len(self._row_ids),),
+                )
+                self._conn.commit()
+                self._index_dirty = False
+        return True
+
+    def _compact(self, chunk_rows: int = 4096) -> None:
+        """Rewrite the live rows into the next matrix generation and rebuild the index."""
+        live = [
+            row for row, record_id in enumerate(self._row_ids) if record_id is not None
+        ]
+        path = self._matrix_file(self._generation + 1)
+        with open(path, "wb") as f:
+            for i in range(0, len(live), chunk_rows):
+                f.write(np.asarray(self._matrix[live[i : i + chunk_rows]]).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        # Switching generations in the same transaction as the row renumbering keeps
+        # the matrix file and SQLite consistent if the process dies part way
+        self._conn.executemany(
+            "UPDATE vectors SET row = ? WHERE id = ?",
+            [(new_row, self._row_ids[row]) for new_row, row in enumerate(live)],
+        )
+        self._conn.execute(
+            "INSERT OR REPLACE INTO state (name, value) VALUES ('matrix_generation', ?)",
+            (self._generation + 1,),
+        )
+        self._conn.execute("DELETE FROM state WHERE name = 'indexed_rows'")
+        self._conn.commit()
+
+        previous = self._matrix_path
+        self._generation += 1
+        self._matrix_path = path
+        self._row_ids = [self._row_ids[row] for row in live]
+        self._map_matrix(len(live))
+        os.remove(previous)
+        if self._index is not None:
+            self._index = None
+            self._load_index(len(live))
+            self._index_dirty = True
+        logger.info(f"Compacted {self.namespace} to {len(live)} rows")
+
+    @override
+    async def finalize(self):
+        await self.index_done_callback()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+@final
+@dataclass
+class PooledPGVectorStorage(_BaseEmbeddedStorage):
+    """pgvector storage on the application's Postgres connection pool.
+
+    Pass the pool factory as `vector_db_storage_cls_kwargs["connection_pool"]`.
+    Rows are keyed by working directory, so separate LightRAG working
+    directories can share the table.
+    """
+
+    def __post_init__(self):
+        """Read the pool and index settings."""
+        kwargs = self._configure()
+        self._pool_factory = kwargs["connection_pool"]
+        self._ef_search = kwargs.get("hnsw_ef_search", 128)
+        self._workspace = os.path.abspath(self.global_config["working_dir"])
+        self._dim = self.embedding_func.embedding_dim
+
+    def _run(self, func, *args):
+        def call():
+            with self._pool_factory().connection() as conn:
+                return func(conn, *args)
+
+        return asyncio.to_thread(call)
+
+    @override
+    async def initialize(self):
+        await self._run(self._setup)
+
+    def _setup(self, conn) -> None:
+        index = (
+            "lightrag_vectors_"
+            + "".join(c if c.isalnum() else "_" for c in self.namespace)
+            + "_hnsw"
+        )
+        if len(index) > 63:
+            # Postgres truncates longer identifiers, which could merge partitions' indexes
+            index = (
+                compute_mdhash_id(self.namespace, prefix="lightrag_vectors_") + "_hnsw"
+            )
+        quoted_namespace = self.namespace.replace("'", "''")
+        with conn.transaction():
+            # Storages initialise concurrently; IF NOT EXISTS alone races on the catalog
+            conn.execute("SELECT pg_advisory_xact_lock(hashtext('lightrag_vectors'))")
+            conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS lightrag_vectors (workspace TEXT NOT NULL, namespace TEXT NOT NULL, "
+                f"id TEXT NOT NULL, embedding vector({self._dim}) NOT NULL, meta JSONB NOT NULL, "
+                f"created_at DOUBLE PRECISION NOT NULL, PRIMARY KEY (workspace, namespace, id))"
+            )
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {index} ON lightrag_vectors "
+                f"USING hnsw (embedding vector_cosine_ops) WHERE namespace = '{quoted_namespace}'"
+            )
+
+    @staticmethod
+    def _literal(vector: np.ndarray) -> str:
+        return "[" + ",".join(f"{x:.7g}" for x in vector) + "]"
+
+    @override
+    async def upsert_embeddings(
+        self, records: List[Dict[str, Any]], embeddings: np.ndarray
+    ) -> None:
+        if not records:
+            return
+        vectors = normalize(embeddings)
+        params = [
+            (
+                self._workspace,
+                self.namespace,
+                record["__id__"],
+                self._literal(vector),
+                json.dumps(
+                    {k: v for k, v in record.items() if not k.startswith("__")},
+                    default=str,
+                ),
+                record.get("__created_at__", time.time()),
+            )
+            for record, vector in zip(records, vectors)
+        ]
+
+        def write(conn):
+            with conn.cursor() as cur:
+                cur.executemany(
+                    "INSERT INTO lightrag_vectors (workspace, namespace, id, embedding, meta, created_at) "
+                    "VALUES (%s, %s, %s, %s::vector, %s::jsonb, %s) "
+                    "ON CONFLICT (workspace, namespace, id) DO UPDATE SET "
+                    "embedding = EXCLUDED.embedding, meta = EXCLUDED.meta, created_at = EXCLUDED.created_at",
+                    params,
+                )
+
+        await self._run(write)
+
+    @override
+    async def query(
+        self, query: str, top_k: int, ids: List[str] | None = None
+    ) -> List[Dict[str, Any]]:
+        embedding = self._literal(normalize((await self.embedding_func([query]))[0]))
+
+        def search(conn):
+            with conn.transaction():
+                # HNSW scans return at most ef_search rows
+                conn.execute(
+                    "SELECT set_config('hnsw.ef_search', %s, true)",
+                    (str(max(self._ef_search, top_k)),),
+                )
+                return conn.execute(
+                    "SELECT id, meta, created_at, 1 - (embedding <=> %s::vector) AS similarity "
+                    "FROM lightrag_vectors WHERE workspace = %s AND namespace = %s "
+                    + ("AND id = ANY(%s) " if ids is not None else "")
+                    + "ORDER BY embedding <=> %s::vector LIMIT %s",
+                    [embedding, self._workspace, self.namespace]
+                    + ([ids] if ids is not None else [])
+                    + [embedding, top_k],
+                ).fetchall()
+
+        rows = await self._run(search)
+        return [
+            _result(row["id"], row["meta"], row["created_at"], row["similarity"])
+            for row in rows
+            if row["similarity"] >= self.cosine_better_than_threshold
+        ]
+
+    async def delete(self, ids: List[str]) -> None:
+        """Delete vectors by id."""
+        await self._run(
+            lambda conn: conn.execute(
+                "DELETE FROM lightrag_vectors WHERE workspace = %s AND namespace = %s AND id = ANY(%s)",
+                (self._workspace, self.namespace, ids),
+            )
+        )
+
+    @override
+    async def delete_entity_relation(self, entity_name: str) -> None:
+        await self._run(
+            lambda conn: conn.execute(
+                "DELETE FROM lightrag_vectors WHERE workspace = %s AND namespace = %s "
+                "AND (meta->>'src_id' = %s OR meta->>'tgt_id' = %s)",
+                (self._workspace, self.namespace, entity_name, entity_name),
+            )
+        )
+
+    @override
+    async def get_by_ids(self, ids: List[str]) -> List[Dict[str, Any]]:
+        if not ids:
+            return []
+        rows = await self._run(
+            lambda conn: conn.execute(
+                "SELECT id, meta, created_at FROM lightrag_vectors "
+                "WHERE workspace = %s AND namespace = %s AND id = ANY(%s)",
+                (self._workspace, self.namespace, ids),
+            ).fetchall()
+        )
+        stored = {
+            row["id"]: {
+                **row["meta"],
+                "__id__": row["id"],
+                "__created_at__": row["created_at"],
+            }
+            for row in rows
+        }
+        return [stored[record_id] for record_id in ids if record_id in stored]
+
+    async def search_by_prefix(self, prefix: str) -> List[Dict[str, Any]]:
+        """Return the records whose id starts with `prefix`."""
+        rows = await self._run(
+            lambda conn: conn.execute(
+                "SELECT id, meta, created_at FROM lightrag_vectors "
+                "WHERE workspace = %s AND namespace = %s AND left(id, %s) = %s",
+                (self._workspace, self.namespace, len(prefix), prefix),
+            ).fetchall()
+        )
+        return [
+            {
+                **row["meta"],
+                "__id__": row["id"],
+                "id": row["id"],
+                "__created_at__": row["created_at"],
+            }
+            for row in rows
+        ]
+
+    @override
+    async def index_done_callback(self) -> bool:
+        # Every write is committed as it happens
+        return True
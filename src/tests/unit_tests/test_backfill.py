@@ -0,0 +1,113 @@
+import json
+import subprocess
+import sys
+
+from benchmarks.startup import SRC_DIR
+from react_agent.backfill import iter_reports
+
+
+def write_ndjson(path, records):
+    path.write_text(
+        "\n".join(r if isinstance(r, str) else json.dumps(r) for r in records) + "\n"
+    )
+
+
+def test_iter_reports_directory_and_ndjson(tmp_path) -> None:
+    (tmp_path / "reports" / "b").mkdir(parents=True)
+    (tmp_path / "reports" / "a.txt").write_text("first")
+    (tmp_path / "reports" / "b" / "c.md").write_text("second")
+    (tmp_path / "reports" / "ignored.json").write_text("{}")
+    assert list(iter_reports(str(tmp_path / "reports"))) == [
+        ("first", "a.txt"),
+        ("second", "b/c.md"),
+    ]
+
+    write_ndjson(
+        tmp_path / "reports.ndjson",
+        [
+            {"namespace": "prod", "date": "2025-03-24", "report": "r1"},
+            '"plain string"',
+            "not json",
+            {"other": 1},
+        ],
+    )
+    assert list(iter_reports(str(tmp_path / "reports.ndjson"))) == [
+        ("r1", "prod/2025-03-24"),
+        ("plain string", "reports.ndjson:2"),
+        None,
+        None,
+    ]
+
+
+BACKFILL = """
+import argparse, asyncio, json, sys
+from benchmarks.environment import install
+from benchmarks.fakes import FakeModelConfig
+
+install(sys.argv[1], FakeModelConfig(llm_latency=0, llm_tokens_per_second=0, embed_latency=0, embed_per_text=0))
+import backfill_ltm
+from lightrag import LightRAG
+
+def backfill(source, checkpoint):
+    args = argparse.Namespace(
+        source=source, checkpoint=checkpoint, namespace=None, batch_size=2, parallel_docs=2, max_llm_calls=4,
+    )
+    progress = asyncio.run(backfill_ltm.run(args))
+    return [progress.read, progress.inserted, progress.skipped]
+
+ainsert = LightRAG.ainsert
+calls = []
+
+async def interrupted(self, *args, **kwargs):
+    calls.append(1)
+    if len(calls) == 2:
+        raise RuntimeError("interrupted")
+    return await ainsert(self, *args, **kwargs)
+
+LightRAG.ainsert = interrupted
+try:
+    backfill(sys.argv[2], sys.argv[3])
+except RuntimeError:
+    print(json.load(open(sys.argv[3]))["read"])
+LightRAG.ainsert = ainsert
+print(backfill(sys.argv[2], sys.argv[3]))
+print(backfill(sys.argv[4], sys.argv[3] + ".other"))
+"""
+
+
+def test_backfills_a_real_lightrag(tmp_path) -> None:
+    # LightRAG on the benchmark fakes, in a fresh process as the fakes must be installed before react_agent
+    first, second = tmp_path / "first.ndjson", tmp_path / "second.ndjson"
+    checkpoint = tmp_path / "checkpoint.json"
+    write_ndjson(
+        first,
+        [
+            {"report": f"Gateway {name} restarted."}
+            for name in ("A", "B", "A", "C", "D")
+        ],
+    )
+    write_ndjson(
+        second, [{"report": "Gateway C restarted."}, {"report": "Gateway E restarted."}]
+    )
+
+    env = {"PATH": "/usr/bin:/bin", "PYTHONPATH": SRC_DIR}
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            BACKFILL,
+            str(tmp_path / "work"),
+            str(first),
+            str(checkpoint),
+            str(second),
+        ],
+        cwd=tmp_path,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=240,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    # Interrupted in the second batch; the rerun resumes after the first and skips the duplicate
+    # report, and reports already in the LTM are skipped by a later backfill
+    assert result.stdout.splitlines()[-3:] == ["2", "[5, 4, 1]", "[2, 1, 1]"]
@@ -0,0 +1,110 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import openai
+
+from react_agent.batch import DeploymentLimiter, run_batch
+
+
+class FakeGraph:
+    def __init__(self, failures=None, delay=0.01):
+        self.failures = dict(failures or {})
+        self.delay = delay
+        self.running = 0
+        self.max_running = 0
+        self.calls = []
+
+    async def ainvoke(self, graph_input, config=None):
+        namespace = graph_input["namespace"]
+        self.calls.append((namespace, graph_input["data"]))
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.failures.get(namespace):
+                self.failures[namespace].pop(0)
+                raise openai.RateLimitError(
+                    "rate limited",
+                    response=httpx.Response(
+                        429, request=httpx.Request("POST", "http://azure")
+                    ),
+                    body=None,
+                )
+            if namespace == "broken":
+                raise ValueError("bad data")
+        finally:
+            self.running -= 1
+
+    async def aget_state(self, config):
+        interrupt = SimpleNamespace(
+            value={"report": config["configurable"]["thread_id"]}
+        )
+        return SimpleNamespace(tasks=[SimpleNamespace(interrupts=[interrupt])])
+
+
+def test_runs_jobs_concurrently_within_limit() -> None:
+    graph = FakeGraph()
+    jobs = [{"namespace": f"ns{i}", "data": []} for i in range(10)]
+
+    results = asyncio.run(run_batch(graph, jobs, max_concurrency=3))
+
+    assert graph.max_running == 3
+    assert [result["namespace"] for result in results] == [f"ns{i}" for i in range(10)]
+    assert all(result["status"] == "waiting" for result in results)
+    assert results[0]["human_interrupt"] == {"report": "ns0"}
+
+
+def test_same_namespace_jobs_are_merged() -> None:
+    graph = FakeGraph()
+    jobs = [{"namespace": "ns", "data": [i]} for i in range(3)] + [
+        {"namespace": "other", "data": [9]}
+    ]
+
+    results = asyncio.run(run_batch(graph, jobs, max_concurrency=3))
+
+    # One run (and one pending approval) per namespace, with the records in input order
+    assert graph.calls == [("ns", [0, 1, 2]), ("other", [9])]
+    assert [result["merged_jobs"] for result in results] == [3, 3, 3, 1]
+    assert all(result["status"] == "waiting" for result in results)
+
+
+def test_retries_rate_limits_and_reports_errors() -> None:
+    graph = FakeGraph(failures={"limited": [1, 2], "exhausted": [1, 2, 3]})
+    jobs = [
+        {"namespace": name, "data": []} for name in ("limited", "exhausted", "broken")
+    ]
+
+    results = asyncio.run(run_batch(graph, jobs, retries=2, backoff=0.001))
+
+    assert results[0]["status"] == "waiting"
+    assert results[0]["attempts"] == 3
+    assert results[1]["status"] == "error"
+    assert results[1]["attempts"] == 3
+    assert results[2] == {
+        **results[2],
+        "status": "error",
+        "error": "bad data",
+        "attempts": 1,
+    }
+
+
+def test_deployment_limiter_caps_in_flight_calls() -> None:
+    limiter = DeploymentLimiter({"advanced": 2}, default_limit=5)
+    running = {"advanced": 0, "other": 0}
+    peak = {"advanced": 0, "other": 0}
+
+    async def call(deployment):
+        async with limiter.aslot(deployment):
+            running[deployment] += 1
+            peak[deployment] = max(peak[deployment], running[deployment])
+            await asyncio.sleep(0.01)
+            running[deployment] -= 1
+
+    async def run():
+        await asyncio.gather(
+            *(call("advanced") for _ in range(6)), *(call("other") for _ in range(6))
+        )
+
+    asyncio.run(run())
+    assert peak == {"advanced": 2, "other": 5}
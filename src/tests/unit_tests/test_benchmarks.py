@@ -0,0 +1,59 @@
+import asyncio
+
+from benchmarks.environment import ApproximateEncoder
+from benchmarks.fakes import FakeModelConfig, fake_vectors, make_llm_model_func
+from benchmarks.stats import percentile, summarize
+
+NO_LATENCY = FakeModelConfig(
+    llm_latency=0,
+    llm_tokens_per_second=0,
+    embed_latency=0,
+    embed_per_text=0,
+    output_tokens=20,
+)
+
+
+def test_summarize_percentiles() -> None:
+    assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.5
+    summary = summarize([0.1, 0.2, 0.3, 0.4, 1.0], elapsed=2.0, errors=1)
+    assert summary["n"] == 5 and summary["errors"] == 1
+    assert summary["p50_ms"] == 300.0 and summary["max_ms"] == 1000.0
+    assert summary["throughput_per_s"] == 2.5
+    assert summarize([]) == {"n": 0, "errors": 0}
+
+
+def test_fake_llm_answers_lightrag_prompts() -> None:
+    llm = make_llm_model_func(NO_LATENCY)
+
+    async def run():
+        extraction = await llm(
+            "---Real Data---\nEntity_types: [event]\nText:\nSyncoid moved Backup data.\n######################\nOutput: <|>"
+        )
+        keywords = await llm(
+            "Current Query: what failed on Gateway\n######", keyword_extraction=True
+        )
+        answer = await llm("Summarise the context")
+        return extraction, keywords, answer, await llm("Summarise the context")
+
+    extraction, keywords, answer, again = asyncio.run(run())
+    assert (
+        '("entity"<|>Syncoid<|>' in extraction
+        and '("relationship"<|>Syncoid<|>Backup<|>' in extraction
+    )
+    assert extraction.endswith("<|COMPLETE|>")
+    assert '"low_level_keywords": ["Gateway"]' in keywords
+    assert len(answer.split()) == 20 and answer == again
+
+
+def test_fake_vectors_are_deterministic_unit_vectors() -> None:
+    a, b = fake_vectors(["x", "y"], 8), fake_vectors(["x"], 8)
+    assert (a[0] == b[0]).all() and not (a[0] == a[1]).all()
+    assert abs(float((a[0] ** 2).sum()) - 1.0) < 1e-5
+
+
+def test_approximate_encoder_round_trips() -> None:
+    encoder = ApproximateEncoder()
+    tokens = encoder.encode("hello world, hello")
+    assert len(tokens) == 5
+    assert encoder.decode(tokens[1:3]) == "o world,"
+    assert encoder.decode(tokens) == "hello world, hello"
@@ -0,0 +1,60 @@
+import time
+
+from react_agent.cache import StoreItemCache, TTLCache
+
+
+class FakeStore:
+    def __init__(self):
+        self.data = {}
+        self.gets = 0
+
+    def get(self, namespace, key):
+        self.gets += 1
+        return self.data.get((namespace, key))
+
+    def put(self, namespace, key, value):
+        self.data[(namespace, key)] = value
+
+
+def test_ttl_cache_expires_and_evicts() -> None:
+    cache = TTLCache(maxsize=2, ttl=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+    time.sleep(0.06)
+    assert cache.get("a") is None
+
+
+def test_store_item_cache_reads_through_and_invalidates_on_put() -> None:
+    store = FakeStore()
+    cache = StoreItemCache()
+
+    assert cache.get(store, ("stm",), "ns") is None
+    assert cache.get(store, ("stm",), "ns") is None
+    assert store.gets == 1
+
+    cache.put(store, ("stm",), "ns", {"report": "new"})
+    assert cache.get(store, ("stm",), "ns") == {"report": "new"}
+    assert store.gets == 2
+
+
+def test_store_item_cache_skips_fill_raced_by_put() -> None:
+    cache = StoreItemCache()
+
+    class RacingStore(FakeStore):
+        def get(self, namespace, key):
+            value = super().get(namespace, key)
+            # A write lands while this read is in flight
+            if value == "old":
+                cache.put(self, namespace, key, "new")
+            return value
+
+    store = RacingStore()
+    store.put(("stm",), "ns", "old")
+    assert cache.get(store, ("stm",), "ns") == "old"
+    assert cache.get(store, ("stm",), "ns") == "new"
+    assert store.gets == 2
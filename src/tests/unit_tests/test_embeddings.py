@@ -0,0 +1,80 @@
+import asyncio
+
+import numpy as np
+
+from react_agent.embeddings import CachedEmbedder, EmbeddingCache
+
+
+def _fake_embed(calls):
+    def embed(texts):
+        calls.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+    return embed
+
+
+def test_embedder_dedupes_batches_and_caches(tmp_path) -> None:
+    calls = []
+    embedder = CachedEmbedder(
+        model="test",
+        cache=EmbeddingCache(str(tmp_path / "cache.sqlite")),
+        embed_fn=_fake_embed(calls),
+        max_batch_size=2,
+    )
+
+    vectors = embedder.embed(["a", "bb", "a", "ccc"])
+    assert vectors.dtype == np.float32
+    assert vectors.shape == (4, 2)
+    assert vectors[0].tolist() == vectors[2].tolist()
+    assert calls == [["a", "bb"], ["ccc"]]
+
+    embedder.embed(["bb", "ccc"])
+    assert len(calls) == 2
+    assert embedder.cache.stats()["hits"] == 2
+
+
+def test_cache_evicts_least_recently_used(tmp_path) -> None:
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite"), max_entries=2)
+    cache.put_many({"a": np.zeros(2)})
+    cache.put_many({"b": np.zeros(2)})
+    cache.get_many(["a"])
+    cache.put_many({"c": np.zeros(2)})
+
+    assert set(cache.get_many(["a", "b", "c"])) == {"a", "c"}
+
+
+def test_async_embedder_uses_async_fn(tmp_path) -> None:
+    calls = []
+    sync_embed = _fake_embed(calls)
+
+    async def aembed(texts):
+        return sync_embed(texts)
+
+    embedder = CachedEmbedder(
+        model="test",
+        cache=EmbeddingCache(str(tmp_path / "cache.sqlite")),
+        aembed_fn=aembed,
+    )
+    vectors = asyncio.run(embedder.aembed(["x", "x"]))
+    assert vectors.shape == (2, 2)
+    assert calls == [["x"]]
+
+
+def test_cache_reads_buffer_last_used_updates(tmp_path) -> None:
+    cache = EmbeddingCache(
+        str(tmp_path / "cache.sqlite"), max_entries=10, touch_batch_size=2
+    )
+    cache.put_many({"a": np.zeros(2), "b": np.zeros(2)})
+    cache.put_many({"a": np.ones(2)})
+    assert cache.stats()["entries"] == 2
+
+    def last_used(key):
+        return cache._conn.execute(
+            "SELECT last_used FROM embeddings WHERE key = ?", (key,)
+        ).fetchone()[0]
+
+    stored = last_used("a")
+    cache.get_many(["a"])
+    assert last_used("a") == stored
+    cache.get_many(["b"])
+    assert last_used("a") > stored
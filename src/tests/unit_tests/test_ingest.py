@@ -0,0 +1,201 @@
+import asyncio
+import json
+
+import pytest
+
+from react_agent.ingest import BufferFullError, MicroBatcher
+
+
+def test_flushes_on_record_threshold() -> None:
+    flushed = []
+
+    async def flush_fn(namespace, records):
+        flushed.append((namespace, list(records)))
+
+    async def run():
+        batcher = MicroBatcher(flush_fn, max_records=3, max_wait=60)
+        batcher.add("ns", [{"content": "a"}, {"content": "b"}])
+        assert flushed == []
+        result = batcher.add("ns", [{"content": "c"}])
+        assert result["flushing"]
+        await batcher.stop()
+
+    asyncio.run(run())
+    assert flushed == [("ns", [{"content": "a"}, {"content": "b"}, {"content": "c"}])]
+
+
+def test_flushes_on_time_window() -> None:
+    flushed = []
+
+    async def flush_fn(namespace, records):
+        flushed.append(len(records))
+
+    async def run():
+        batcher = MicroBatcher(flush_fn, max_records=100, max_wait=0.05, tick=0.01)
+        batcher.start()
+        batcher.add("ns", [{"content": "a"}])
+        await asyncio.sleep(0.2)
+        assert batcher.status("ns")["flushes"] == 1
+        await batcher.stop()
+
+    asyncio.run(run())
+    assert flushed == [1]
+
+
+def test_rejects_when_buffer_full() -> None:
+    async def flush_fn(namespace, records):
+        pass
+
+    async def run():
+        batcher = MicroBatcher(flush_fn, max_records=100, max_buffered_records=2)
+        batcher.add("ns", [{}, {}])
+        with pytest.raises(BufferFullError):
+            batcher.add("ns", [{}])
+        batcher.add("other", [{}])
+        await batcher.stop()
+
+    asyncio.run(run())
+
+
+def test_failed_flushes_are_retried_then_dead_lettered(tmp_path) -> None:
+    calls = []
+
+    async def flush_fn(namespace, records):
+        calls.append(namespace)
+        if namespace == "bad" or len(calls) == 1:
+            raise RuntimeError("graph unavailable")
+
+    dead_letter = tmp_path / "dead.ndjson"
+
+    async def run():
+        batcher = MicroBatcher(
+            flush_fn,
+            max_flush_attempts=2,
+            retry_backoff=0.01,
+            dead_letter_path=str(dead_letter),
+        )
+        batcher.add("ok", [{"content": "a"}])
+        await batcher.flush("ok")
+        batcher.add("bad", [{"content": "b"}])
+        await batcher.flush("bad")
+        return batcher.status("ok"), batcher.status("bad")
+
+    ok, bad = asyncio.run(run())
+    assert calls == ["ok", "ok", "bad", "bad"]
+    assert (ok["failed_flushes"], ok["dead_lettered_records"], ok["last_error"]) == (
+        1,
+        0,
+        None,
+    )
+    assert (
+        bad["failed_flushes"],
+        bad["dead_lettered_records"],
+        bad["dropped_records"],
+    ) == (2, 1, 0)
+    assert json.loads(dead_letter.read_text())["records"] == [{"content": "b"}]
+
+
+def test_windows_wait_for_pending_approval(tmp_path) -> None:
+    flushed = []
+    pending = {"ns"}
+
+    async def flush_fn(namespace, records):
+        flushed.append([record["content"] for record in records])
+        pending.add(namespace)
+
+    async def ready_fn(namespace):
+        return namespace not in pending
+
+    dead_letter = tmp_path / "dead.ndjson"
+
+    async def run():
+        batcher = MicroBatcher(
+            flush_fn,
+            max_records=1,
+            ready_fn=ready_fn,
+            ready_poll=0.01,
+            dead_letter_path=str(dead_letter),
+        )
+        batcher.add("ns", [{"content": "a"}])
+        await asyncio.sleep(0.05)
+        # Held while the previous report waits for approval
+        assert flushed == []
+        status = batcher.status("ns")
+        assert status["held_since"] is not None and status["in_flight"] == 1
+
+        pending.discard("ns")
+        await asyncio.sleep(0.05)
+        assert flushed == [["a"]] and batcher.status("ns")["held_since"] is None
+
+        # Still held at shutdown: kept in the dead-letter file rather than dropped
+        batcher.add("ns", [{"content": "b"}])
+        await batcher.stop()
+        return batcher.status("ns")
+
+    status = asyncio.run(run())
+    assert flushed == [["a"]]
+    assert status["dead_lettered_records"] == 1
+    assert json.loads(dead_letter.read_text())["records"] == [{"content": "b"}]
+
+
+def _collect(
+    chunks, compression="none", max_line_bytes=1_000_000, max_total_bytes=None
+):
+    from react_agent.ingest import iter_ndjson
+
+    async def agen():
+        for chunk in chunks:
+            yield chunk
+
+    async def run():
+        return [
+            value
+            async for value in iter_ndjson(
+                agen(), compression, max_line_bytes, max_total_bytes
+            )
+        ]
+
+    return asyncio.run(run())
+
+
+def test_iter_ndjson_handles_split_lines_and_gzip() -> None:
+    import gzip
+
+    body = b'{"content": "a"}\n\n{"content": "b"}\nnot json\n{"content": "c"}'
+    assert _collect([body[:7], body[7:30], body[30:]])[:2] == [
+        {"content": "a"},
+        {"content": "b"},
+    ]
+
+    values = _collect(
+        [gzip.compress(body[:20]) + gzip.compress(body[20:])], compression="gzip"
+    )
+    assert values[0] == {"content": "a"} and values[-1] == {"content": "c"}
+    assert isinstance(values[2], ValueError)
+
+
+def test_iter_ndjson_rejects_oversized_lines() -> None:
+    from react_agent.ingest import UploadError
+
+    with pytest.raises(UploadError):
+        _collect([b"x" * 100], max_line_bytes=10)
+
+
+def test_iter_ndjson_decompresses_in_bounded_steps() -> None:
+    import gzip
+
+    from react_agent.ingest import DECOMPRESS_STEP_BYTES, UploadError, _GzipDecoder
+
+    bomb = gzip.compress(b"x" * 5_000_000)
+    assert (
+        max(len(piece) for piece in _GzipDecoder().feed(bomb)) <= DECOMPRESS_STEP_BYTES
+    )
+
+    body = b'{"content": "a"}\n' * 10_000
+    with pytest.raises(UploadError):
+        _collect([gzip.compress(body)], compression="gzip", max_total_bytes=100_000)
+    zstandard = pytest.importorskip("zstandard")
+    assert (
+        len(_collect([zstandard.ZstdCompressor().compress(body)], compression="zstd"))
+        == 10_000
+    )
@@ -0,0 +1,119 @@
+import asyncio
+import time
+
+import pytest
+
+from react_agent.jobs import DONE, FAILED, QUEUED, RUNNING, JobQueue, JobWorker
+
+
+def test_jobs_run_in_order_per_namespace(tmp_path) -> None:
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"))
+    first = queue.enqueue("a", "step", {"n": 1})
+    queue.enqueue("a", "step", {"n": 2})
+    other = queue.enqueue("b", "step", {"n": 3})
+
+    claimed = queue.claim()
+    assert claimed["id"] == first
+    # The second "a" job waits for the first; "b" can run concurrently.
+    assert queue.claim()["id"] == other
+    assert queue.claim() is None
+
+
+def test_worker_retries_then_fails(tmp_path) -> None:
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"), max_attempts=2, retry_backoff=0)
+    seen = []
+
+    def handler(namespace, payload):
+        seen.append(payload["n"])
+        if payload["n"] == 2:
+            raise ValueError("boom")
+
+    worker = JobWorker(queue, {"step": handler})
+    queue.enqueue("a", "step", {"n": 1})
+    queue.enqueue("a", "step", {"n": 2})
+    while worker.run_once():
+        pass
+
+    assert seen == [1, 2, 2]
+    statuses = [job["status"] for job in reversed(queue.status("a"))]
+    assert statuses == [DONE, FAILED]
+
+
+def test_only_expired_leases_are_requeued(tmp_path) -> None:
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"), lease_seconds=60)
+    queue.enqueue("a", "step", {})
+    job = queue.claim()
+    # A second process starting up must not steal a job that is still leased
+    assert queue.requeue_expired() == 0
+
+    queue.lease_seconds = 0
+    time.sleep(0.01)
+    assert queue.requeue_expired() == 1
+    assert queue.status("a")[0]["status"] == QUEUED
+
+    # The worker whose lease lapsed can no longer complete the re-claimed job
+    reclaimed = queue.claim()
+    queue.complete(job["id"], job["attempts"])
+    assert queue.status("a")[0]["status"] == RUNNING
+    queue.complete(reclaimed["id"], reclaimed["attempts"])
+    assert queue.status("a")[0]["status"] == DONE
+
+
+def test_failed_jobs_back_off(tmp_path) -> None:
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"), retry_backoff=60)
+    queue.enqueue("a", "step", {})
+    job = queue.claim()
+    queue.fail(job["id"], "boom", job["attempts"])
+    assert queue.status("a")[0]["status"] == QUEUED
+    assert queue.claim() is None
+
+
+def test_ltm_coroutines_run_on_the_dedicated_loop(monkeypatch) -> None:
+    from contextlib import asynccontextmanager
+
+    from react_agent import utils
+
+    async def current_loop():
+        return asyncio.get_running_loop()
+
+    async def blocking_call():
+        # Would deadlock the LightRAG loop
+        return utils.run_on_rag_loop(current_loop)
+
+    class Rag:
+        async def aquery(self, query):
+            async def chunks():
+                for word in query.split():
+                    yield (word, asyncio.get_running_loop())
+
+            return chunks()
+
+    @asynccontextmanager
+    async def rag_for(namespace=None):
+        yield Rag()
+
+    monkeypatch.setattr(utils, "arag_for", rag_for)
+
+    async def serve():
+        serving = asyncio.get_running_loop()
+        assert await utils.arun_on_rag_loop(current_loop) is loop
+        # A job worker thread submits to the same loop rather than running its own
+        assert await asyncio.to_thread(utils.run_on_rag_loop, current_loop) is loop
+        with pytest.raises(RuntimeError):
+            await utils.arun_on_rag_loop(blocking_call)
+        # Streamed items are produced on the LightRAG loop and consumed on the serving one
+        chunks = [
+            chunk
+            async for chunk in utils.astream_with_rag(
+                "ns", lambda rag: rag.aquery("a b c"), max_pending=1
+            )
+        ]
+        assert chunks == [("a", loop), ("b", loop), ("c", loop)]
+        assert serving is not loop
+
+    loop = utils.start_rag_loop()
+    try:
+        asyncio.run(serve())
+    finally:
+        utils.stop_rag_loop()
+    assert loop.is_closed()
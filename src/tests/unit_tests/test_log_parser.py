@@ -0,0 +1,50 @@
+from react_agent.log_parser import mask_tokens, parse_line, summarize_logs
+
+
+def test_parse_line() -> None:
+    line = parse_line(
+        "WARN [2025-05-01 07:45:22] [security.camera] Motion detected at Front Door."
+    )
+    assert line.level == "WARN"
+    assert line.timestamp == "2025-05-01 07:45:22"
+    assert line.component == "security.camera"
+    assert line.message == "Motion detected at Front Door."
+    assert parse_line("not a log line") is None
+
+
+def test_mask_tokens() -> None:
+    assert mask_tokens("Battery level: 72%. User 'emma' at /storage/x.jpg") == [
+        "Battery",
+        "level:",
+        "<*>",
+        "User",
+        "<*>",
+        "at",
+        "<*>",
+    ]
+
+
+def test_summarize_collapses_repeats_and_keeps_errors() -> None:
+    lines = [
+        f"INFO [2025-05-01 06:{minute:02d}:00] [thermostat.sensor] Current temp: 20.{minute}°C. Heating ON."
+        for minute in range(50)
+    ]
+    lines.append(
+        "ERROR [2025-05-01 10:35:00] [garage.door] Sensor malfunction detected. Status: UNKNOWN."
+    )
+    lines.append(
+        "ERROR [2025-05-01 10:35:00] [garage.door] Sensor malfunction detected. Status: UNKNOWN."
+    )
+
+    summary = summarize_logs(lines)
+
+    assert "52 lines, 2 message templates" in summary
+    assert (
+        "| 50 | INFO | thermostat.sensor | 2025-05-01 06:00:00 | 2025-05-01 06:49:00 |"
+        in summary
+    )
+    assert "Sensor malfunction detected. Status: UNKNOWN. (x2)" in summary
+
+
+def test_summarize_skips_free_text() -> None:
+    assert summarize_logs(["hello there", "general kenobi"]) is None
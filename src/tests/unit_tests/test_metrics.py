@@ -0,0 +1,108 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+from langgraph.store.base import GetOp, PutOp, SearchOp
+
+from react_agent.metrics import LLMMetricsHandler, Metrics, store_op_labels
+
+
+def test_render_counters_histograms_and_collectors() -> None:
+    metrics = Metrics(buckets=(0.1, 1.0))
+    metrics.inc("llm_tokens_total", 5, deployment="gpt", type="prompt")
+    metrics.inc("llm_tokens_total", 2, deployment="gpt", type="prompt")
+    metrics.observe("node_seconds", 0.5, node="generate_report")
+    metrics.add_collector(
+        lambda: [("cache_hit_ratio", "gauge", {"cache": "store"}, 0.25)]
+    )
+
+    text = metrics.render()
+    assert "# TYPE intelligent_index_llm_tokens_total counter" in text
+    assert (
+        'intelligent_index_llm_tokens_total{deployment="gpt",type="prompt"} 7' in text
+    )
+    assert (
+        'intelligent_index_node_seconds_bucket{node="generate_report",le="0.1"} 0'
+        in text
+    )
+    assert (
+        'intelligent_index_node_seconds_bucket{node="generate_report",le="1.0"} 1'
+        in text
+    )
+    assert (
+        'intelligent_index_node_seconds_bucket{node="generate_report",le="+Inf"} 1'
+        in text
+    )
+    assert 'intelligent_index_node_seconds_count{node="generate_report"} 1' in text
+    assert 'intelligent_index_cache_hit_ratio{cache="store"} 0.25' in text
+
+
+def test_instrument_labels_errors_for_sync_and_async() -> None:
+    metrics = Metrics()
+
+    @metrics.instrument("job_seconds", kind="update_stm")
+    def job(fail):
+        if fail:
+            raise ValueError("boom")
+
+    @metrics.instrument("node_seconds", node="generate_report")
+    async def node():
+        return "done"
+
+    job(False)
+    with pytest.raises(ValueError):
+        job(True)
+    assert asyncio.run(node()) == "done"
+
+    text = metrics.render()
+    assert (
+        'intelligent_index_job_seconds_count{kind="update_stm",status="ok"} 1' in text
+    )
+    assert (
+        'intelligent_index_job_seconds_count{kind="update_stm",status="error"} 1'
+        in text
+    )
+    assert (
+        'intelligent_index_node_seconds_count{node="generate_report",status="ok"} 1'
+        in text
+    )
+
+
+def test_llm_handler_records_tokens_and_cost() -> None:
+    metrics = Metrics()
+    handler = LLMMetricsHandler(
+        metrics, "gpt", prices={"gpt": {"prompt": 1.0, "completion": 2.0}}
+    )
+    run_id = uuid4()
+    message = AIMessage(
+        content="hi",
+        usage_metadata={
+            "input_tokens": 1000,
+            "output_tokens": 500,
+            "total_tokens": 1500,
+        },
+    )
+    handler.on_chat_model_start({}, [[]], run_id=run_id)
+    handler.on_llm_end(
+        LLMResult(generations=[[ChatGeneration(message=message)]]), run_id=run_id
+    )
+
+    text = metrics.render()
+    assert 'intelligent_index_llm_seconds_count{deployment="gpt",status="ok"} 1' in text
+    assert (
+        'intelligent_index_llm_tokens_total{deployment="gpt",type="completion"} 500'
+        in text
+    )
+    assert 'intelligent_index_llm_cost_total{deployment="gpt"} 2' in text
+
+    assert store_op_labels([GetOp(("stm",), "a")]) == {"op": "get", "namespace": "stm"}
+    assert store_op_labels([SearchOp(("episodes", "a"))]) == {
+        "op": "search",
+        "namespace": "episodes",
+    }
+    assert store_op_labels([GetOp(("stm",), "a"), PutOp(("stm",), "a", {})]) == {
+        "op": "batch",
+        "namespace": "",
+    }
@@ -0,0 +1,71 @@
+import asyncio
+
+from react_agent.partitions import PartitionLRU
+
+
+class Instances:
+    def __init__(self):
+        self.created = []
+        self.closed = []
+
+    async def create(self, partition):
+        await asyncio.sleep(0)
+        self.created.append(partition)
+        return {"partition": partition}
+
+    async def close(self, instance):
+        self.closed.append(instance["partition"])
+
+
+def test_evicts_least_recently_used() -> None:
+    instances = Instances()
+    lru = PartitionLRU(2, instances.create, instances.close)
+
+    async def run():
+        for partition in ["a", "b", "a", "c"]:
+            async with lru.use(partition) as instance:
+                assert instance["partition"] == partition
+
+    asyncio.run(run())
+    assert instances.created == ["a", "b", "c"]
+    assert instances.closed == ["b"]
+    assert lru.open_partitions() == ["a", "c"]
+
+
+def test_keeps_partitions_in_use_open() -> None:
+    instances = Instances()
+    lru = PartitionLRU(1, instances.create, instances.close)
+
+    async def run():
+        async with lru.use("a"):
+            async with lru.use("b"):
+                # Over the limit, but both are held
+                assert instances.closed == []
+                assert lru.open_partitions() == ["a", "b"]
+            # "b" is the most recent, but "a" is still held
+            assert instances.closed == ["b"]
+        assert lru.open_partitions() == ["a"]
+        await lru.close()
+
+    asyncio.run(run())
+    assert instances.closed == ["b", "a"]
+
+
+def test_concurrent_requests_create_once() -> None:
+    instances = Instances()
+    lru = PartitionLRU(4, instances.create, instances.close)
+
+    async def use(partition):
+        async with lru.use(partition) as instance:
+            return instance
+
+    async def run():
+        results = await asyncio.gather(*(use("a") for _ in range(5)))
+        assert instances.created == ["a"]
+        assert all(result is results[0] for result in results)
+
+        assert await use("a") is results[0]
+        await use("b")
+        assert instances.created == ["a", "b"]
+
+    asyncio.run(run())
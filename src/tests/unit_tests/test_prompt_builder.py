@@ -0,0 +1,91 @@
+from react_agent.prompt_builder import (
+    PromptBudget,
+    TokenCounter,
+    group_for_reduce,
+    group_texts,
+    plan_report,
+    split_records,
+)
+
+
+def _formatter(data):
+    return "\n".join(
+        f"Date: {entry.get('date')}\n{entry.get('content')}" for entry in data
+    )
+
+
+def _counter():
+    # An unknown encoding falls back to the deterministic character estimate.
+    return TokenCounter("not-a-real-encoding")
+
+
+def test_small_payload_is_a_single_chunk() -> None:
+    data = [{"date": "2025-05-01", "content": "INFO ok"}]
+    plan = plan_report(
+        "Instructions", "stm", "", data, _counter(), PromptBudget(), _formatter
+    )
+    assert plan.chunks == [data]
+    assert plan.token_usage["chunks"] == 1
+    assert "Short Term Memory: stm" in plan.system
+
+
+def test_stm_is_trimmed_and_data_chunked() -> None:
+    data = [{"date": str(i), "content": "x" * 400} for i in range(10)]
+    budget = PromptBudget(
+        max_input_tokens=400, stm_tokens=10, episodic_tokens=10, min_data_tokens=50
+    )
+    plan = plan_report(
+        "Instructions", "s" * 1000, "", data, _counter(), budget, _formatter
+    )
+
+    assert plan.token_usage["stm"] < plan.token_usage["stm_original"]
+    assert len(plan.chunks) > 1
+    assert [entry["date"] for chunk in plan.chunks for entry in chunk] == [
+        str(i) for i in range(10)
+    ]
+
+
+def test_oversized_record_is_split_by_lines() -> None:
+    record = {
+        "date": "d",
+        "content": "\n".join("line %d %s" % (i, "y" * 40) for i in range(20)),
+    }
+    chunks = split_records([record], 100, _counter(), _formatter)
+    assert len(chunks) > 1
+    assert all(entry["date"] == "d" for chunk in chunks for entry in chunk)
+
+
+def test_group_texts_respects_budget() -> None:
+    groups = group_texts(["a" * 60, "b" * 60, "c" * 60], 20, _counter())
+    assert groups == [["a" * 60], ["b" * 60], ["c" * 60]]
+    assert group_texts(["a", "b"], 20, _counter()) == [["a", "b"]]
+
+
+def test_reduce_groups_always_shrink() -> None:
+    # No two partial reports fit together: they are truncated and paired instead
+    texts = ["a" * 60, "b" * 60, "c" * 60]
+    rounds = 0
+    while len(texts) > 1:
+        groups = group_for_reduce(texts, 20, _counter())
+        assert len(groups) < len(texts)
+        texts = ["".join(group) for group in groups]
+        rounds += 1
+    assert rounds == 2
+
+
+def test_episodic_query_fits_the_embedding_input() -> None:
+    from react_agent import utils
+
+    data = [
+        {
+            "namespace": "ns",
+            "date": "2025-03-29",
+            "content": f"ERROR [2025-03-29 06:12:{i % 60:02d}] [disk{i % 7}] Disk {i} failed",
+        }
+        for i in range(20_000)
+    ]
+    query = utils.episodic_query("Summarise the logs", data)
+    assert query.startswith("Instructions: Summarise the logs\n\nData:\n")
+    assert (
+        utils.get_token_counter().count(query) <= utils.EPISODIC_QUERY_MAX_TOKENS + 20
+    )
@@ -0,0 +1,139 @@
+import asyncio
+import json
+
+import httpx
+from fastapi import FastAPI, HTTPException
+
+from benchmarks.replay import endpoint_label, replay, schedule, synthesize_log
+from react_agent.recording import RequestRecorder
+
+DATA = [{"date": "2025-05-01T06:12:34Z", "content": "INFO thermostat set"}]
+
+
+def test_schedule_keeps_namespace_order_and_suffixes() -> None:
+    entries = synthesize_log(
+        3, feedback_ratio=1.0, interval=1.0, think_time=2.0, data=DATA
+    )
+    entries.append(
+        {"t": 1.5, "method": "GET", "path": "/retrieve", "params": {"query": "q"}}
+    )
+    entries.sort(key=lambda entry: entry["t"])
+    lanes = schedule(entries, repeat=2, suffix="-x", speed=2.0)
+
+    assert len(lanes) == 6 + 2
+    for lane in lanes[:6]:
+        labels = [endpoint_label(item["entry"]) for item in lane]
+        assert labels == [
+            "POST /invoke (initial)",
+            "POST /invoke (feedback)",
+            "POST /invoke (approve)",
+        ]
+        assert lane[0]["entry"]["body"]["namespace"].endswith(("-x-0", "-x-1"))
+        offsets = [item["offset"] for item in lane]
+        assert offsets == sorted(offsets)
+    assert entries[0]["body"]["namespace"] == "replay-0"
+
+
+def test_replay_reports_per_endpoint_and_errors() -> None:
+    app = FastAPI()
+    seen = []
+
+    @app.post("/invoke")
+    async def invoke(body: dict):
+        seen.append((body["namespace"], "data" in body))
+        if body.get("feedback"):
+            raise HTTPException(status_code=500)
+        return {"status": "waiting"}
+
+    @app.get("/retrieve")
+    async def retrieve(query: str):
+        return {"response": query}
+
+    entries = synthesize_log(
+        2, feedback_ratio=1.0, interval=0.0, think_time=0.0, data=DATA
+    )
+    entries.append(
+        {"t": 0, "method": "GET", "path": "/retrieve", "params": {"query": "q"}}
+    )
+
+    async def run():
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            return await replay(
+                client, schedule(entries, rate=1000.0), concurrency=None
+            )
+
+    report = asyncio.run(run())
+    assert report["requests"] == 7 and report["errors"] == 2
+    assert report["endpoints"]["POST /invoke (feedback)"]["error_codes"] == {"500": 2}
+    assert report["endpoints"]["POST /invoke (initial)"]["n"] == 2
+    assert report["endpoints"]["GET /retrieve"]["n"] == 1
+    assert [initial for namespace, initial in seen if namespace == "replay-0"] == [
+        True,
+        False,
+        False,
+    ]
+
+
+def test_recorder_logs_replayable_requests(tmp_path) -> None:
+    app = FastAPI()
+
+    @app.post("/invoke")
+    async def invoke(body: dict):
+        return {"ok": True}
+
+    @app.get("/jobs")
+    async def jobs():
+        return []
+
+    log = tmp_path / "requests.ndjson"
+    recorder = RequestRecorder(app, str(log))
+
+    async def run():
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=recorder), base_url="http://test"
+        ) as client:
+            await client.post("/invoke", json={"namespace": "a", "approve": "True"})
+            await client.get("/retrieve-short-term", params={"namespace": "a"})
+            await client.get("/jobs")
+
+    asyncio.run(run())
+    recorder.close()
+    lines = [json.loads(line) for line in log.read_text().splitlines()]
+    assert [(line["method"], line["path"]) for line in lines] == [
+        ("POST", "/invoke"),
+        ("GET", "/retrieve-short-term"),
+    ]
+    assert lines[0]["body"] == {"namespace": "a", "approve": "True"}
+    assert lines[1]["params"] == {"namespace": "a"}
+
+
+def test_recorder_skips_oversized_bodies_sent_in_parts(tmp_path, caplog) -> None:
+    received = []
+
+    async def app(scope, receive, send):
+        while True:
+            message = await receive()
+            received.append(message["body"])
+            if not message["more_body"]:
+                return
+
+    log = tmp_path / "requests.ndjson"
+    recorder = RequestRecorder(app, str(log), max_body_bytes=10)
+    messages = [
+        {"type": "http.request", "body": b'{"data": "', "more_body": True},
+        {"type": "http.request", "body": b"0123456789", "more_body": True},
+        {"type": "http.request", "body": b'"}', "more_body": False},
+    ]
+
+    async def receive():
+        return messages.pop(0)
+
+    scope = {"type": "http", "method": "POST", "path": "/ingest", "query_string": b""}
+    asyncio.run(recorder(scope, receive, None))
+    recorder.close()
+
+    assert b"".join(received) == b'{"data": "0123456789"}'
+    assert log.read_text() == ""
+    assert "Not recording the body of a /ingest request over 10 bytes" in caplog.text
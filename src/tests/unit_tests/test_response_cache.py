@@ -0,0 +1,101 @@
+import asyncio
+import time
+
+import numpy as np
+
+from react_agent.response_cache import ResponseCache, content_hash, normalize_records
+
+
+def test_exact_hits_and_ttl(tmp_path) -> None:
+    cache = ResponseCache(str(tmp_path / "responses.sqlite"), ttl=60)
+    assert cache.get("report", "k") is None
+    cache.put("report", "k", "a report")
+    assert cache.get("report", "k") == "a report"
+    assert cache.stats()["scopes"]["report"]["hit_ratio"] == 0.5
+
+    expired = ResponseCache(str(tmp_path / "expired.sqlite"), ttl=-1)
+    expired.put("report", "k", "a report")
+    assert expired.get("report", "k") is None
+
+
+def test_near_hits_respect_threshold_and_prefix(tmp_path) -> None:
+    cache = ResponseCache(str(tmp_path / "responses.sqlite"))
+    cache.put(
+        "retrieve", "ltm1:what happened", ["answer"], embedding=np.array([1.0, 0.0])
+    )
+
+    assert cache.nearest(
+        "retrieve", np.array([0.99, 0.05]), 0.95, key_prefix="ltm1:"
+    ) == ["answer"]
+    assert (
+        cache.nearest("retrieve", np.array([0.0, 1.0]), 0.95, key_prefix="ltm1:")
+        is None
+    )
+    assert (
+        cache.nearest("retrieve", np.array([1.0, 0.0]), 0.95, key_prefix="ltm2:")
+        is None
+    )
+
+    # Prefixes are matched literally, not as LIKE patterns
+    cache.put(
+        "retrieve",
+        "ltm:tenant-a@v1:what happened",
+        ["tenant a"],
+        embedding=np.array([1.0, 0.0]),
+    )
+    for prefix in ("ltm:tenant%@v1:", "ltm:tenant_a@v1:", "LTM:TENANT-A@v1:"):
+        assert (
+            cache.nearest("retrieve", np.array([1.0, 0.0]), 0.95, key_prefix=prefix)
+            is None
+        )
+    assert cache.nearest(
+        "retrieve", np.array([1.0, 0.0]), 0.95, key_prefix="ltm:tenant-a@v1:"
+    ) == ["tenant a"]
+
+
+def test_eviction_and_versions(tmp_path) -> None:
+    cache = ResponseCache(str(tmp_path / "responses.sqlite"), max_entries=2)
+    for key in "abc":
+        cache.put("report", key, key)
+    assert cache.stats()["entries"] == 2
+    assert cache.version("ltm") == 0
+    assert cache.bump_version("ltm") == 1
+
+    # Replacing a key does not count as a new entry; the count survives a reopen
+    cache.put("report", "c", "c2")
+    assert cache.stats()["entries"] == 2 and cache.get("report", "b") == "b"
+    assert ResponseCache(str(tmp_path / "responses.sqlite")).stats()["entries"] == 2
+
+
+def test_async_methods(tmp_path) -> None:
+    cache = ResponseCache(str(tmp_path / "responses.sqlite"))
+
+    async def run():
+        await cache.aput(
+            "retrieve", "ltm@v0:q", ["answer"], embedding=np.array([1.0, 0.0])
+        )
+        assert await cache.aget("retrieve", "ltm@v0:q") == ["answer"]
+        assert await cache.anearest(
+            "retrieve", np.array([1.0, 0.0]), 0.9, key_prefix="ltm@v0:"
+        ) == ["answer"]
+        assert await cache.aversion("ltm") == 0
+
+    asyncio.run(run())
+
+
+def test_expired_entries_are_swept_periodically(tmp_path) -> None:
+    cache = ResponseCache(str(tmp_path / "responses.sqlite"), ttl=0.01, expire_every=3)
+    cache.put("report", "a", "a")
+    time.sleep(0.02)
+    assert cache.get("report", "a", count_miss=False) is None
+    cache.put("report", "b", "b")
+    time.sleep(0.02)
+    assert cache.stats()["entries"] == 1
+    cache.put("report", "c", "c")
+    assert cache.stats()["entries"] == 1
+
+
+def test_normalized_data_hash_ignores_whitespace() -> None:
+    a = [{"date": "d", "content": "INFO  one\n  INFO two "}]
+    b = [{"content": "INFO one\nINFO two", "date": "d"}]
+    assert content_hash(normalize_records(a)) == content_hash(normalize_records(b))
@@ -0,0 +1,141 @@
+import asyncio
+
+import networkx as nx
+import pytest
+from lightrag.base import DocStatus
+
+from react_agent.sqlite_storage import (
+    SQLiteDocStatusStorage,
+    SQLiteGraphStorage,
+    SQLiteKVStorage,
+)
+
+
+def make(cls, tmp_path, namespace):
+    return cls(
+        namespace=namespace,
+        global_config={"working_dir": str(tmp_path)},
+        embedding_func=None,
+    )
+
+
+def test_kv_and_llm_cache_rows(tmp_path) -> None:
+    async def run():
+        docs = make(SQLiteKVStorage, tmp_path, "full_docs")
+        await docs.initialize()
+        await docs.upsert({"doc-1": {"content": "one"}, "doc-2": {"content": "two"}})
+        assert await docs.filter_keys({"doc-1", "doc-3"}) == {"doc-3"}
+        assert await docs.get_by_ids(["doc-2", "doc-3"]) == [{"content": "two"}, None]
+        await docs.delete(["doc-1"])
+        await docs.finalize()
+
+        reloaded = make(SQLiteKVStorage, tmp_path, "full_docs")
+        await reloaded.initialize()
+        assert await reloaded.get_all() == {"doc-2": {"content": "two"}}
+
+        cache = make(SQLiteKVStorage, tmp_path, "llm_response_cache")
+        await cache.initialize()
+        await cache.upsert({"default": {"h1": {"return": "a"}}})
+        # LightRAG upserts the whole mode dict; existing entries are kept
+        await cache.upsert({"default": {"h2": {"return": "b"}}})
+        assert await cache.get_by_mode_and_id("default", "h1") == {
+            "h1": {"return": "a"}
+        }
+        assert await cache.get_by_id("default") == {
+            "h1": {"return": "a"},
+            "h2": {"return": "b"},
+        }
+        assert await cache.get_by_id("global") is None
+
+    asyncio.run(run())
+
+
+def test_imports_existing_json_files(tmp_path) -> None:
+    (tmp_path / "kv_store_doc_status.json").write_text(
+        '{"doc-1": {"status": "processed", "content_summary": "s", "content_length": 1, '
+        '"created_at": "t", "updated_at": "t", "chunks_count": 1}}'
+    )
+
+    async def run():
+        status = make(SQLiteDocStatusStorage, tmp_path, "doc_status")
+        await status.initialize()
+        counts = await status.get_status_counts()
+        assert counts["processed"] == 1 and counts["pending"] == 0
+        docs = await status.get_docs_by_status(DocStatus.PROCESSED)
+        assert docs["doc-1"].content == "s"
+        assert docs["doc-1"].file_path == "no-file-path"
+
+    asyncio.run(run())
+
+
+def test_interrupted_import_is_redone(tmp_path, monkeypatch) -> None:
+    graph = nx.Graph()
+    graph.add_edge("A", "B", weight="1.0")
+    graph.add_edge("B", "C", weight="2.0")
+    nx.write_graphml(graph, tmp_path / "graph_chunk_entity_relation.graphml")
+
+    async def run():
+        merge_edge = SQLiteGraphStorage._merge_edge
+        calls = []
+
+        def crash_on_second_edge(self, *args):
+            calls.append(args)
+            if len(calls) == 2:
+                raise RuntimeError("crashed")
+            merge_edge(self, *args)
+
+        monkeypatch.setattr(SQLiteGraphStorage, "_merge_edge", crash_on_second_edge)
+        with pytest.raises(RuntimeError):
+            await make(
+                SQLiteGraphStorage, tmp_path, "chunk_entity_relation"
+            ).initialize()
+        monkeypatch.undo()
+
+        # The first edge was rolled back with the rest, and the import runs again
+        storage = make(SQLiteGraphStorage, tmp_path, "chunk_entity_relation")
+        await storage.initialize()
+        assert await storage.get_all_labels() == ["A", "B", "C"]
+        assert await storage.node_degree("B") == 2
+        await storage.remove_nodes(["A", "B", "C"])
+        await storage.finalize()
+
+        # A completed import is not repeated, even after the rows are removed
+        storage = make(SQLiteGraphStorage, tmp_path, "chunk_entity_relation")
+        await storage.initialize()
+        assert await storage.get_all_labels() == []
+
+    asyncio.run(run())
+
+
+def test_graph_matches_networkx(tmp_path) -> None:
+    graph = nx.Graph()
+    graph.add_node("A", entity_type="person")
+    graph.add_edge("A", "B", weight="1.0")
+    graph.add_edge("C", "B", weight="2.0")
+    graph.add_edge("C", "D", weight="3.0")
+    nx.write_graphml(graph, tmp_path / "graph_chunk_entity_relation.graphml")
+
+    async def run():
+        storage = make(SQLiteGraphStorage, tmp_path, "chunk_entity_relation")
+        await storage.initialize()
+        assert await storage.get_all_labels() == ["A", "B", "C", "D"]
+        assert await storage.has_edge("B", "C")
+        assert await storage.node_degree("B") == 2
+        assert sorted(await storage.get_node_edges("B")) == [("B", "A"), ("B", "C")]
+        assert await storage.get_node_edges("Z") is None
+
+        await storage.upsert_node("A", {"description": "x"})
+        assert await storage.get_node("A") == {
+            "entity_type": "person",
+            "description": "x",
+        }
+
+        kg = await storage.get_knowledge_graph("A", max_depth=2)
+        assert sorted(node.id for node in kg.nodes) == ["A", "B", "C"]
+        assert len(kg.edges) == 2
+
+        await storage.remove_nodes(["B"])
+        assert await storage.node_degree("C") == 1
+        assert not await storage.has_edge("A", "B")
+
+    asyncio.run(run())
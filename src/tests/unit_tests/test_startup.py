@@ -0,0 +1,69 @@
+import subprocess
+import sys
+from typing import TypedDict
+
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, START, StateGraph
+
+from benchmarks.startup import SRC_DIR, parse_importtime, time_by_package
+from react_agent.checkpoint import LazyCheckpointer
+
+
+def test_graph_imports_without_services(tmp_path) -> None:
+    code = (
+        "import sys, react_agent.graph as graph; "
+        "print(sorted(m for m in ('lightrag', 'langchain_openai', 'openai', 'langmem') if m in sys.modules)); "
+        "print(graph.intelligent_index.checkpointer._saver)"
+    )
+    env = {"PATH": "/usr/bin:/bin", "PYTHONPATH": SRC_DIR}
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=tmp_path,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    assert result.stdout.splitlines()[-2:] == ["[]", "None"]
+
+
+def test_lazy_checkpointer_builds_on_first_use() -> None:
+    class State(TypedDict):
+        count: int
+
+    built = []
+
+    def factory():
+        built.append(True)
+        return MemorySaver()
+
+    builder = StateGraph(State)
+    builder.add_node("step", lambda state: {"count": state["count"] + 1})
+    builder.add_edge(START, "step")
+    builder.add_edge("step", END)
+    graph = builder.compile(checkpointer=LazyCheckpointer(factory))
+    assert built == []
+
+    config = {"configurable": {"thread_id": "t"}}
+    assert graph.invoke({"count": 1}, config) == {"count": 2}
+    assert graph.get_state(config).values == {"count": 2}
+    assert built == [True]
+
+
+def test_importtime_parsing_groups_by_package() -> None:
+    output = "\n".join(
+        [
+            "import time: self [us] | cumulative | imported package",
+            "import time:       100 |        100 |     lightrag.utils",
+            "import time:       300 |        400 |   lightrag",
+            "import time:        50 |        450 | react_agent.utils",
+        ]
+    )
+    rows = parse_importtime(output)
+    assert [(row.depth, row.name) for row in rows] == [
+        (2, "lightrag.utils"),
+        (1, "lightrag"),
+        (0, "react_agent.utils"),
+    ]
+    assert time_by_package(rows) == {"lightrag": 400, "react_agent": 50}
@@ -0,0 +1,180 @@
+from datetime import date
+
+from langgraph.store.memory import InMemoryStore
+
+from react_agent.cache import StoreItemCache
+from react_agent.schemas import STMDatedNote, STMDelta, STMSectionUpdate
+from react_agent.stm import (
+    STMWindows,
+    apply_changes,
+    apply_delta,
+    compact,
+    dated_key,
+    dated_row,
+    delta_context,
+    load_or_migrate_rows,
+    load_rows,
+    parse_stm,
+    render_stm,
+    save_changes,
+    section_row,
+)
+
+
+def test_apply_delta_touches_only_named_rows() -> None:
+    rows = {
+        dated_key("day", date(2025, 3, 28)): dated_row(
+            "day", date(2025, 3, 28), ["Disk at 80%"]
+        ),
+        dated_key("month", date(2025, 1, 1)): dated_row(
+            "month", date(2025, 1, 1), ["Quiet month"]
+        ),
+        "general:alerts": section_row(
+            "Alerts", ["Backups fail on Mondays", "Node 3 is flaky"]
+        ),
+        "general:network": section_row("Network", ["Gateway restarts nightly"]),
+    }
+    delta = STMDelta(
+        dated=[
+            STMDatedNote(date="2025-03-28", points=["disk at 80%.", "Disk at 85%"]),
+            STMDatedNote(date="2025-01-14", points=["Late backup"]),
+            STMDatedNote(date="not a date", points=["Undated event"]),
+        ],
+        general=[
+            STMSectionUpdate(
+                section="alerts",
+                add=["Queue backs up at noon"],
+                remove=["Node 3 is flaky"],
+            )
+        ],
+    )
+
+    changes = apply_delta(rows, delta, fallback_day=date(2025, 3, 29))
+
+    assert changes == {
+        "day:2025-03-28": dated_row(
+            "day", date(2025, 3, 28), ["Disk at 80%", "Disk at 85%"]
+        ),
+        # A day that was already rolled up goes into the row covering it
+        "month:2025-01-01": dated_row(
+            "month", date(2025, 1, 1), ["Quiet month", "Late backup"]
+        ),
+        "day:2025-03-29": dated_row("day", date(2025, 3, 29), ["Undated event"]),
+        "general:alerts": section_row(
+            "Alerts", ["Backups fail on Mondays", "Queue backs up at noon"]
+        ),
+    }
+
+    apply_changes(
+        rows,
+        apply_delta(
+            rows,
+            STMDelta(
+                general=[
+                    STMSectionUpdate(
+                        section="Network", remove=["Gateway restarts nightly"]
+                    )
+                ]
+            ),
+            date(2025, 3, 29),
+        ),
+    )
+    assert "general:network" not in rows
+
+
+def test_compact_rolls_up_out_of_window_rows() -> None:
+    rows = {
+        dated_key("day", day): dated_row("day", day, [f"Event on {day}"])
+        for day in (
+            date(2025, 3, 3),
+            date(2025, 3, 4),
+            date(2025, 3, 20),
+            date(2025, 3, 29),
+        )
+    }
+    rows[dated_key("year", date(2019, 1, 1))] = dated_row(
+        "year", date(2019, 1, 1), ["Old news"]
+    )
+    calls = []
+
+    def summarize(period, points):
+        calls.append(period)
+        return points[:1]
+
+    changes = compact(rows, STMWindows(), max_points=10, summarize=summarize)
+
+    # Days more than a week before the newest one roll up into their weeks, which are recent enough to stay
+    assert set(rows) == {"week:2025-03-03", "week:2025-03-17", "day:2025-03-29"}
+    assert rows["week:2025-03-03"]["points"] == [
+        "Event on 2025-03-03",
+        "Event on 2025-03-04",
+    ]
+    assert changes["day:2025-03-03"] is None and changes["year:2019-01-01"] is None
+    assert calls == []
+
+    # Years later March 2025 has rolled up to its year, summarised once it went over the limit
+    rows[dated_key("day", date(2028, 6, 1))] = dated_row(
+        "day", date(2028, 6, 1), ["Later"]
+    )
+    compact(rows, STMWindows(), max_points=2, summarize=summarize)
+    assert set(rows) == {"year:2025-01-01", "day:2028-06-01"}
+    assert rows["year:2025-01-01"]["points"] == ["Event on 2025-03-03"]
+    assert calls == ["March 2025"]
+    assert compact(rows, STMWindows(), max_points=2, summarize=summarize) == {}
+
+
+def test_render_parse_roundtrip_and_legacy_report() -> None:
+    rows = {
+        dated_key("day", date(2025, 3, 29)): dated_row(
+            "day", date(2025, 3, 29), ["Disk at 80%"]
+        ),
+        dated_key("week", date(2025, 3, 17)): dated_row(
+            "week", date(2025, 3, 17), ["Backups slow"]
+        ),
+        dated_key("quarter", date(2024, 10, 1)): dated_row(
+            "quarter", date(2024, 10, 1), ["Migration"]
+        ),
+        "general:alerts": section_row("Alerts", ["Backups fail on Mondays"]),
+    }
+    text = render_stm(rows)
+    assert (
+        text.index("### 2025-03-29")
+        < text.index("### Week of 2025-03-17")
+        < text.index("### Q4 2024")
+    )
+    assert parse_stm(text) == rows
+    assert "Migration" not in delta_context(rows, recent_days=14)
+
+    # The free-text STM written before rows existed, and a manually set report
+    legacy = (
+        "# Long-Term Report\n\n## Section 1: Dated Data\n\n### Week of 2025-03-18 to 2025-03-24 (weekly summary)\n- A\n\n"
+        "### February 2025 (monthly summary)\n- *B*\n\n## Section 2: Undated (General Knowledge)\n- C\n"
+    )
+    assert parse_stm(legacy) == {
+        "week:2025-03-17": dated_row("week", date(2025, 3, 17), ["A"]),
+        "month:2025-02-01": dated_row("month", date(2025, 2, 1), ["*B*"]),
+        "general:general": section_row("General", ["C"]),
+    }
+    assert parse_stm("Watch the gateway.") == {
+        "general:notes": section_row("Notes", ["Watch the gateway."])
+    }
+
+
+def test_rows_migrate_from_the_stored_report() -> None:
+    store, cache = InMemoryStore(), StoreItemCache()
+    cache.put(store, ("stm",), "ns", {"report": "### 2025-03-29\n- Disk at 80%\n"})
+
+    rows = load_or_migrate_rows(store, cache, "ns")
+    assert rows == {
+        "day:2025-03-29": dated_row("day", date(2025, 3, 29), ["Disk at 80%"])
+    }
+    assert load_rows(store, "ns") == rows
+
+    changes = {
+        "general:alerts": section_row("Alerts", ["Node 3 is flaky"]),
+        "day:2025-03-29": None,
+    }
+    apply_changes(rows, changes)
+    save_changes(store, cache, "ns", rows, changes)
+    assert load_rows(store, "ns") == rows
+    assert "Node 3 is flaky" in cache.get(store, ("stm",), "ns").value["report"]
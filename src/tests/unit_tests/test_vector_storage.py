@@ -0,0 +1,152 @@
+import asyncio
+import os
+
+import numpy as np
+import pytest
+from lightrag.utils import EmbeddingFunc
+
+from react_agent.vector_storage import MemmapVectorStorage
+
+DIM = 8
+
+
+async def fake_embed(texts):
+    # Deterministic unit-ish vectors keyed by the first character
+    vectors = np.zeros((len(texts), DIM), dtype=np.float32)
+    for i, text in enumerate(texts):
+        vectors[i, ord(text[0]) % DIM] = 1.0
+        vectors[i, (ord(text[0]) + 1) % DIM] = 0.1
+    return vectors
+
+
+def make_storage(tmp_path, index, **kwargs):
+    return MemmapVectorStorage(
+        namespace="entities",
+        global_config={
+            "working_dir": str(tmp_path),
+            "embedding_batch_num": 4,
+            "vector_db_storage_cls_kwargs": {
+                "cosine_better_than_threshold": 0.5,
+                "index": index,
+                **kwargs,
+            },
+        },
+        embedding_func=EmbeddingFunc(
+            embedding_dim=DIM, max_token_size=100, func=fake_embed
+        ),
+        meta_fields={"entity_name", "content"},
+    )
+
+
+@pytest.mark.parametrize("index", ["hnsw", "exact"])
+def test_upsert_query_and_reload(tmp_path, index) -> None:
+    async def run():
+        storage = make_storage(tmp_path, index)
+        await storage.initialize()
+        await storage.upsert(
+            {
+                "ent-a": {"entity_name": "A", "content": "apple"},
+                "ent-b": {"entity_name": "B", "content": "banana"},
+                "ent-c": {"entity_name": "C", "content": "cherry"},
+            }
+        )
+        results = await storage.query("avocado", top_k=2)
+        assert [r["id"] for r in results] == ["ent-a"]
+        assert results[0]["entity_name"] == "A"
+
+        # Replacing a record moves it to a new row and masks the old one
+        await storage.upsert(
+            {"ent-a": {"entity_name": "A2", "content": "banana split"}}
+        )
+        results = await storage.query("blueberry", top_k=5)
+        assert sorted(r["id"] for r in results) == ["ent-a", "ent-b"]
+        assert await storage.query("apricot", top_k=5) == []
+
+        await storage.delete(["ent-b"])
+        await storage.finalize()
+
+        reloaded = make_storage(tmp_path, index)
+        await reloaded.initialize()
+        results = await reloaded.query("blueberry", top_k=5)
+        assert [(r["id"], r["entity_name"]) for r in results] == [("ent-a", "A2")]
+        assert (await reloaded.get_by_id("ent-c"))["entity_name"] == "C"
+        assert sorted(r["id"] for r in await reloaded.search_by_prefix("ent-")) == [
+            "ent-a",
+            "ent-c",
+        ]
+        await reloaded.finalize()
+
+    asyncio.run(run())
+
+
+def test_rebuilds_index_after_unclean_shutdown(tmp_path) -> None:
+    async def run():
+        storage = make_storage(tmp_path, "hnsw")
+        await storage.initialize()
+        await storage.upsert({"ent-a": {"entity_name": "A", "content": "apple"}})
+        await storage.index_done_callback()
+        # Written but never saved to the index file
+        await storage.upsert({"ent-b": {"entity_name": "B", "content": "banana"}})
+
+        reloaded = make_storage(tmp_path, "hnsw")
+        await reloaded.initialize()
+        assert [r["id"] for r in await reloaded.query("blueberry", top_k=5)] == [
+            "ent-b"
+        ]
+
+    asyncio.run(run())
+
+
+def test_query_restricted_to_ids(tmp_path) -> None:
+    async def run():
+        storage = make_storage(tmp_path, "hnsw")
+        await storage.initialize()
+        await storage.upsert(
+            {
+                "chunk-1": {"content": "apple"},
+                "chunk-2": {"content": "avocado"},
+            }
+        )
+        results = await storage.query("apricot", top_k=5, ids=["chunk-2"])
+        assert [r["id"] for r in results] == ["chunk-2"]
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("index", ["hnsw", "exact"])
+def test_compacts_dead_rows(tmp_path, index) -> None:
+    async def run():
+        storage = make_storage(tmp_path, index, compact_min_dead_rows=2)
+        await storage.initialize()
+        await storage.upsert(
+            {f"ent-{c}": {"entity_name": c, "content": c} for c in "abcd"}
+        )
+        await storage.upsert({"ent-a": {"entity_name": "A2", "content": "banana"}})
+        await storage.index_done_callback()
+        # One dead row of five is under the ratio
+        assert len(storage._row_ids) == 5
+
+        await storage.delete(["ent-b", "ent-c"])
+        await storage.index_done_callback()
+        assert storage._row_ids == ["ent-d", "ent-a"]
+        assert os.path.getsize(storage._matrix_path) == 2 * 4 * DIM
+        assert [
+            (r["id"], r["entity_name"])
+            for r in await storage.query("blueberry", top_k=5)
+        ] == [("ent-a", "A2")]
+
+        # New rows append after the compacted ones
+        await storage.upsert({"ent-e": {"entity_name": "E", "content": "elderberry"}})
+        await storage.finalize()
+
+        reloaded = make_storage(tmp_path, index)
+        await reloaded.initialize()
+        assert [r["id"] for r in await reloaded.query("banana", top_k=5)] == ["ent-a"]
+        assert [r["id"] for r in await reloaded.query("eel", top_k=5)] == ["ent-e"]
+        assert [r["id"] for r in await reloaded.query("dates", top_k=5)] == ["ent-d"]
+        assert [name for name in os.listdir(tmp_path) if name.endswith(".f32")] == [
+            "vdb_entities.1.f32"
+        ]
+        await reloaded.finalize()
+
+    asyncio.run(run())